@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import argparse
+import http.server
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from yt_dlp.utils import Popen
+
+from ytdlp_gui.cancel import CancelToken
+from ytdlp_gui.engine import DownloadEngine
+from ytdlp_gui.models import DownloadStatus, DownloadTask, QualityPreset
+
+_TS_PACKET = 188
+_CHUNK = 8 * 1024
+
+def _serve(segments: int, segment_kb: int, stall: float) -> http.server.ThreadingHTTPServer:
+    segment = b"\x47" + b"\x00" * (_TS_PACKET * (segment_kb * 1024 // _TS_PACKET) - 1)
+    playlist = (
+        "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:2\n#EXT-X-MEDIA-SEQUENCE:0\n"
+        + "".join(f"#EXTINF:2.0,\nseg{i}.ts\n" for i in range(segments))
+        + "#EXT-X-ENDLIST\n"
+    ).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            if self.path.startswith("/stall"):
+                time.sleep(stall)
+            is_playlist = self.path.endswith(".m3u8")
+            body = playlist if is_playlist else segment
+            self.send_response(200)
+            self.send_header(
+                "Content-Type", "application/vnd.apple.mpegurl" if is_playlist else "video/mp2t",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for start in range(0, len(body), _CHUNK):
+                self.wfile.write(body[start:start + _CHUNK])
+                if not is_playlist:
+                    time.sleep(0.05)
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def handle_one_request(self) -> None:
+            try:
+                super().handle_one_request()
+            except ConnectionError:
+                self.close_connection = True
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _task(url: str, out_dir: Path) -> DownloadTask:
+    return DownloadTask(
+        url=url,
+        output_dir=str(out_dir),
+        quality=QualityPreset.BALANCED,
+        thumbnail=False,
+        metadata=False,
+        chapters=False,
+    )
+
+def _wait(engine: DownloadEngine, tasks: list[DownloadTask]) -> None:
+    while any(
+        engine.get_task(t.id) or (t.status is DownloadStatus.CANCELED and not t.cancel_latency)
+        for t in tasks
+    ):
+        time.sleep(0.01)
+
+def _run(base: str, out_dir: Path, args: argparse.Namespace, *, process_mode: bool) -> None:
+    label = "process" if process_mode else "threaded"
+    engine = DownloadEngine(
+        max_concurrent=1,
+        concurrent_fragments=args.fragments,
+        socket_timeout=args.stall * 2,
+        process_mode=process_mode,
+        cancel_cleanup=args.cleanup,
+    )
+    try:
+        for rnd in range(args.rounds):
+            blocker = _task(f"{base}/{label}-busy-{rnd}.m3u8", out_dir)
+            queued = _task(f"{base}/{label}-queued-{rnd}.m3u8", out_dir)
+            engine.submit(blocker)
+            engine.submit(queued)
+            time.sleep(args.delay)
+            engine.cancel(queued.id)
+            engine.cancel(blocker.id)
+            _wait(engine, [blocker, queued])
+
+            stalled = _task(f"{base}/stall-{label}-{rnd}.m3u8", out_dir)
+            engine.submit(stalled)
+            time.sleep(args.delay)
+            engine.cancel(stalled.id)
+            _wait(engine, [stalled])
+    finally:
+        stats = engine.cancel_stats()
+        engine.shutdown()
+    for phase, s in sorted(stats.items()):
+        print(f"{label:<9} {phase:<12} {s['count']:>3} cancels  mean {s['mean_ms']:8.1f} ms  "
+              f"max {s['max_ms']:8.1f} ms")
+
+def _child_process(rounds: int, delay: float) -> None:
+    latencies = []
+    for _ in range(rounds):
+        token = CancelToken()
+
+        def run() -> None:
+            with token.bind():
+                Popen.run([sys.executable, "-c", "import time; time.sleep(60)"])
+
+        runner = threading.Thread(target=run)
+        runner.start()
+        time.sleep(delay)
+        token.set("merging")
+        runner.join()
+        latencies.append(token.elapsed * 1000)
+    print(f"{'child':<9} {'process':<12} {rounds:>3} cancels  mean {sum(latencies) / rounds:8.1f} ms  "
+          f"max {max(latencies):8.1f} ms  (ffmpeg stand-in)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cancel-to-slot-release latency per phase")
+    parser.add_argument("-f", "--fragments", type=int, default=4)
+    parser.add_argument("-s", "--segments", type=int, default=100)
+    parser.add_argument("--segment-kb", type=int, default=256)
+    parser.add_argument("--stall", type=int, default=20, help="seconds the stalled URL waits before answering")
+    parser.add_argument("--delay", type=float, default=2.0, help="seconds between submit and cancel")
+    parser.add_argument("--cleanup", choices=("delete", "keep"), default="delete")
+    parser.add_argument("-r", "--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    server = _serve(args.segments, args.segment_kb, args.stall)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    out_dir = Path(tempfile.mkdtemp(prefix="ytdlp-bench-"))
+    try:
+        print(f"cancel {args.delay:.1f}s after start, {args.fragments} fragments, "
+              f"stalled URL answers after {args.stall}s, cleanup={args.cleanup}")
+        for process_mode in (False, True):
+            _run(base, out_dir, args, process_mode=process_mode)
+        _child_process(args.rounds, args.delay)
+        left = [p.name for p in out_dir.rglob("*") if p.is_file()]
+        print(f"files left in the output directory: {len(left)}"
+              + (f" ({', '.join(sorted(left)[:4])}{', …' if len(left) > 4 else ''})" if left else ""))
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_process_mode import _serve
+
+from ytdlp_gui.cluster import ClusterQueue
+from ytdlp_gui.models import DownloadTask, QualityPreset
+from ytdlp_gui.utils import format_bytes
+
+def _spawn_worker(db: Path, worker_id: str, out_dir: Path, args: argparse.Namespace) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "ytdlp_gui.cluster", "--db", str(db), "worker",
+            "--id", worker_id, "--slots", str(args.slots), "--output-dir", str(out_dir),
+            "--lease", str(args.lease), "--heartbeat", str(args.lease / 3),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared-queue workers with lease failover")
+    parser.add_argument("-w", "--workers", type=int, default=3)
+    parser.add_argument("-t", "--tasks", type=int, default=12)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("-s", "--segments", type=int, default=40)
+    parser.add_argument("--segment-kb", type=int, default=256)
+    parser.add_argument("--lease", type=float, default=3.0)
+    parser.add_argument("--no-kill", action="store_true", help="do not kill a worker mid-download")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    server = ctx.Process(
+        target=_serve, args=(port_queue, args.segments, args.segment_kb), daemon=True,
+    )
+    server.start()
+    port = port_queue.get(timeout=30)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ytdlp-cluster-"))
+    db = work_dir / "queue.db"
+    out_dir = work_dir / "out"
+    queue = ClusterQueue(db)
+    workers: list[subprocess.Popen] = []
+    try:
+        for i in range(args.tasks):
+            queue.enqueue(DownloadTask(
+                url=f"http://127.0.0.1:{port}/cluster-{i}.m3u8",
+                output_dir=str(out_dir),
+                quality=QualityPreset.BALANCED,
+                thumbnail=False,
+                metadata=False,
+                chapters=False,
+            ))
+        print(f"{args.tasks} tasks, {args.workers} workers x {args.slots} slots, "
+              f"{args.lease:.0f}s leases, queue {db}")
+
+        start = time.perf_counter()
+        workers = [_spawn_worker(db, f"w{i}", out_dir, args) for i in range(args.workers)]
+        victim = None if args.no_kill else workers[0]
+        while True:
+            summary = queue.summary()
+            if victim is not None and any(
+                t["worker"] == "w0" and t["downloaded"] for t in queue.tasks("leased")
+            ):
+                victim.kill()
+                print(f"killed w0 at {time.perf_counter() - start:.1f}s with "
+                      f"{summary['leased']} task(s) in flight")
+                victim = None
+            if not summary["queued"] and not summary["leased"]:
+                break
+            time.sleep(0.25)
+        elapsed = time.perf_counter() - start
+
+        rows = queue.tasks()
+        statuses = Counter(r["status"] for r in rows)
+        finished_by = Counter(r["worker"] for r in rows if r["status"] == "completed")
+        reassigned = sum(1 for r in rows if r["attempts"] > 1)
+        total = sum(r["downloaded"] for r in rows)
+        print(f"finished in {elapsed:.2f}s  {format_bytes(total / elapsed)}/s  "
+              f"{dict(statuses)}  re-leased {reassigned}")
+        print("completed per worker: " + ", ".join(f"{w} {n}" for w, n in sorted(finished_by.items())))
+    finally:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.wait(10)
+        queue.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        server.kill()
+
+if __name__ == "__main__":
+    main()
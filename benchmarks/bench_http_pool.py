@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import http.server
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_dlp
+
+from ytdlp_gui.netpool import DnsCache, HttpPool, install
+
+_HOST = "cdn.pool.test"
+_PAYLOAD = b"x" * 64 * 1024
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self) -> None:
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(_PAYLOAD)
+
+    def log_message(self, *args) -> None:
+        pass
+
+def _make_cert(directory: Path) -> tuple[Path, Path] | None:
+    if not shutil.which("openssl"):
+        return None
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", str(key), "-out", str(cert), "-subj", f"/CN={_HOST}",
+            "-addext", f"subjectAltName=DNS:{_HOST}",
+        ],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+def _serve(cert: tuple[Path, Path] | None) -> tuple[http.server.ThreadingHTTPServer, str]:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    scheme = "http"
+    if cert:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(*map(str, cert))
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://{_HOST}:{server.server_address[1]}/segment"
+
+def _fetch(ydl: yt_dlp.YoutubeDL, url: str, n: int, workers: int) -> None:
+    def worker(count: int) -> None:
+        for _ in range(count):
+            with ydl.urlopen(url) as res:
+                res.read()
+
+    threads = [threading.Thread(target=worker, args=(n // workers,)) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request connections vs shared keep-alive pool")
+    parser.add_argument("-n", "--requests", type=int, default=400)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert = _make_cert(Path(tmp))
+        server, url = _serve(cert)
+        client_ctx = None
+        if cert:
+            client_ctx = ssl.create_default_context(cafile=str(cert[0]))
+
+        resolver = DnsCache(overrides={_HOST: "127.0.0.1"})
+        pool = HttpPool(max_per_host=args.workers, resolver=resolver, ssl_context=client_ctx)
+
+        with yt_dlp.YoutubeDL({"quiet": True, "nocheckcertificate": True}) as ydl:
+            baseline_url = url.replace(_HOST, "127.0.0.1")
+            _Handler.connections = 0
+            start = time.perf_counter()
+            _fetch(ydl, baseline_url, args.requests, args.workers)
+            plain = time.perf_counter() - start
+            plain_conns = _Handler.connections
+
+        with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+            install(ydl, pool)
+            _Handler.connections = 0
+            start = time.perf_counter()
+            _fetch(ydl, url, args.requests, args.workers)
+            pooled = time.perf_counter() - start
+            pooled_conns = _Handler.connections
+
+        pool.close()
+        server.shutdown()
+
+    print(f"scheme:  {url.split(':')[0]}, {args.requests} requests, {args.workers} workers")
+    print(f"urllib:  {plain:.2f}s, {plain_conns} connections")
+    print(f"pooled:  {pooled:.2f}s, {pooled_conns} connections")
+    print(f"pool:    {pool.summary()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import argparse
+import http.server
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ytdlp_gui.engine import DownloadEngine
+from ytdlp_gui.models import DownloadStatus, DownloadTask, QualityPreset
+from ytdlp_gui.utils import format_bytes
+
+_TS_PACKET = 188
+
+def _serve(port_queue: multiprocessing.Queue, segments: int, segment_kb: int) -> None:
+    segment = b"\x47" + b"\x00" * (_TS_PACKET * (segment_kb * 1024 // _TS_PACKET) - 1)
+    playlist = (
+        "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:2\n#EXT-X-MEDIA-SEQUENCE:0\n"
+        + "".join(f"#EXTINF:2.0,\nseg{i}.ts\n" for i in range(segments))
+        + "#EXT-X-ENDLIST\n"
+    ).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            is_playlist = self.path.endswith(".m3u8")
+            body = playlist if is_playlist else segment
+            self.send_response(200)
+            self.send_header(
+                "Content-Type", "application/vnd.apple.mpegurl" if is_playlist else "video/mp2t",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def handle_one_request(self) -> None:
+            try:
+                super().handle_one_request()
+            except ConnectionError:
+                self.close_connection = True
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+def _run_batch(engine: DownloadEngine, port: int, out_dir: Path, tasks: int, tag: str) -> tuple[float, int]:
+    batch = [
+        DownloadTask(
+            url=f"http://127.0.0.1:{port}/{tag}-{i}.m3u8",
+            output_dir=str(out_dir),
+            quality=QualityPreset.BALANCED,
+            thumbnail=False,
+            metadata=False,
+            chapters=False,
+        )
+        for i in range(tasks)
+    ]
+    start = time.perf_counter()
+    for task in batch:
+        engine.submit(task)
+    while engine.active_count:
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+
+    failed = [t for t in batch if t.status != DownloadStatus.COMPLETED]
+    if failed:
+        raise SystemExit(f"{len(failed)} task(s) failed: {failed[0].error}")
+    return elapsed, sum(Path(t.output_path).stat().st_size for t in batch)
+
+def _run(port: int, out_dir: Path, args: argparse.Namespace, *, process_mode: bool) -> None:
+    label = "process" if process_mode else "threaded"
+    events = {"progress": 0}
+
+    def on_progress(_task_id: str, _d: dict) -> None:
+        events["progress"] += 1
+
+    engine = DownloadEngine(
+        max_concurrent=args.tasks,
+        concurrent_fragments=args.fragments,
+        process_mode=process_mode,
+        on_progress=on_progress,
+    )
+    try:
+        for rnd in range(1, args.rounds + 1):
+            events["progress"] = 0
+            elapsed, total = _run_batch(engine, port, out_dir, args.tasks, f"{label}{rnd}")
+            note = " (includes worker start-up)" if process_mode and rnd == 1 else ""
+            print(f"{label:<9} round {rnd}  {elapsed:6.2f}s  {format_bytes(total / elapsed)}/s  "
+                  f"{events['progress']} progress events{note}")
+    finally:
+        engine.shutdown()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Threaded vs process-pool engine throughput")
+    parser.add_argument("-t", "--tasks", type=int, default=5)
+    parser.add_argument("-f", "--fragments", type=int, default=8)
+    parser.add_argument("-s", "--segments", type=int, default=200)
+    parser.add_argument("--segment-kb", type=int, default=256)
+    parser.add_argument("-r", "--rounds", type=int, default=2)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    server = ctx.Process(
+        target=_serve, args=(port_queue, args.segments, args.segment_kb), daemon=True,
+    )
+    server.start()
+    port = port_queue.get(timeout=30)
+
+    out_dir = Path(tempfile.mkdtemp(prefix="ytdlp-bench-"))
+    try:
+        print(f"{args.tasks} tasks x {args.fragments} fragments, "
+              f"{args.segments} x {args.segment_kb} KB segments per task, "
+              f"{os.cpu_count()} CPU(s)")
+        for process_mode in (False, True):
+            _run(port, out_dir, args, process_mode=process_mode)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        server.kill()
+
+if __name__ == "__main__":
+    main()
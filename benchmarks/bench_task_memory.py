@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import gc
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ytdlp_gui.models import DownloadStatus, DownloadTask, QualityPreset
+from ytdlp_gui.registry import TaskRegistry
+from ytdlp_gui.utils import format_bytes
+
+def _unslotted() -> type:
+    spec = []
+    for f in dataclasses.fields(DownloadTask):
+        if f.default is not dataclasses.MISSING:
+            spec.append((f.name, f.type, dataclasses.field(default=f.default)))
+        elif f.default_factory is not dataclasses.MISSING:
+            spec.append((f.name, f.type, dataclasses.field(default_factory=f.default_factory)))
+        else:
+            spec.append((f.name, f.type))
+    return dataclasses.make_dataclass("DictTask", spec)
+
+def _make(cls: type, i: int, out_dir: str) -> DownloadTask:
+    task = cls(
+        url=f"https://www.youtube.com/watch?v={i:011d}",
+        output_dir=out_dir,
+        quality=QualityPreset.BALANCED,
+        playlist_index=i % 500 + 1,
+        playlist_total=500,
+    )
+    task.title = f"Playlist entry number {i}"
+    return task
+
+def _finish(task: DownloadTask, i: int) -> None:
+    task.status = DownloadStatus.COMPLETED
+    task.progress = 100.0
+    task.downloaded_bytes = task.total_bytes = 40_000_000 + i
+    task.output_path = f"{task.output_dir}/Playlist entry number {i}.mp4"
+    task.started_at = 1_700_000_000.0 + i
+    task.completed_at = task.started_at + 12.5
+
+def _measure(label: str, run: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    keep = run()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} retained {format_bytes(retained):>10}  peak {format_bytes(peak):>10}  "
+          f"{elapsed:6.2f}s")
+    del keep
+    return retained
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory held by finished tasks in a long session")
+    parser.add_argument("-n", "--tasks", type=int, default=100_000)
+    parser.add_argument("--recent", type=int, default=500)
+    args = parser.parse_args()
+    out_dir = "/home/user/Videos/YouTube Downloads"
+    dict_task = _unslotted()
+
+    print(f"{args.tasks:,} tasks, {len(dataclasses.fields(DownloadTask))} fields per task")
+    records_dict = _measure(
+        "records, __dict__ dataclass", lambda: [_make(dict_task, i, out_dir) for i in range(args.tasks)],
+    )
+    records_slots = _measure(
+        "records, slots=True dataclass", lambda: [_make(DownloadTask, i, out_dir) for i in range(args.tasks)],
+    )
+    print(f"  per task: {records_dict / args.tasks:.0f} B → {records_slots / args.tasks:.0f} B")
+
+    def unbounded(cls: type) -> dict[str, DownloadTask]:
+        tasks: dict[str, DownloadTask] = {}
+        for i in range(args.tasks):
+            task = _make(cls, i, out_dir)
+            tasks[task.id] = task
+            _finish(task, i)
+        return tasks
+
+    def bounded() -> TaskRegistry:
+        registry = TaskRegistry(args.recent)
+        for i in range(args.tasks):
+            task = _make(DownloadTask, i, out_dir)
+            registry.add(task)
+            _finish(task, i)
+            registry.update(task.id)
+        return registry
+
+    print("session that submits and finishes every task:")
+    _measure("  unbounded dict, __dict__", lambda: unbounded(dict_task))
+    _measure("  unbounded dict, slots", lambda: unbounded(DownloadTask))
+    _measure(f"  TaskRegistry({args.recent}), slots", bounded)
+
+if __name__ == "__main__":
+    main()
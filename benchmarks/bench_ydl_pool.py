@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_dlp
+
+from ytdlp_gui.ydl_pool import YdlPool
+
+_COOKIES = "# Netscape HTTP Cookie File\n" + "".join(
+    f".example.com\tTRUE\t/\tFALSE\t2147483647\tcookie{i}\tvalue{i}\n" for i in range(50)
+)
+
+def _task_opts(cookiefile: str, index: int) -> dict:
+    return {
+        "quiet": True,
+        "no_warnings": True,
+        "no_color": True,
+        "cookiefile": cookiefile,
+        "socket_timeout": 30,
+        "format": "bestvideo[height<=1080]+bestaudio/best",
+        "outtmpl": f"%(title)s-{index}.%(ext)s",
+        "progress_hooks": [lambda d: None],
+        "postprocessors": [{"key": "FFmpegMetadata", "add_metadata": True}],
+    }
+
+def _touch(ydl: yt_dlp.YoutubeDL) -> None:
+    ydl.cookiejar
+    ydl._request_director
+
+def bench_fresh(cookiefile: str, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        with yt_dlp.YoutubeDL(_task_opts(cookiefile, i)) as ydl:
+            _touch(ydl)
+    return time.perf_counter() - start
+
+def bench_pooled(cookiefile: str, n: int) -> float:
+    pool = YdlPool()
+    start = time.perf_counter()
+    for i in range(n):
+        with pool.session(_task_opts(cookiefile, i)) as ydl:
+            _touch(ydl)
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fresh vs pooled YoutubeDL setup cost")
+    parser.add_argument("-n", "--tasks", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cookiefile = str(Path(tmp) / "cookies.txt")
+        Path(cookiefile).write_text(_COOKIES)
+        fresh = bench_fresh(cookiefile, args.tasks)
+        pooled = bench_pooled(cookiefile, args.tasks)
+
+    print(f"tasks:  {args.tasks}")
+    print(f"fresh:  {fresh:.2f}s ({fresh / args.tasks * 1000:.2f} ms/task)")
+    print(f"pooled: {pooled:.2f}s ({pooled / args.tasks * 1000:.2f} ms/task)")
+    print(f"saved:  {fresh - pooled:.2f}s ({(1 - pooled / fresh) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
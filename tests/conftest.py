@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import http.client
+import json
+from typing import Any
+
+import pytest
+
+from ytdlp_gui import config
+from ytdlp_gui.api import ControlServer
+from ytdlp_gui.engine import DownloadEngine
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config, "SETTINGS_FILE", tmp_path / "settings.json")
+    monkeypatch.setattr(config, "HISTORY_FILE", tmp_path / "history.json")
+    monkeypatch.setattr(config, "SUBSCRIPTIONS_FILE", tmp_path / "subscriptions.json")
+    return tmp_path
+
+@pytest.fixture
+def engine():
+    engine = DownloadEngine(max_concurrent=1)
+    yield engine
+    engine.shutdown()
+
+@pytest.fixture
+def make_server(config_dir, engine):
+    servers: list[ControlServer] = []
+
+    def make(**kwargs: Any) -> ControlServer:
+        kwargs.setdefault("submit", lambda task: None)
+        server = ControlServer(engine, config.SettingsManager(), port=0, **kwargs)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+def _request(
+    server: ControlServer,
+    method: str,
+    path: str,
+    body: Any = None,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, Any]:
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    headers = dict(headers or {})
+    data = None
+    if body is not None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        headers.setdefault("Content-Type", "application/json")
+    try:
+        conn.request(method, path, data, headers)
+        resp = conn.getresponse()
+        raw = resp.read()
+    finally:
+        conn.close()
+    return resp.status, json.loads(raw) if raw else None
+
+@pytest.fixture
+def call():
+    return _request
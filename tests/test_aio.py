@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from ytdlp_gui.aio import AsyncDownloadEngine
+from ytdlp_gui.models import DownloadStatus, DownloadTask, EngineEvent, EventKind
+
+def test_full_queue_keeps_status_events(config_dir):
+    async def main():
+        async with AsyncDownloadEngine(event_queue_size=5) as engine:
+            events = engine.events()
+            consumer = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0)
+            for pct in range(20):
+                engine._deliver(EngineEvent("t", EventKind.PROGRESS, {"percent": pct}))
+            engine._deliver(EngineEvent("t", EventKind.STATUS, DownloadStatus.COMPLETED))
+            received = [await consumer]
+            while received[-1].kind is not EventKind.STATUS:
+                received.append(await events.__anext__())
+            await events.aclose()
+            return received
+
+    received = asyncio.run(main())
+    assert received[-1].data is DownloadStatus.COMPLETED
+    assert sum(e.kind is EventKind.PROGRESS for e in received) == 5
+
+def test_submit_runs_off_the_loop(config_dir):
+    async def main():
+        async with AsyncDownloadEngine() as engine:
+            engine.engine.pause_all()
+            called_on = []
+            submit = engine.engine.submit
+
+            def spy(task):
+                called_on.append(threading.current_thread())
+                submit(task)
+
+            engine.engine.submit = spy
+            future = await engine.submit(DownloadTask(url="https://youtu.be/abcdefghijk", output_dir="/tmp"))
+            assert not future.done()
+            return called_on
+
+    called_on = asyncio.run(main())
+    assert len(called_on) == 1
+    assert called_on[0] is not threading.main_thread()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import pytest
+
+def _submit(make_server, call, headers=None, body=None, **kwargs):
+    submitted = []
+    server = make_server(submit=submitted.append, **kwargs)
+    body = body if body is not None else {"url": "https://youtu.be/abc", "output_dir": "/tmp/out"}
+    status, data = call(server, "POST", "/api/tasks", body, headers)
+    return server, status, data, submitted
+
+def test_submit_json(make_server, call):
+    _, status, data, submitted = _submit(make_server, call)
+    assert status == 201
+    assert [t.id for t in submitted] == [data["id"]]
+
+def test_rejects_non_json_body(make_server, call):
+    _, status, _, submitted = _submit(make_server, call, headers={"Content-Type": "text/plain"})
+    assert status == 415
+    assert not submitted
+
+def test_rejects_foreign_origin(make_server, call):
+    _, status, _, submitted = _submit(make_server, call, headers={"Origin": "https://attacker.example"})
+    assert status == 403
+    assert not submitted
+
+def test_accepts_own_origin(make_server, call):
+    server = make_server()
+    port = server.server_address[1]
+    status, _ = call(server, "GET", "/api/tasks", headers={"Origin": f"http://127.0.0.1:{port}"})
+    assert status == 200
+
+def test_rejects_rebound_host(make_server, call):
+    server = make_server()
+    status, _ = call(server, "GET", "/api/tasks", headers={"Host": "attacker.example"})
+    assert status == 403
+
+def test_accepts_localhost_name(make_server, call):
+    server = make_server()
+    status, _ = call(server, "GET", "/api/tasks", headers={"Host": f"localhost:{server.server_address[1]}"})
+    assert status == 200
+
+def test_any_host_with_token(make_server, call):
+    server = make_server(token="secret")
+    status, _ = call(server, "GET", "/api/tasks", headers={"Host": "nas.lan:8765"})
+    assert status == 401
+    status, _ = call(
+        server, "GET", "/api/tasks", headers={"Host": "nas.lan:8765", "Authorization": "Bearer secret"},
+    )
+    assert status == 200
+
+@pytest.mark.parametrize("field", ["cookies_path", "proxy"])
+def test_local_options_need_token(make_server, call, field):
+    body = {"url": "https://youtu.be/abc", "output_dir": "/tmp/out", field: "/tmp/x"}
+    _, status, _, submitted = _submit(make_server, call, body=body)
+    assert status == 403
+    assert not submitted
+    _, status, _, submitted = _submit(
+        make_server, call, body=body, token="secret", headers={"Authorization": "Bearer secret"},
+    )
+    assert status == 201
+    assert getattr(submitted[0], field) == "/tmp/x"
+
+def test_task_routes(make_server, call):
+    server = make_server()
+    status, task = call(server, "POST", "/api/tasks", {"url": "https://youtu.be/abc", "output_dir": "/tmp/out"})
+    assert status == 201
+    path = f"/api/tasks/{task['id']}"
+    status, data = call(server, "GET", path)
+    assert (status, data["url"]) == (200, "https://youtu.be/abc")
+    status, data = call(server, "PATCH", path, {"priority": 7})
+    assert (status, data["priority"]) == (200, 7)
+    assert call(server, "PATCH", path, {"priority": "high"})[0] == 400
+    assert call(server, "PATCH", path, {"title": "x"})[0] == 400
+    status, data = call(server, "GET", "/api/tasks")
+    assert [t["id"] for t in data["tasks"]] == [task["id"]]
+    assert call(server, "DELETE", path)[0] == 202
+    assert call(server, "GET", "/api/tasks/nope")[0] == 404
+    assert call(server, "POST", path)[0] == 405
+    assert call(server, "GET", "/api/unknown")[0] == 404
+
+def test_submit_validation(make_server, call):
+    server = make_server()
+    assert call(server, "POST", "/api/tasks", {"output_dir": "/tmp"})[0] == 400
+    assert call(server, "POST", "/api/tasks", {"url": "u", "quality": "ultra"})[0] == 400
+    assert call(server, "POST", "/api/tasks", b"[1, 2]")[0] == 400
+    assert call(server, "POST", "/api/tasks", b"{not json")[0] == 400
+
+def test_queue_pause_parks_engine_tasks(make_server, call, engine):
+    server = make_server(submit=None)
+    status, data = call(server, "POST", "/api/queue/pause")
+    assert (status, data["paused"]) == (202, True)
+    status, task = call(server, "POST", "/api/tasks", {"url": "https://youtu.be/abc", "output_dir": "/tmp/out"})
+    assert (status, task["status"]) == (201, "paused")
+    status, data = call(server, "GET", "/api/tasks?status=paused")
+    assert [t["id"] for t in data["tasks"]] == [task["id"]]
+    assert call(server, "POST", f"/api/tasks/{task['id']}/pause")[0] == 202
+    assert call(server, "GET", "/api/stats")[1]["paused"] == 1
+    call(server, "DELETE", f"/api/tasks/{task['id']}")
+    assert call(server, "POST", f"/api/tasks/{task['id']}/resume")[0] == 409
+
+def test_history_and_subscriptions(make_server, call):
+    from ytdlp_gui import config
+
+    config.save_history([
+        {"url": "https://youtu.be/a", "title": "Cats", "status": "completed"},
+        {"url": "https://youtu.be/b", "title": "Dogs", "status": "failed"},
+    ])
+    server = make_server()
+    assert [e["title"] for e in call(server, "GET", "/api/history?q=cat")[1]["entries"]] == ["Cats"]
+    assert [e["title"] for e in call(server, "GET", "/api/history?status=failed")[1]["entries"]] == ["Dogs"]
+    assert call(server, "GET", "/api/history?limit=x")[0] == 400
+    assert call(server, "GET", "/api/subscriptions")[0] == 404
+
+def _open_stream(server, path):
+    import socket
+
+    host, port = server.server_address[:2]
+    sock = socket.create_connection((host, port), timeout=10)
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode())
+    return sock
+
+def _read_until(sock, needle, limit=1 << 20):
+    data = b""
+    while needle not in data:
+        chunk = sock.recv(65536)
+        if not chunk or len(data) > limit:
+            break
+        data += chunk
+    return data
+
+def _read_all(sock):
+    data = b""
+    while chunk := sock.recv(65536):
+        data += chunk
+    return data
+
+def test_event_streams_fan_out(make_server, call):
+    from ytdlp_gui.models import DownloadStatus, EngineEvent, EventKind
+
+    server = make_server()
+    _, task = call(server, "POST", "/api/tasks", {"url": "https://youtu.be/abc", "output_dir": "/tmp/out"})
+    streams = [_open_stream(server, "/api/events") for _ in range(20)]
+    scoped = [_open_stream(server, f"/api/tasks/{task['id']}/events") for _ in range(5)]
+    try:
+        for sock in streams:
+            assert b"event: snapshot" in _read_until(sock, b"event: snapshot")
+        for sock in scoped:
+            assert b"event: task" in _read_until(sock, b"event: task")
+        for pct in range(50):
+            server._on_event(EngineEvent(task["id"], EventKind.PROGRESS, {"percent": pct}))
+        server._on_event(EngineEvent(task["id"], EventKind.LOG, "[INFO] done"))
+        server._on_event(EngineEvent(task["id"], EventKind.STATUS, DownloadStatus.COMPLETED))
+        for sock in streams:
+            data = _read_until(sock, b'"status":"completed"')
+            assert b"[INFO] done" in data
+            assert b'"percent":49' in data
+        for sock in scoped:
+            data = _read_all(sock)
+            assert b'"status":"completed"' in data
+    finally:
+        for sock in streams + scoped:
+            sock.close()
+    assert server.hub.dropped == 0
+
+def test_stream_for_unknown_task(make_server):
+    server = make_server()
+    sock = _open_stream(server, "/api/tasks/nope/events")
+    try:
+        assert b"404" in _read_until(sock, b"\r\n")
+    finally:
+        sock.close()
+
+def test_slow_client_is_dropped():
+    import socket
+    import time
+
+    from ytdlp_gui.api import SseHub
+    from ytdlp_gui.models import EventKind
+
+    hub = SseHub(max_buffer=64 * 1024)
+    hub.start()
+    reader, writer = socket.socketpair()
+    reader.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    try:
+        hub.add(writer, None, lambda: (b"", False))
+        payload = b"event: log\ndata: " + b"x" * 8192 + b"\n\n"
+        deadline = time.monotonic() + 10
+        while not hub.dropped and time.monotonic() < deadline:
+            hub.publish("t", EventKind.LOG, payload)
+            time.sleep(0.001)
+        assert hub.dropped == 1
+        deadline = time.monotonic() + 5
+        while hub.client_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert hub.client_count == 0
+    finally:
+        hub.close()
+        reader.close()
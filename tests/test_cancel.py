@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import sys
+import threading
+
+from yt_dlp.utils import Popen
+
+from ytdlp_gui.cancel import CancelToken
+
+_SLEEP = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+def _wait(proc: Popen) -> int | None:
+    try:
+        return proc.wait(5)
+    except Exception:
+        proc.kill()
+        return None
+
+def test_hook_is_removed_after_last_binding():
+    original = Popen.__init__
+    outer, inner = CancelToken(), CancelToken()
+    with outer.bind():
+        assert Popen.__init__ is not original
+        with inner.bind():
+            pass
+        assert Popen.__init__ is not original
+    assert Popen.__init__ is original
+
+def test_cancel_terminates_bound_children():
+    token = CancelToken()
+    with token.bind():
+        proc = Popen(_SLEEP)
+    token.set()
+    assert _wait(proc) is not None
+
+def test_child_started_after_cancel_is_killed():
+    token = CancelToken()
+    token.set()
+    with token.bind():
+        proc = Popen(_SLEEP)
+    assert _wait(proc) is not None
+
+def test_unbound_threads_are_not_adopted():
+    token = CancelToken()
+    started = threading.Event()
+    procs: list[Popen] = []
+
+    def other() -> None:
+        procs.append(Popen(_SLEEP))
+        started.set()
+
+    with token.bind():
+        thread = threading.Thread(target=other)
+        thread.start()
+        started.wait(5)
+        token.set()
+        thread.join()
+    try:
+        assert procs[0].poll() is None
+    finally:
+        procs[0].kill()
+        procs[0].wait()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+from ytdlp_gui.flights import canonical_id
+
+@pytest.mark.parametrize(("url", "playlist", "key"), [
+    ("https://www.youtube.com/watch?v=abcdefghijk&list=PLx&index=2", False, "Youtube:abcdefghijk"),
+    ("https://youtu.be/abcdefghijk?list=PLBCF2DAC6FFB574DE", False, "Youtube:abcdefghijk"),
+    (" https://www.youtube.com/watch?v=abcdefghijk ", False, "Youtube:abcdefghijk"),
+    ("https://vimeo.com/123456", False, "Vimeo:123456"),
+    ("https://example.com/watch.php?index=1", False, "url:https://example.com/watch.php?index=1"),
+    ("https://example.com/watch.php?list=a&v=1", False, "url:https://example.com/watch.php?list=a&v=1"),
+])
+def test_canonical_id(url, playlist, key):
+    assert canonical_id(url, playlist) == key
+
+def test_other_sites_keep_playlist_params():
+    assert canonical_id("https://example.com/watch.php?index=1") != canonical_id(
+        "https://example.com/watch.php?index=2"
+    )
+
+def test_youtube_playlist_mode_keeps_list():
+    url = "https://www.youtube.com/watch?v=abcdefghijk&list=PLx"
+    assert canonical_id(url, True) != canonical_id(url)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+
+import pytest
+from yt_dlp import YoutubeDL
+
+from ytdlp_gui.engine import is_audio_output, preset_options
+from ytdlp_gui.models import AudioCodec, DownloadTask, OutputFormat, QualityPreset
+from ytdlp_gui.postprocess import (
+    CodecAwareAudioPP,
+    audio_container,
+    legacy_postprocessors,
+    plan_audio,
+    plan_postprocessing,
+)
+
+_SIZE = 100
+
+def _plan(task: DownloadTask):
+    is_audio = is_audio_output(task.quality, task.format)
+    opts = preset_options(task.quality, task.format, task.audio_codec)
+    container = ""
+    if not is_audio and task.quality != QualityPreset.VIDEO_ONLY:
+        container = opts.get("merge_output_format") or ""
+    return plan_postprocessing(task, is_audio=is_audio, container=container), is_audio, container
+
+@pytest.mark.parametrize(("overrides", "old_postprocessors", "legacy", "saved"), [
+    (
+        {"thumbnail": False},
+        ["FFmpegMetadata"],
+        1, 0,
+    ),
+    (
+        {"quality": QualityPreset.HIGH, "subtitles": True},
+        ["EmbedThumbnail", "FFmpegMetadata", "FFmpegEmbedSubtitle"],
+        3, 4 * _SIZE,
+    ),
+    (
+        {"quality": QualityPreset.BALANCED, "format": OutputFormat.MKV},
+        ["EmbedThumbnail", "FFmpegMetadata"],
+        2, 2 * _SIZE,
+    ),
+    (
+        {"thumbnail": False, "sponsorblock": True},
+        ["FFmpegMetadata", "SponsorBlock", "ModifyChapters"],
+        2, 0,
+    ),
+    (
+        {"quality": QualityPreset.VIDEO_ONLY, "thumbnail": False},
+        ["FFmpegMetadata"],
+        1, 0,
+    ),
+    (
+        {"quality": QualityPreset.AUDIO_ONLY},
+        ["FFmpegMetadata"],
+        1, 0,
+    ),
+])
+def test_io_saved_matches_old_build_opts(overrides, old_postprocessors, legacy, saved):
+    task = DownloadTask(url="https://example.com/v", output_dir="/tmp", **overrides)
+    plan, is_audio, container = _plan(task)
+    assert legacy_postprocessors(task, is_audio=is_audio, container=container) == old_postprocessors
+    assert plan.legacy_passes == legacy
+    assert plan.io_saved(_SIZE) == saved
+
+def test_remux_counted_only_without_merge_format():
+    task = DownloadTask(url="https://example.com/v", output_dir="/tmp", quality=QualityPreset.BALANCED)
+    keys = legacy_postprocessors(task, is_audio=False, container="")
+    assert keys[-1] == "FFmpegVideoRemuxer"
+    assert "FFmpegVideoRemuxer" not in legacy_postprocessors(task, is_audio=False, container="mp4")
+
+_needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not found")
+
+def _tone(directory, ext: str, encoder: str) -> str:
+    path = str(directory / f"tone.{ext}")
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=duration=1", "-vn", "-c:a", encoder, path],
+        check=True,
+    )
+    return path
+
+@_needs_ffmpeg
+@pytest.mark.parametrize(("ext", "encoder", "acodec", "target", "action"), [
+    ("m4a", "aac", "mp4a.40.2", AudioCodec.AAC, "kept"),
+    ("m4a", "aac", "mp4a.40.2", AudioCodec.BEST, "kept"),
+    ("m4a", "aac", "mp4a.40.2", AudioCodec.FLAC, "transcoding"),
+    ("webm", "libopus", "opus", AudioCodec.BEST, "stream copy"),
+    ("webm", "libopus", "opus", AudioCodec.OPUS, "stream copy"),
+    ("webm", "libopus", "opus", AudioCodec.MP3, "transcoding"),
+])
+def test_audio_note_matches_what_ffmpeg_did(tmp_path, ext, encoder, acodec, target, action):
+    path = _tone(tmp_path, ext, encoder)
+    notes: list[str] = []
+    with YoutubeDL({"quiet": True, "noprogress": True}) as ydl:
+        pp = CodecAwareAudioPP(ydl, target, 192, notes.append)
+        _, info = pp.run({"filepath": path, "ext": ext, "acodec": acodec, "vcodec": "none"})
+    assert len(notes) == 1
+    assert notes[0].lower().startswith(f"audio {action}")
+    assert plan_audio(acodec, target, ext)[0] == (action == "transcoding")
+    assert audio_container(acodec, target, ext) == info["ext"]
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from ytdlp_gui.models import DownloadTask
+from ytdlp_gui.scheduler import TaskScheduler
+
+def _task(name: str, priority: int = 0) -> DownloadTask:
+    return DownloadTask(url=f"https://youtu.be/{name}", output_dir="/tmp", priority=priority, id=name)
+
+def _scheduler(limit: int):
+    started: list[str] = []
+    return TaskScheduler(limit, lambda task: started.append(task.id)), started
+
+def test_respects_limit_and_priority():
+    scheduler, started = _scheduler(1)
+    for task in (_task("a"), _task("b"), _task("c", priority=5), _task("d")):
+        scheduler.submit(task)
+    assert started == ["a"]
+    assert [t.id for t in scheduler.pending()] == ["c", "b", "d"]
+    scheduler.finish("a")
+    scheduler.finish("c")
+    assert started == ["a", "c", "b"]
+    assert (scheduler.running_count, scheduler.pending_count) == (1, 1)
+
+def test_remove_and_reprioritize():
+    scheduler, started = _scheduler(1)
+    for name in "abcd":
+        scheduler.submit(_task(name))
+    assert scheduler.remove("b").id == "b"
+    assert scheduler.remove("b") is None
+    assert scheduler.reprioritize("d", 9)
+    assert not scheduler.reprioritize("a", 9)
+    scheduler.finish("a")
+    assert started == ["a", "d"]
+    assert [t.id for t in scheduler.pending()] == ["c"]
+
+def test_set_limit_starts_waiting_tasks():
+    scheduler, started = _scheduler(1)
+    for name in "abc":
+        scheduler.submit(_task(name))
+    scheduler.set_limit(3)
+    assert started == ["a", "b", "c"]
+    assert scheduler.is_running("c")
+    scheduler.set_limit(0)
+    assert scheduler.limit == 1
+
+def test_failed_start_frees_slot():
+    started: list[str] = []
+
+    def on_start(task: DownloadTask) -> None:
+        if task.id == "a":
+            raise RuntimeError("boom")
+        started.append(task.id)
+
+    scheduler = TaskScheduler(1, on_start)
+    scheduler.submit(_task("a"))
+    scheduler.submit(_task("b"))
+    assert started == ["b"]
+    assert not scheduler.is_running("a")
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from ytdlp_gui.sponsor_cache import SponsorCache
+
+def _segment(start: float, end: float, category: str = "sponsor") -> dict:
+    return {"segment": [start, end], "category": category, "actionType": "skip", "UUID": f"{start}-{end}"}
+
+class StandIn(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.videos: dict[str, list[dict]] = {}
+        self.paths: list[str] = []
+        self.status = 200
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def requests(self) -> int:
+        with self.lock:
+            return len(self.paths)
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    server: StandIn
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.paths.append(self.path)
+        time.sleep(self.server.delay)
+        prefix = urllib.parse.urlsplit(self.path).path.rsplit("/", 1)[-1]
+        found = [
+            {"videoID": v, "segments": segs} for v, segs in self.server.videos.items()
+            if hashlib.sha256(v.encode()).hexdigest().startswith(prefix)
+        ]
+        status = self.server.status if found or self.server.status != 200 else 404
+        body = json.dumps(found).encode() if status == 200 else b"Not Found"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def api():
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def make_cache(api):
+    caches: list[SponsorCache] = []
+
+    def make(**kwargs) -> SponsorCache:
+        cache = SponsorCache(":memory:", api=api.url, **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+def test_fetches_once_then_hits(api, make_cache):
+    api.videos["abcdefghijk"] = [_segment(10, 20)]
+    cache = make_cache()
+    assert cache.segments("abcdefghijk") == [_segment(10, 20)]
+    assert cache.segments("abcdefghijk") == [_segment(10, 20)]
+    assert api.requests == 1
+    assert "/api/skipSegments/" in api.paths[0]
+    stats = cache.stats()
+    assert (stats["fetched"], stats["hits"], stats["entries"]) == (1, 1, 1)
+
+def test_expired_entries_are_refetched(api, make_cache):
+    api.videos["abcdefghijk"] = [_segment(10, 20)]
+    cache = make_cache(ttl=0.2)
+    cache.segments("abcdefghijk")
+    api.videos["abcdefghijk"] = [_segment(30, 40)]
+    assert cache.segments("abcdefghijk") == [_segment(10, 20)]
+    time.sleep(0.3)
+    assert cache.segments("abcdefghijk") == [_segment(30, 40)]
+    assert api.requests == 2
+
+def test_unknown_video_is_cached_as_empty(api, make_cache):
+    cache = make_cache()
+    assert cache.segments("nosegments1") == []
+    assert cache.segments("nosegments1") == []
+    assert api.requests == 1
+    assert cache.stats()["errors"] == 0
+
+def test_offline_never_calls_the_api(api, make_cache):
+    api.videos["abcdefghijk"] = [_segment(10, 20)]
+    cache = make_cache(ttl=0.0)
+    cache.segments("abcdefghijk")
+    cache.configure(api.url, 0.0, offline=True)
+    assert cache.segments("abcdefghijk") == [_segment(10, 20)]
+    assert cache.segments("otherotherx") is None
+    assert cache.prefetch(["a", "b"]) == 0
+    assert api.requests == 1
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+def test_concurrent_lookups_share_one_request(api, make_cache):
+    api.videos["abcdefghijk"] = [_segment(10, 20)]
+    api.delay = 0.3
+    cache = make_cache()
+    results: list = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.segments("abcdefghijk")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [[_segment(10, 20)]] * 8
+    assert api.requests == 1
+
+def test_rate_limit_backs_off_and_serves_stale(api, make_cache):
+    api.videos["abcdefghijk"] = [_segment(10, 20)]
+    cache = make_cache(ttl=0.0)
+    cache.segments("abcdefghijk")
+    api.status = 429
+    assert cache.segments("abcdefghijk") == [_segment(10, 20)]
+    assert cache.segments("otherotherx") is None
+    assert cache.segments("abcdefghijk") == [_segment(10, 20)]
+    assert api.requests == 2
+    stats = cache.stats()
+    assert (stats["stale"], stats["misses"], stats["errors"]) == (2, 1, 1)
+
+def test_prefetch_groups_by_hash_prefix(api, make_cache):
+    ids = [f"video{i:06d}" for i in range(40)]
+    for video_id in ids[:10]:
+        api.videos[video_id] = [_segment(1, 2)]
+    cache = make_cache()
+    assert cache.prefetch(ids + ids[:5]) == 40
+    deadline = time.monotonic() + 10
+    while cache.stats()["entries"] < 40 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    prefixes = {hashlib.sha256(v.encode()).hexdigest()[:4] for v in ids}
+    assert api.requests == len(prefixes)
+    assert cache.segments(ids[0]) == [_segment(1, 2)]
+    assert cache.segments(ids[-1]) == []
+    assert cache.prefetch(ids) == 0
+    assert api.requests == len(prefixes)
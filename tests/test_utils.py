@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from ytdlp_gui.utils import parse_playlist_items
+
+@pytest.mark.parametrize(("spec", "included", "excluded", "last"), [
+    ("", [1, 500], [], math.inf),
+    ("3", [3], [2, 4], 3),
+    ("1-3,7", [1, 2, 3, 7], [4, 8], 7),
+    (":5", [1, 5], [6], 5),
+    ("2:10:3", [2, 5, 8], [3, 11], 10),
+    ("4-", [4, 1000], [3], math.inf),
+])
+def test_parse_playlist_items(spec, included, excluded, last):
+    matches, stop = parse_playlist_items(spec)
+    assert all(matches(i) for i in included)
+    assert not any(matches(i) for i in excluded)
+    assert stop == last
+
+@pytest.mark.parametrize("spec", ["-5", "-5:", "1,-3", "0", "a", "1:-2", ",", "3:5:0"])
+def test_parse_playlist_items_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_playlist_items(spec)
@@ -1,5 +1,6 @@
 __version__ = "3.0.0"
 
+from .aio import AsyncDownloadEngine
 from .app import App, main
 
-__all__ = ["App", "main", "__version__"]
+__all__ = ["App", "AsyncDownloadEngine", "main", "__version__"]
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+from .engine import DownloadEngine
+from .models import DownloadStatus, DownloadTask, EngineEvent, EventKind, VideoInfo
+
+logger = logging.getLogger(__name__)
+
+_CLOSE_TIMEOUT = 10.0
+
+class AsyncDownloadEngine:
+
+    def __init__(self, *, event_queue_size: int = 1000, **engine_kwargs: Any) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue_size = event_queue_size
+        self._futures: dict[str, asyncio.Future[DownloadTask]] = {}
+        self._subscribers: set[asyncio.Queue[EngineEvent | None]] = set()
+        self._closed = False
+        self._engine = DownloadEngine(
+            **engine_kwargs,
+            on_progress=self._on_progress,
+            on_status_change=self._on_status,
+            on_log=self._on_log,
+            on_finished=self._on_finished,
+        )
+
+    @property
+    def engine(self) -> DownloadEngine:
+        return self._engine
+
+    async def submit(self, task: DownloadTask) -> asyncio.Future[DownloadTask]:
+        loop = self._bind_loop()
+        if self._closed:
+            raise RuntimeError("Engine is closed")
+        future: asyncio.Future[DownloadTask] = loop.create_future()
+        future.add_done_callback(lambda f, task_id=task.id: self._on_future_done(task_id, f))
+        self._futures[task.id] = future
+        try:
+            await loop.run_in_executor(None, self._engine.submit, task)
+        except BaseException:
+            future.cancel()
+            raise
+        return future
+
+    async def download(self, task: DownloadTask) -> DownloadTask:
+        return await (await self.submit(task))
+
+    async def analyze(self, url: str, cookies_path: str = "", proxy: str = "", **kwargs: Any) -> VideoInfo:
+        loop = self._bind_loop()
+        return await loop.run_in_executor(
+            None, lambda: self._engine.analyze(url, cookies_path, proxy, **kwargs),
+        )
+
+    def cancel(self, task_id: str) -> None:
+        self._engine.cancel(task_id)
+
+    def pause(self, task_id: str) -> bool:
+        return self._engine.pause(task_id)
+
+    def resume(self, task_id: str) -> bool:
+        return self._engine.resume(task_id)
+
+    async def events(self) -> AsyncIterator[EngineEvent]:
+        self._bind_loop()
+        queue: asyncio.Queue[EngineEvent | None] = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            while not self._closed or not queue.empty():
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._subscribers.discard(queue)
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        loop = self._bind_loop()
+        await loop.run_in_executor(None, self._engine.shutdown)
+        pending = [f for f in self._futures.values() if not f.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=_CLOSE_TIMEOUT)
+        for task_id, future in list(self._futures.items()):
+            if future.done():
+                continue
+            task = self._engine.get_task(task_id)
+            if task is not None:
+                future.set_result(task)
+            else:
+                future.cancel()
+        for queue in self._subscribers:
+            self._offer(queue, None)
+
+    async def __aenter__(self) -> AsyncDownloadEngine:
+        self._bind_loop()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("AsyncDownloadEngine is bound to a different event loop")
+        return loop
+
+    def _on_future_done(self, task_id: str, future: asyncio.Future[DownloadTask]) -> None:
+        self._futures.pop(task_id, None)
+        if future.cancelled():
+            self._engine.cancel(task_id)
+
+    def _on_progress(self, task_id: str, data: dict[str, Any]) -> None:
+        self._dispatch(EngineEvent(task_id, EventKind.PROGRESS, data))
+
+    def _on_status(self, task_id: str, status: DownloadStatus) -> None:
+        self._dispatch(EngineEvent(task_id, EventKind.STATUS, status))
+
+    def _on_log(self, task_id: str, msg: str) -> None:
+        self._dispatch(EngineEvent(task_id, EventKind.LOG, msg))
+
+    def _on_finished(self, task: DownloadTask) -> None:
+        self._call_soon(self._resolve, task)
+
+    def _dispatch(self, event: EngineEvent) -> None:
+        self._call_soon(self._deliver, event)
+
+    def _call_soon(self, callback: Any, arg: Any) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(callback, arg)
+        except RuntimeError:
+            logger.debug("Event loop closed; dropped engine callback")
+
+    def _deliver(self, event: EngineEvent) -> None:
+        for queue in self._subscribers:
+            self._offer(queue, event)
+
+    def _resolve(self, task: DownloadTask) -> None:
+        future = self._futures.get(task.id)
+        if future is not None and not future.done():
+            future.set_result(task)
+
+    def _offer(self, queue: asyncio.Queue[EngineEvent | None], event: EngineEvent | None) -> None:
+        if (
+            event is not None
+            and event.kind is EventKind.PROGRESS
+            and queue.qsize() >= self._queue_size
+        ):
+            return
+        queue.put_nowait(event)
@@ -0,0 +1,759 @@
+from __future__ import annotations
+
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import re
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .config import SettingsManager, append_history, flush_history, load_history, task_defaults
+from .engine import DownloadEngine, engine_from_settings
+from .models import (
+    DownloadStatus,
+    DownloadTask,
+    EngineEvent,
+    EventKind,
+    history_entry,
+    task_from_dict,
+    task_to_dict,
+)
+from .subscriptions import SubscriptionManager, describe
+
+logger = logging.getLogger(__name__)
+
+SubmitHook = Callable[[DownloadTask], None]
+Snapshot = Callable[[], tuple[bytes, bool]]
+
+_KEEPALIVE = 15.0
+_MAX_CLIENT_BUFFER = 256 * 1024
+_MAX_BODY = 1_048_576
+_MAX_RECENT = 500
+_MAX_HISTORY_LIMIT = 1000
+
+_TERMINAL = (DownloadStatus.COMPLETED, DownloadStatus.FAILED, DownloadStatus.CANCELED)
+
+_TASKS_PATH = re.compile(r"^/api/tasks/?$")
+_TASK_PATH = re.compile(r"^/api/tasks/([0-9a-zA-Z_-]+)/?$")
+_TASK_EVENTS_PATH = re.compile(r"^/api/tasks/([0-9a-zA-Z_-]+)/events/?$")
+_TASK_ACTION_PATH = re.compile(r"^/api/tasks/([0-9a-zA-Z_-]+)/(pause|resume)/?$")
+_QUEUE_ACTION_PATH = re.compile(r"^/api/queue/(pause|resume)/?$")
+_SUBS_PATH = re.compile(r"^/api/subscriptions/?$")
+_SUB_PATH = re.compile(r"^/api/subscriptions/([0-9a-zA-Z_-]+)/?$")
+_SUB_SYNC_PATH = re.compile(r"^/api/subscriptions/([0-9a-zA-Z_-]+)/sync/?$")
+
+_SSE_HEADERS = (
+    ("Content-Type", "text/event-stream"),
+    ("Cache-Control", "no-cache"),
+    ("X-Accel-Buffering", "no"),
+)
+
+def _json_bytes(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+def _sse(name: str, data: Any) -> bytes:
+    return b"event: " + name.encode() + b"\ndata: " + _json_bytes(data) + b"\n\n"
+
+def _event_payload(event: EngineEvent) -> dict[str, Any]:
+    if event.kind is EventKind.PROGRESS:
+        return {"task_id": event.task_id, **event.data}
+    if event.kind is EventKind.STATUS:
+        return {"task_id": event.task_id, "status": event.data.value}
+    return {"task_id": event.task_id, "message": event.data}
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def _is_wildcard(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_unspecified
+    except ValueError:
+        return False
+
+class _Client:
+    __slots__ = ("sock", "task_id", "buffer", "progress", "events", "done")
+
+    def __init__(self, sock: socket.socket, task_id: str | None) -> None:
+        self.sock = sock
+        self.task_id = task_id
+        self.buffer = bytearray()
+        self.progress: dict[str, bytes] = {}
+        self.events = selectors.EVENT_READ
+        self.done = False
+
+class SseHub:
+
+    def __init__(
+        self, *, keepalive: float = _KEEPALIVE, max_buffer: int = _MAX_CLIENT_BUFFER,
+    ) -> None:
+        self._keepalive = keepalive
+        self._max_buffer = max_buffer
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._inbox: deque[tuple] = deque()
+        self._woken = False
+        self._wake_lock = threading.Lock()
+        self._all: set[_Client] = set()
+        self._global: set[_Client] = set()
+        self._by_task: dict[str, set[_Client]] = {}
+        self._client_count = 0
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self.dropped = 0
+
+    @property
+    def client_count(self) -> int:
+        return self._client_count
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="sse-hub")
+        self._thread.start()
+
+    def add(self, sock: socket.socket, task_id: str | None, snapshot: Snapshot) -> None:
+        sock.setblocking(False)
+        with self._wake_lock:
+            self._client_count += 1
+        self._inbox.append(("add", sock, task_id, snapshot))
+        self._wake()
+
+    def publish(self, task_id: str, kind: EventKind, payload: bytes) -> None:
+        self._inbox.append(("event", task_id, kind, payload))
+        self._wake()
+
+    def finish(self, task_id: str) -> None:
+        self._inbox.append(("done", task_id))
+        self._wake()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(2.0)
+
+    def _wake(self) -> None:
+        with self._wake_lock:
+            if self._woken:
+                return
+            self._woken = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _loop(self) -> None:
+        next_keepalive = time.monotonic() + self._keepalive
+        try:
+            while not self._closed:
+                timeout = max(0.0, next_keepalive - time.monotonic())
+                for key, mask in self._selector.select(timeout):
+                    if key.data is None:
+                        self._drain_wake()
+                        continue
+                    client: _Client = key.data
+                    if mask & selectors.EVENT_READ and not self._readable(client):
+                        self._drop(client)
+                        continue
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush(client)
+                self._drain_inbox()
+                if time.monotonic() >= next_keepalive:
+                    next_keepalive = time.monotonic() + self._keepalive
+                    for client in list(self._all):
+                        client.buffer += b": keepalive\n\n"
+                        self._flush(client)
+        finally:
+            for client in list(self._all):
+                self._drop(client)
+            self._selector.close()
+            self._wake_r.close()
+            self._wake_w.close()
+
+    def _drain_wake(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._wake_lock:
+            self._woken = False
+
+    @staticmethod
+    def _readable(client: _Client) -> bool:
+        try:
+            return bool(client.sock.recv(4096))
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+
+    def _drain_inbox(self) -> None:
+        touched: set[_Client] = set()
+        while self._inbox:
+            item = self._inbox.popleft()
+            if item[0] == "add":
+                client = self._register(*item[1:])
+                if client is not None:
+                    touched.add(client)
+            elif item[0] == "done":
+                for client in self._by_task.get(item[1], ()):
+                    client.done = True
+                    touched.add(client)
+            else:
+                _, task_id, kind, payload = item
+                for client in (*self._global, *self._by_task.get(task_id, ())):
+                    if kind is EventKind.PROGRESS:
+                        client.progress[task_id] = payload
+                    else:
+                        pending = client.progress.pop(task_id, None)
+                        if pending is not None:
+                            client.buffer += pending
+                        client.buffer += payload
+                    touched.add(client)
+        for client in touched:
+            self._flush(client)
+
+    def _register(self, sock: socket.socket, task_id: str | None, snapshot: Snapshot) -> _Client | None:
+        client = _Client(sock, task_id)
+        try:
+            initial, done = snapshot()
+        except Exception:
+            logger.exception("Failed to build SSE snapshot")
+            initial, done = b"", True
+        client.buffer += initial
+        client.done = done
+        try:
+            self._selector.register(sock, selectors.EVENT_READ, client)
+        except (OSError, ValueError):
+            with self._wake_lock:
+                self._client_count -= 1
+            sock.close()
+            return None
+        self._all.add(client)
+        if task_id is None:
+            self._global.add(client)
+        else:
+            self._by_task.setdefault(task_id, set()).add(client)
+        return client
+
+    def _flush(self, client: _Client) -> None:
+        if client.sock.fileno() < 0:
+            return
+        if not client.buffer and client.progress:
+            for payload in client.progress.values():
+                client.buffer += payload
+            client.progress.clear()
+        if client.buffer:
+            try:
+                sent = client.sock.send(client.buffer)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                self._drop(client)
+                return
+            del client.buffer[:sent]
+        if len(client.buffer) > self._max_buffer:
+            self.dropped += 1
+            logger.warning("Dropping slow event-stream client")
+            self._drop(client)
+            return
+        if client.done and not client.buffer and not client.progress:
+            self._drop(client)
+            return
+        events = selectors.EVENT_READ
+        if client.buffer or client.progress:
+            events |= selectors.EVENT_WRITE
+        if events != client.events:
+            client.events = events
+            self._selector.modify(client.sock, events, client)
+
+    def _drop(self, client: _Client) -> None:
+        if client not in self._all:
+            return
+        self._all.discard(client)
+        self._global.discard(client)
+        if client.task_id is not None:
+            scoped = self._by_task.get(client.task_id)
+            if scoped is not None:
+                scoped.discard(client)
+                if not scoped:
+                    del self._by_task[client.task_id]
+        with self._wake_lock:
+            self._client_count -= 1
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        client.sock.close()
+
+class _HTTPError(Exception):
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ControlServer
+    protocol_version = "HTTP/1.1"
+    server_version = "ytdlp-gui-api/1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PATCH(self) -> None:
+        self._dispatch("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        path = parts.path
+        try:
+            self._check_origin()
+            if not self._authorized(query):
+                raise _HTTPError(HTTPStatus.UNAUTHORIZED, "Missing or invalid token")
+            api = self.server
+            if _TASKS_PATH.match(path):
+                if method == "GET":
+                    return self._send(HTTPStatus.OK, {"tasks": api.list_tasks(query.get("status"))})
+                if method == "POST":
+                    task = api.submit(self._read_json())
+                    return self._send(
+                        HTTPStatus.CREATED, task_to_dict(task),
+                        (("Location", f"/api/tasks/{task.id}"),),
+                    )
+            elif m := _TASK_EVENTS_PATH.match(path):
+                if method == "GET":
+                    return self._stream(m.group(1))
+            elif m := _TASK_ACTION_PATH.match(path):
+                if method == "POST":
+                    task = api.pause(m.group(1)) if m.group(2) == "pause" else api.resume(m.group(1))
+                    return self._send(HTTPStatus.ACCEPTED, task_to_dict(task))
+            elif m := _QUEUE_ACTION_PATH.match(path):
+                if method == "POST":
+                    return self._send(HTTPStatus.ACCEPTED, api.pause_queue(m.group(1) == "pause"))
+            elif m := _TASK_PATH.match(path):
+                task_id = m.group(1)
+                if method == "GET":
+                    return self._send(HTTPStatus.OK, task_to_dict(api.task(task_id)))
+                if method == "PATCH":
+                    body = self._read_json()
+                    if "priority" not in body:
+                        raise _HTTPError(HTTPStatus.BAD_REQUEST, "Only 'priority' can be changed")
+                    try:
+                        priority = int(body["priority"])
+                    except (TypeError, ValueError):
+                        raise _HTTPError(HTTPStatus.BAD_REQUEST, "priority must be an integer") from None
+                    return self._send(HTTPStatus.OK, task_to_dict(api.reprioritize(task_id, priority)))
+                if method == "DELETE":
+                    return self._send(HTTPStatus.ACCEPTED, task_to_dict(api.cancel(task_id)))
+            elif _SUBS_PATH.match(path):
+                if method == "GET":
+                    return self._send(HTTPStatus.OK, {"subscriptions": api.list_subscriptions()})
+                if method == "POST":
+                    sub = api.subscribe(self._read_json())
+                    return self._send(
+                        HTTPStatus.CREATED, sub, (("Location", f"/api/subscriptions/{sub['id']}"),),
+                    )
+            elif m := _SUB_SYNC_PATH.match(path):
+                if method == "POST":
+                    return self._send(HTTPStatus.ACCEPTED, api.sync_subscription(m.group(1)))
+            elif m := _SUB_PATH.match(path):
+                if method == "GET":
+                    return self._send(HTTPStatus.OK, api.subscription(m.group(1)))
+                if method == "DELETE":
+                    return self._send(HTTPStatus.OK, api.unsubscribe(m.group(1)))
+            elif path.rstrip("/") == "/api/events":
+                if method == "GET":
+                    return self._stream(None)
+            elif path.rstrip("/") == "/api/history":
+                if method == "GET":
+                    return self._send(HTTPStatus.OK, {"entries": api.history(query)})
+            elif path.rstrip("/") == "/api/stats":
+                if method == "GET":
+                    return self._send(HTTPStatus.OK, api.stats())
+            else:
+                raise _HTTPError(HTTPStatus.NOT_FOUND, "Not found")
+            raise _HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed")
+        except _HTTPError as exc:
+            self._send(exc.status, {"error": str(exc)})
+        except Exception as exc:
+            logger.exception("API request failed: %s %s", method, path)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(exc)})
+
+    def _authorized(self, query: dict[str, str]) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        header = self.headers.get("Authorization", "")
+        supplied = header[7:] if header.startswith("Bearer ") else query.get("token", "")
+        return hmac.compare_digest(supplied.encode(), token.encode())
+
+    def _check_origin(self) -> None:
+        host = (self.headers.get("Host") or "").lower()
+        allowed = self.server.allowed_hosts(self.connection.getsockname()[0])
+        if not self.server.token and host not in allowed:
+            raise _HTTPError(HTTPStatus.FORBIDDEN, f"Host {host!r} is not allowed")
+        origin = self.headers.get("Origin")
+        if origin is not None:
+            parts = urlsplit(origin)
+            if parts.scheme != "http" or parts.netloc.lower() != host:
+                raise _HTTPError(HTTPStatus.FORBIDDEN, "Cross-origin requests are not allowed")
+
+    def _read_json(self) -> dict[str, Any]:
+        if self.headers.get_content_type() != "application/json":
+            raise _HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Content-Type must be application/json")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+        if length > _MAX_BODY:
+            self.close_connection = True
+            raise _HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON") from None
+        if not isinstance(body, dict):
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return body
+
+    def _send(
+        self, status: HTTPStatus, data: Any, headers: tuple[tuple[str, str], ...] = (),
+    ) -> None:
+        body = _json_bytes(data)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, task_id: str | None) -> None:
+        api = self.server
+        if task_id is not None:
+            api.task(task_id)
+        self.send_response(HTTPStatus.OK)
+        for name, value in _SSE_HEADERS:
+            self.send_header(name, value)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        api.detach(self.connection, task_id)
+
+class ControlServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        engine: DownloadEngine,
+        settings: SettingsManager,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        token: str = "",
+        submit: SubmitHook | None = None,
+        record_history: bool = False,
+        subscriptions: SubscriptionManager | None = None,
+    ) -> None:
+        super().__init__((host, port), _Handler)
+        self.token = token
+        self.hub = SseHub()
+        self._settings = settings
+        self._submit_hook = submit
+        self._record_history = record_history
+        self._subscriptions = subscriptions
+        self._recent: OrderedDict[str, DownloadTask] = OrderedDict()
+        self._recent_lock = threading.Lock()
+        self._detached: set[socket.socket] = set()
+        self._detached_lock = threading.Lock()
+        self._engine: DownloadEngine | None = None
+        self._thread: threading.Thread | None = None
+        self.attach(engine)
+        if not token and not _is_loopback(host):
+            logger.warning("Control API listening on %s without a token", host)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def allowed_hosts(self, local: str) -> set[str]:
+        names = {self.server_address[0], local}
+        if any(_is_loopback(n) or _is_wildcard(n) for n in names):
+            names |= {"localhost", "127.0.0.1", "::1"}
+        port = self.server_address[1]
+        out: set[str] = set()
+        for name in names:
+            name = f"[{name}]" if ":" in name else name
+            out.add(f"{name}:{port}".lower())
+            if port == 80:
+                out.add(name.lower())
+        return out
+
+    def attach(self, engine: DownloadEngine) -> None:
+        if self._engine is not None:
+            self._engine.remove_listener(self._on_event)
+        self._engine = engine
+        engine.add_listener(self._on_event)
+
+    def start(self) -> None:
+        self.hub.start()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True, name="control-api")
+        self._thread.start()
+        logger.info("Control API listening on %s", self.url)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join(2.0)
+        self.server_close()
+        self.hub.close()
+        if self._engine is not None:
+            self._engine.remove_listener(self._on_event)
+        flush_history()
+
+    def shutdown_request(self, request: Any) -> None:
+        with self._detached_lock:
+            if request in self._detached:
+                self._detached.discard(request)
+                return
+        super().shutdown_request(request)
+
+    def detach(self, sock: socket.socket, task_id: str | None) -> None:
+        with self._detached_lock:
+            self._detached.add(sock)
+        self.hub.add(sock, task_id, lambda: self._snapshot(task_id))
+
+    def list_tasks(self, status: str | None = None) -> list[dict[str, Any]]:
+        live = {t.id: t for t in self._engine.tasks()}
+        with self._recent_lock:
+            finished = [t for t in self._recent.values() if t.id not in live]
+        tasks = [*live.values(), *finished]
+        if status:
+            tasks = [t for t in tasks if t.status.value == status]
+        return [task_to_dict(t) for t in tasks]
+
+    def task(self, task_id: str) -> DownloadTask:
+        task = self._engine.get_task(task_id)
+        if task is None:
+            with self._recent_lock:
+                task = self._recent.get(task_id)
+        if task is None:
+            raise _HTTPError(HTTPStatus.NOT_FOUND, f"Unknown task {task_id}")
+        return task
+
+    def submit(self, body: dict[str, Any]) -> DownloadTask:
+        try:
+            task = task_from_dict(
+                body, task_defaults(self._settings.settings), local_options=bool(self.token),
+            )
+        except PermissionError as exc:
+            raise _HTTPError(HTTPStatus.FORBIDDEN, str(exc)) from None
+        except (TypeError, ValueError) as exc:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, str(exc)) from None
+        self._remember(task)
+        if self._submit_hook is not None:
+            self._submit_hook(task)
+        else:
+            self._engine.submit(task)
+        return task
+
+    def reprioritize(self, task_id: str, priority: int) -> DownloadTask:
+        task = self.task(task_id)
+        if task.status in _TERMINAL:
+            raise _HTTPError(HTTPStatus.CONFLICT, f"Task is already {task.status.value}")
+        if not self._engine.reprioritize(task_id, priority):
+            task.priority = priority
+        return task
+
+    def cancel(self, task_id: str) -> DownloadTask:
+        task = self.task(task_id)
+        if task.status not in _TERMINAL:
+            self._engine.cancel(task_id)
+        return task
+
+    def pause(self, task_id: str) -> DownloadTask:
+        task = self.task(task_id)
+        if task.status in _TERMINAL:
+            raise _HTTPError(HTTPStatus.CONFLICT, f"Task is already {task.status.value}")
+        self._engine.pause(task_id)
+        return task
+
+    def resume(self, task_id: str) -> DownloadTask:
+        task = self.task(task_id)
+        if not self._engine.resume(task_id):
+            raise _HTTPError(HTTPStatus.CONFLICT, f"Task is {task.status.value}, not paused")
+        return task
+
+    def pause_queue(self, pause: bool) -> dict[str, Any]:
+        count = self._engine.pause_all() if pause else self._engine.resume_all()
+        return {"paused": bool(self._engine.queue_paused), "tasks": count}
+
+    def history(self, query: dict[str, str]) -> list[dict[str, Any]]:
+        needle = query.get("q", "").strip().lower()
+        status = query.get("status", "")
+        try:
+            limit = max(1, min(_MAX_HISTORY_LIMIT, int(query.get("limit", 100))))
+        except ValueError:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "limit must be an integer") from None
+        out: list[dict[str, Any]] = []
+        for entry in load_history():
+            if status and entry.get("status") != status:
+                continue
+            if needle and needle not in (entry.get("title", "") + entry.get("url", "")).lower():
+                continue
+            out.append(entry)
+            if len(out) >= limit:
+                break
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        out = {
+            **self._engine.stats(),
+            "event_streams": self.hub.client_count,
+            "dropped_streams": self.hub.dropped,
+        }
+        if self._subscriptions is not None:
+            out["subscriptions"] = self._subscriptions.stats()
+        return out
+
+    def list_subscriptions(self) -> list[dict[str, Any]]:
+        return [describe(s) for s in self._subs().subscriptions()]
+
+    def subscription(self, sub_id: str) -> dict[str, Any]:
+        sub = self._subs().get(sub_id)
+        if sub is None:
+            raise _HTTPError(HTTPStatus.NOT_FOUND, f"Unknown subscription {sub_id}")
+        return describe(sub)
+
+    def subscribe(self, body: dict[str, Any]) -> dict[str, Any]:
+        body = dict(body)
+        url = str(body.pop("url", "") or "")
+        try:
+            interval = int(body.pop("interval", 0) or 0)
+            backfill = int(body.pop("backfill", 0) or 0)
+            task_from_dict(
+                {**body, "url": url}, task_defaults(self._settings.settings),
+                local_options=bool(self.token),
+            )
+            sub = self._subs().add(url, body, interval=interval, backfill=backfill)
+        except PermissionError as exc:
+            raise _HTTPError(HTTPStatus.FORBIDDEN, str(exc)) from None
+        except (TypeError, ValueError) as exc:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, str(exc)) from None
+        return describe(sub)
+
+    def unsubscribe(self, sub_id: str) -> dict[str, Any]:
+        data = self.subscription(sub_id)
+        self._subs().remove(sub_id)
+        return data
+
+    def sync_subscription(self, sub_id: str) -> dict[str, Any]:
+        data = self.subscription(sub_id)
+        self._subs().sync_now(sub_id)
+        return data
+
+    def _subs(self) -> SubscriptionManager:
+        if self._subscriptions is None:
+            raise _HTTPError(HTTPStatus.NOT_FOUND, "Subscriptions are not available")
+        return self._subscriptions
+
+    def _remember(self, task: DownloadTask) -> None:
+        with self._recent_lock:
+            self._recent[task.id] = task
+            self._recent.move_to_end(task.id)
+            while len(self._recent) > _MAX_RECENT:
+                self._recent.popitem(last=False)
+
+    def _snapshot(self, task_id: str | None) -> tuple[bytes, bool]:
+        if task_id is None:
+            return _sse("snapshot", {"tasks": self.list_tasks()}), False
+        try:
+            task = self.task(task_id)
+        except _HTTPError:
+            return b"", True
+        return _sse("task", task_to_dict(task)), task.status in _TERMINAL
+
+    def _on_event(self, event: EngineEvent) -> None:
+        terminal = event.kind is EventKind.STATUS and event.data in _TERMINAL
+        if terminal:
+            task = self._engine.get_task(event.task_id)
+            if task is not None:
+                self._remember(task)
+                if self._record_history:
+                    append_history(history_entry(task))
+        if self.hub.client_count:
+            self.hub.publish(event.task_id, event.kind, _sse(event.kind.value, _event_payload(event)))
+            if terminal:
+                self.hub.finish(event.task_id)
+
+def main(argv: list[str] | None = None) -> None:
+    manager = SettingsManager()
+    s = manager.settings
+    parser = argparse.ArgumentParser(
+        prog="python -m ytdlp_gui.api",
+        description="Run the download engine headless behind the REST/JSON control API.",
+    )
+    parser.add_argument("--host", default=s.api_host)
+    parser.add_argument("--port", type=int, default=s.api_port)
+    parser.add_argument("--token", default=s.api_token)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    engine = engine_from_settings(s)
+    subscriptions = SubscriptionManager(engine, s, auto=s.subscriptions_enabled)
+    server = ControlServer(
+        engine, manager, host=args.host, port=args.port, token=args.token,
+        record_history=True, subscriptions=subscriptions,
+    )
+    subscriptions.start()
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        subscriptions.close()
+        engine.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,36 @@
 from __future__ import annotations
 
 import logging
+import multiprocessing
 import shutil
 import sys
 import threading
-from datetime import datetime
+import tkinter as tk
+from collections.abc import Callable
 from pathlib import Path
 from tkinter import messagebox
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import customtkinter as ctk
 
 from .config import SettingsManager
 from .download_tab import DownloadTab
-from .engine import DownloadEngine
+from .engine import DownloadEngine, engine_from_settings, reconfigure_from_settings
 from .history_tab import HistoryTab
-from .models import DownloadStatus, DownloadTask, VideoInfo
+from .models import DownloadStatus, DownloadTask, VideoInfo, history_entry
 from .queue_tab import QueueTab
+from .registry import TaskRegistry
 from .settings_tab import SettingsTab
+from .subscriptions import SubscriptionManager
 from .utils import open_folder
 
+if TYPE_CHECKING:
+    from .api import ControlServer
+
 logger = logging.getLogger(__name__)
 
+_REBUILD_POLL_MS = 1000
+
 class App(ctk.CTk):
 
     def __init__(self) -> None:
@@ -39,37 +48,89 @@ class App(ctk.CTk):
 
         self.engine = self._create_engine()
 
-        self._tasks: dict[str, DownloadTask] = {}
+        self._tasks = TaskRegistry(self.settings.settings.recent_tasks, on_evict=self._evict_task)
         self._focused_task_id: str | None = None
+        self._rebuild_pending = False
+        self._analysis_cancel: threading.Event | None = None
 
         self._build_ui()
 
+        self.subscriptions = SubscriptionManager(
+            self.engine,
+            self.settings.settings,
+            submit=lambda task: self.after(0, self.submit_download, task),
+            auto=self.settings.settings.subscriptions_enabled,
+        )
+        self.subscriptions.start()
+
+        self.api_server: ControlServer | None = None
+        self._start_api()
+
         self.after(400, self._check_deps)
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def _create_engine(self) -> DownloadEngine:
-        s = self.settings.settings
-        engine = DownloadEngine(
-            max_concurrent=s.max_concurrent,
-            concurrent_fragments=s.concurrent_fragments,
-            max_retries=s.max_retries,
-            fragment_retries=s.fragment_retries,
-            http_chunk_size=s.http_chunk_size,
-            buffer_size=s.buffer_size,
-            socket_timeout=s.socket_timeout,
+        return engine_from_settings(
+            self.settings.settings,
             on_progress=self._on_progress,
             on_status_change=self._on_status_change,
             on_log=self._on_log,
         )
-        engine._windows_filenames = s.windows_filenames
-        engine._restrict_filenames = s.restrict_filenames
-        engine._overwrites = s.overwrites
-        return engine
 
     def rebuild_engine(self) -> None:
         if self.engine.active_count > 0:
+            restart = not reconfigure_from_settings(self.engine, self.settings.settings)
+            if restart and not self._rebuild_pending:
+                self.after(_REBUILD_POLL_MS, self._rebuild_when_idle)
+            self._rebuild_pending = restart
+            if restart:
+                self.status_bar.configure(
+                    text="Settings applied; worker mode, deduplication and verification "
+                    "changes take effect when the queue is empty",
+                )
+        else:
+            self._rebuild_pending = False
+            self._stop_api()
+            self.engine.shutdown()
+            self.engine = self._create_engine()
+            self._start_api()
+        self._tasks.set_limit(self.settings.settings.recent_tasks)
+        self.subscriptions.attach(self.engine, self.settings.settings)
+        self.download_tab.set_windows(self.engine.windows())
+
+    def _rebuild_when_idle(self) -> None:
+        if not self._rebuild_pending:
             return
-        self.engine = self._create_engine()
+        if self.engine.active_count > 0:
+            self.after(_REBUILD_POLL_MS, self._rebuild_when_idle)
+            return
+        self.rebuild_engine()
+
+    def _start_api(self) -> None:
+        s = self.settings.settings
+        if not s.api_enabled:
+            return
+        from .api import ControlServer
+
+        try:
+            self.api_server = ControlServer(
+                self.engine,
+                self.settings,
+                host=s.api_host,
+                port=s.api_port,
+                token=s.api_token,
+                submit=lambda task: self.after(0, self.submit_download, task),
+                subscriptions=self.subscriptions,
+            )
+        except OSError as exc:
+            logger.error("Failed to start control API on %s:%s: %s", s.api_host, s.api_port, exc)
+            return
+        self.api_server.start()
+
+    def _stop_api(self) -> None:
+        if self.api_server is not None:
+            self.api_server.stop()
+            self.api_server = None
 
     def _build_ui(self) -> None:
         self.tabview = ctk.CTkTabview(self, anchor="nw")
@@ -113,18 +174,36 @@ class App(ctk.CTk):
         self.status_bar.configure(text="   |   ".join(parts))
 
     def submit_download(self, task: DownloadTask) -> None:
-        self._tasks[task.id] = task
+        self._tasks.add(task)
         self._focused_task_id = task.id
         self.queue_tab.add_task(task.id, task.url)
         self.engine.submit(task)
         self.download_tab.append_log(f"[INFO] Queued: {task.url}")
 
+    def subscribe(self, url: str, options: dict[str, Any]) -> None:
+        sub = self.subscriptions.add(url, options)
+        self.download_tab.append_log(f"[INFO] Subscribed: {url} ({sub.id})")
+
     def cancel_download(self, task_id: str) -> None:
         self.engine.cancel(task_id)
 
     def cancel_all_downloads(self) -> None:
         self.engine.cancel_all()
 
+    def pause_download(self, task_id: str) -> None:
+        self.engine.pause(task_id)
+
+    def resume_download(self, task_id: str) -> None:
+        self.engine.resume(task_id)
+
+    def pause_all_downloads(self) -> None:
+        self.engine.pause_all()
+        self.status_bar.configure(text="Queue paused")
+
+    def resume_all_downloads(self) -> None:
+        self.engine.resume_all()
+        self.status_bar.configure(text="Queue resumed")
+
     def retry_download(self, task_id: str) -> None:
         old = self._tasks.get(task_id)
         if old is None:
@@ -140,10 +219,14 @@ class App(ctk.CTk):
             metadata=old.metadata,
             chapters=old.chapters,
             sponsorblock=old.sponsorblock,
+            sponsor_skip=old.sponsor_skip,
+            time_ranges=old.time_ranges,
+            chapter_select=old.chapter_select,
             cookies_path=old.cookies_path,
             proxy=old.proxy,
             speed_limit=old.speed_limit,
             playlist_mode=old.playlist_mode,
+            playlist_items=old.playlist_items,
             audio_codec=old.audio_codec,
             audio_quality=old.audio_quality,
         )
@@ -158,18 +241,54 @@ class App(ctk.CTk):
         if path:
             open_folder(path)
 
+    def request_thumbnail(
+        self, url: str, size: tuple[int, int], callback: Callable[[Any], None],
+    ) -> None:
+        thumbnails = self.engine.thumbnails
+        if not url or thumbnails is None:
+            return
+        thumbnails.preview(url, size, lambda preview: self.after(0, self._deliver_thumbnail, preview, callback))
+
+    def _deliver_thumbnail(self, preview: Any, callback: Callable[[Any], None]) -> None:
+        if isinstance(preview, bytes):
+            image: Any = tk.PhotoImage(data=preview)
+        else:
+            image = ctk.CTkImage(light_image=preview, dark_image=preview, size=preview.size)
+        callback(image)
+
     def redownload_url(self, url: str) -> None:
         self.download_tab.url_entry.delete(0, "end")
         self.download_tab.url_entry.insert(0, url)
         self.tabview.set("Download")
 
-    def analyze_url(self, url: str, callback: Any) -> None:
+    def analyze_url(
+        self,
+        url: str,
+        callback: Any,
+        *,
+        on_count: Any = None,
+        playlist_items: str = "",
+    ) -> None:
+        self.cancel_analysis()
+        cancel = threading.Event()
+        self._analysis_cancel = cancel
+
+        def _count(n: int) -> None:
+            if on_count is not None and not cancel.is_set():
+                self.after(0, on_count, n)
+
         def _bg() -> None:
             try:
                 cookies = self.settings.settings.cookies_path or ""
                 proxy = self.settings.settings.proxy or ""
-                info = self.engine.analyze(url, cookies, proxy)
-                self.after(0, callback, info)
+                info = self.engine.analyze(
+                    url, cookies, proxy,
+                    playlist_items=playlist_items,
+                    on_count=_count,
+                    cancel=cancel,
+                )
+                if not cancel.is_set():
+                    self.after(0, callback, info)
             except Exception as exc:
                 self.after(
                     0, lambda: self.status_bar.configure(text=f"Analysis failed: {exc}"),
@@ -177,6 +296,11 @@ class App(ctk.CTk):
 
         threading.Thread(target=_bg, daemon=True).start()
 
+    def cancel_analysis(self) -> None:
+        if self._analysis_cancel is not None:
+            self._analysis_cancel.set()
+            self._analysis_cancel = None
+
     def _on_progress(self, task_id: str, data: dict[str, Any]) -> None:
         self.after(0, self._handle_progress, task_id, data)
 
@@ -203,7 +327,7 @@ class App(ctk.CTk):
             self.download_tab.update_progress(data)
 
     def _handle_status_change(self, task_id: str, status: DownloadStatus) -> None:
-        task = self._tasks.get(task_id)
+        task = self._tasks.update(task_id)
         if task is None:
             return
 
@@ -212,20 +336,7 @@ class App(ctk.CTk):
             DownloadStatus.FAILED,
             DownloadStatus.CANCELED,
         ):
-            self.history_tab.add_entry(
-                {
-                    "url": task.url,
-                    "title": task.title,
-                    "status": status.value,
-                    "quality": task.quality.value,
-                    "format": task.format.value,
-                    "duration": round(task.completed_at - task.started_at, 1)
-                    if task.completed_at and task.started_at
-                    else 0,
-                    "timestamp": datetime.now().isoformat(),
-                    "error": task.error,
-                }
-            )
+            self.history_tab.add_entry(history_entry(task))
 
             if task_id == self._focused_task_id:
                 if status == DownloadStatus.COMPLETED:
@@ -240,6 +351,11 @@ class App(ctk.CTk):
             elif status == DownloadStatus.FAILED:
                 self.status_bar.configure(text=f"✗ Failed: {task.error}")
 
+    def _evict_task(self, task: DownloadTask) -> None:
+        self.queue_tab.remove_task(task.id)
+        if task.id == self._focused_task_id:
+            self._focused_task_id = None
+
     def _on_close(self) -> None:
         if self.engine.active_count > 0:
             if not messagebox.askyesno(
@@ -247,7 +363,9 @@ class App(ctk.CTk):
                 "Downloads are still running.\nAre you sure you want to exit?",
             ):
                 return
-            self.engine.cancel_all()
+        self._stop_api()
+        self.subscriptions.close()
+        self.engine.shutdown()
 
         self.settings.set("window_width", self.winfo_width())
         self.settings.set("window_height", self.winfo_height())
@@ -259,6 +377,8 @@ def main() -> None:
         print("Python 3.10 or newer is required.")
         sys.exit(1)
 
+    multiprocessing.freeze_support()
+
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import glob
+import itertools
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+
+from yt_dlp.utils import Popen
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_POLICIES = ("delete", "keep")
+
+_KILL_GRACE = 2.0
+_PARTIAL_SUFFIXES = (".part", ".ytdl")
+
+_local = threading.local()
+_hook_lock = threading.Lock()
+_hook_users = 0
+_original_init: Callable[..., None] | None = None
+
+class CancelToken(threading.Event):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requested_at = 0.0
+        self.stage = ""
+        self.phase = ""
+        self.paused = ""
+        self.files: set[str] = set()
+        self._callbacks: dict[int, Callable[[], None]] = {}
+        self._children: list[subprocess.Popen] = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def set(self, phase: str = "") -> None:
+        with self._lock:
+            if self.is_set():
+                return
+            self.requested_at = time.monotonic()
+            self.phase = self.stage or phase
+            super().set()
+            callbacks = list(self._callbacks.values())
+            children, self._children = self._children, []
+        for callback in callbacks:
+            _call(callback)
+        for proc in children:
+            _terminate(proc)
+
+    def pause(self, reason: str = "user") -> None:
+        with self._lock:
+            if self.is_set():
+                return
+            self.paused = reason
+        self.set()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.requested_at if self.requested_at else 0.0
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        with self._lock:
+            key = next(self._ids)
+            self._callbacks[key] = callback
+            fire = self.is_set()
+        if fire:
+            _call(callback)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.pop(key, None)
+
+    @contextmanager
+    def bind(self) -> Iterator[None]:
+        _hook_children()
+        previous = getattr(_local, "token", None)
+        _local.token = self
+        try:
+            yield
+        finally:
+            _local.token = previous
+            _unhook_children()
+
+    def adopt(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            fire = self.is_set()
+            if not fire:
+                self._children = [p for p in self._children if p.poll() is None]
+                self._children.append(proc)
+        if fire:
+            _kill(proc)
+
+    def track(self, *paths: str | None, new_only: bool = False) -> None:
+        for path in paths:
+            if path and path != "-" and not (new_only and os.path.exists(path)):
+                self.files.add(path)
+
+def remove_partials(paths: Iterable[str]) -> tuple[int, int]:
+    removed = freed = 0
+    seen: set[str] = set()
+    for path in paths:
+        candidates = [path, *(path + suffix for suffix in _PARTIAL_SUFFIXES)]
+        candidates += glob.glob(glob.escape(path) + ".part-Frag*")
+        for candidate in candidates:
+            if candidate in seen or not os.path.isfile(candidate):
+                continue
+            seen.add(candidate)
+            try:
+                size = os.path.getsize(candidate)
+                os.unlink(candidate)
+            except OSError as exc:
+                logger.warning("Could not remove partial file %s: %s", candidate, exc)
+                continue
+            removed += 1
+            freed += size
+    return removed, freed
+
+def _call(callback: Callable[[], None]) -> None:
+    try:
+        callback()
+    except Exception:
+        logger.exception("Cancel callback failed")
+
+def _terminate(proc: subprocess.Popen) -> None:
+    if proc.poll() is not None:
+        return
+    try:
+        proc.terminate()
+    except OSError:
+        return
+    timer = threading.Timer(_KILL_GRACE, _kill, (proc,))
+    timer.daemon = True
+    timer.start()
+
+def _kill(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+def _adopting_init(self: Popen, *args, **kwargs) -> None:
+    _original_init(self, *args, **kwargs)
+    token = getattr(_local, "token", None)
+    if token is not None:
+        token.adopt(self)
+
+def _hook_children() -> None:
+    global _hook_users, _original_init
+    with _hook_lock:
+        _hook_users += 1
+        if _hook_users == 1:
+            _original_init = Popen.__init__
+            Popen.__init__ = _adopting_init
+
+def _unhook_children() -> None:
+    global _hook_users
+    with _hook_lock:
+        _hook_users -= 1
+        if not _hook_users and Popen.__init__ is _adopting_init:
+            Popen.__init__ = _original_init
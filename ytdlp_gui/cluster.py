@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from .config import AppSettings, SettingsManager, task_defaults
+from .engine import DownloadEngine, engine_from_settings
+from .models import DownloadStatus, DownloadTask, task_from_dict, task_to_dict
+from .utils import format_bytes
+
+logger = logging.getLogger(__name__)
+
+_LEASE_SECONDS = 30.0
+_HEARTBEAT_INTERVAL = 5.0
+_POLL_INTERVAL = 2.0
+_MAX_ATTEMPTS = 3
+_BUSY_TIMEOUT = 30.0
+
+_QUEUED = "queued"
+_LEASED = "leased"
+_DONE = "done"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel INTEGER NOT NULL DEFAULT 0,
+    title TEXT NOT NULL DEFAULT '',
+    progress REAL NOT NULL DEFAULT 0,
+    speed REAL NOT NULL DEFAULT 0,
+    downloaded INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    output_path TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (state, priority DESC, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    slots INTEGER NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+class ClusterQueue:
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, timeout=_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, task: DownloadTask) -> None:
+        now = time.time()
+        with self._write() as db:
+            db.execute(
+                "INSERT INTO tasks (id, payload, priority, title, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (task.id, json.dumps(task_to_dict(task)), task.priority, task.title, now, now),
+            )
+
+    def claim(
+        self,
+        worker_id: str,
+        *,
+        lease_seconds: float = _LEASE_SECONDS,
+        max_attempts: int = _MAX_ATTEMPTS,
+    ) -> DownloadTask | None:
+        now = time.time()
+        with self._write() as db:
+            db.execute(
+                "UPDATE tasks SET state = ?, status = ?, worker = NULL, updated_at = ?,"
+                " error = 'Worker lost ' || attempts || ' time(s)'"
+                " WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (_DONE, DownloadStatus.FAILED.value, now, _LEASED, now, max_attempts),
+            )
+            db.execute(
+                "UPDATE tasks SET state = ?, status = ?, worker = NULL, updated_at = ?"
+                " WHERE state = ? AND lease_expires < ? AND cancel = 1",
+                (_DONE, DownloadStatus.CANCELED.value, now, _LEASED, now),
+            )
+            row = db.execute(
+                "SELECT id, payload, worker FROM tasks"
+                " WHERE state = ? OR (state = ? AND lease_expires < ?)"
+                " ORDER BY priority DESC, created_at LIMIT 1",
+                (_QUEUED, _LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["worker"]:
+                logger.warning("Re-leasing %s from unresponsive worker %s", row["id"], row["worker"])
+            db.execute(
+                "UPDATE tasks SET state = ?, status = ?, worker = ?, lease_expires = ?,"
+                " attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (_LEASED, DownloadStatus.WAITING.value, worker_id, now + lease_seconds, now, row["id"]),
+            )
+        task = task_from_dict(json.loads(row["payload"]))
+        task.id = row["id"]
+        return task
+
+    def heartbeat(
+        self,
+        worker_id: str,
+        tasks: list[DownloadTask],
+        *,
+        slots: int,
+        lease_seconds: float = _LEASE_SECONDS,
+    ) -> tuple[set[str], set[str]]:
+        now = time.time()
+        lost: set[str] = set()
+        canceled: set[str] = set()
+        with self._write() as db:
+            db.execute(
+                "INSERT INTO workers (id, host, pid, slots, active, started_at, heartbeat_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET slots = excluded.slots,"
+                " active = excluded.active, heartbeat_at = excluded.heartbeat_at",
+                (worker_id, socket.gethostname(), os.getpid(), slots, len(tasks), now, now),
+            )
+            for task in tasks:
+                cur = db.execute(
+                    "UPDATE tasks SET lease_expires = ?, status = ?, title = ?, progress = ?,"
+                    " speed = ?, downloaded = ?, total = ?, updated_at = ?"
+                    " WHERE id = ? AND worker = ? AND state = ?",
+                    (
+                        now + lease_seconds, task.status.value, task.title, task.progress,
+                        task.speed, task.downloaded_bytes, task.total_bytes, now,
+                        task.id, worker_id, _LEASED,
+                    ),
+                )
+                if cur.rowcount == 0:
+                    lost.add(task.id)
+            for row in db.execute(
+                "SELECT id FROM tasks WHERE worker = ? AND state = ? AND cancel = 1",
+                (worker_id, _LEASED),
+            ):
+                canceled.add(row["id"])
+        return lost, canceled
+
+    def complete(self, worker_id: str, task: DownloadTask) -> bool:
+        now = time.time()
+        with self._write() as db:
+            cur = db.execute(
+                "UPDATE tasks SET state = ?, status = ?, title = ?, progress = ?, speed = 0,"
+                " downloaded = ?, total = ?, error = ?, output_path = ?, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND state = ?",
+                (
+                    _DONE, task.status.value, task.title, task.progress,
+                    task.downloaded_bytes, task.total_bytes, task.error, task.output_path, now,
+                    task.id, worker_id, _LEASED,
+                ),
+            )
+        return cur.rowcount > 0
+
+    def release(self, worker_id: str, task_id: str) -> None:
+        with self._write() as db:
+            db.execute(
+                "UPDATE tasks SET state = ?, status = ?, worker = NULL, lease_expires = 0,"
+                " attempts = MAX(attempts - 1, 0), speed = 0, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND state = ?",
+                (_QUEUED, DownloadStatus.QUEUED.value, time.time(), task_id, worker_id, _LEASED),
+            )
+
+    def retire(self, worker_id: str) -> None:
+        with self._write() as db:
+            db.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def cancel(self, task_id: str) -> bool:
+        now = time.time()
+        with self._write() as db:
+            queued = db.execute(
+                "UPDATE tasks SET state = ?, status = ?, cancel = 1, updated_at = ?"
+                " WHERE id = ? AND state = ?",
+                (_DONE, DownloadStatus.CANCELED.value, now, task_id, _QUEUED),
+            ).rowcount
+            leased = db.execute(
+                "UPDATE tasks SET cancel = 1, updated_at = ? WHERE id = ? AND state = ?",
+                (now, task_id, _LEASED),
+            ).rowcount
+        return queued + leased > 0
+
+    def tasks(self, state: str | None = None) -> list[dict[str, Any]]:
+        query = (
+            "SELECT id, state, status, worker, attempts, priority, title, progress, speed,"
+            " downloaded, total, error, output_path FROM tasks"
+        )
+        args: tuple = ()
+        if state:
+            query += " WHERE state = ?"
+            args = (state,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at", args).fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self, *, stale_after: float = _LEASE_SECONDS) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            states = {
+                row["state"]: row["n"]
+                for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM tasks GROUP BY state")
+            }
+            statuses = {
+                row["status"]: row["n"]
+                for row in self._conn.execute(
+                    "SELECT status, COUNT(*) AS n FROM tasks WHERE state = ? GROUP BY status", (_DONE,),
+                )
+            }
+            leased = self._conn.execute(
+                "SELECT worker, SUM(speed) AS speed, SUM(downloaded) AS downloaded,"
+                " SUM(total) AS total, COUNT(*) AS n FROM tasks WHERE state = ? GROUP BY worker",
+                (_LEASED,),
+            ).fetchall()
+            workers = self._conn.execute(
+                "SELECT id, host, pid, slots, active, heartbeat_at FROM workers ORDER BY id"
+            ).fetchall()
+        per_worker = {row["worker"]: row for row in leased}
+        return {
+            "queued": states.get(_QUEUED, 0),
+            "leased": states.get(_LEASED, 0),
+            "done": statuses,
+            "speed": sum(row["speed"] or 0 for row in leased),
+            "downloaded": sum(row["downloaded"] or 0 for row in leased),
+            "total": sum(row["total"] or 0 for row in leased),
+            "workers": [
+                {
+                    "id": w["id"],
+                    "host": w["host"],
+                    "pid": w["pid"],
+                    "slots": w["slots"],
+                    "active": w["active"],
+                    "alive": now - w["heartbeat_at"] < stale_after,
+                    "speed": (per_worker[w["id"]]["speed"] or 0) if w["id"] in per_worker else 0,
+                }
+                for w in workers
+            ],
+        }
+
+class ClusterWorker:
+
+    def __init__(
+        self,
+        queue: ClusterQueue,
+        settings: AppSettings,
+        *,
+        worker_id: str = "",
+        slots: int = 0,
+        output_dir: str = "",
+        lease_seconds: float = _LEASE_SECONDS,
+        heartbeat_interval: float = _HEARTBEAT_INTERVAL,
+        poll_interval: float = _POLL_INTERVAL,
+    ) -> None:
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._slots = slots or settings.max_concurrent
+        self._output_dir = output_dir
+        self._lease = lease_seconds
+        self._heartbeat_interval = heartbeat_interval
+        self._poll = poll_interval
+        self._owned: dict[str, DownloadTask] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.completed = 0
+        self.engine: DownloadEngine = engine_from_settings(
+            dataclasses.replace(settings, max_concurrent=self._slots),
+            on_log=self._on_log,
+            on_finished=self._on_finished,
+        )
+
+    def run(self) -> None:
+        logger.info("Worker %s started with %d slot(s) on %s", self.worker_id, self._slots, self.queue.path)
+        next_beat = 0.0
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now >= next_beat:
+                    self._heartbeat()
+                    next_beat = now + self._heartbeat_interval
+                self._fill()
+                self._wake.wait(max(0.0, min(self._poll, next_beat - time.monotonic())))
+                self._wake.clear()
+        finally:
+            self.engine.shutdown()
+            self._drain()
+            self.queue.retire(self.worker_id)
+            logger.info("Worker %s stopped after %d task(s)", self.worker_id, self.completed)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _fill(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                if len(self._owned) >= self._slots:
+                    return
+            task = self.queue.claim(self.worker_id, lease_seconds=self._lease)
+            if task is None:
+                return
+            if self._output_dir:
+                task.output_dir = self._output_dir
+            with self._lock:
+                self._owned[task.id] = task
+            logger.info("Leased %s: %s", task.id, task.url)
+            self.engine.submit(task)
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            owned = list(self._owned.values())
+        try:
+            lost, canceled = self.queue.heartbeat(
+                self.worker_id, owned, slots=self._slots, lease_seconds=self._lease,
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Heartbeat failed: %s", exc)
+            return
+        for task_id in lost:
+            logger.warning("Lease on %s was taken over; stopping local copy", task_id)
+            self.engine.cancel(task_id)
+        for task_id in canceled:
+            self.engine.cancel(task_id)
+
+    def _drain(self) -> None:
+        with self._lock:
+            owned = list(self._owned)
+            self._owned.clear()
+        for task_id in owned:
+            self.queue.release(self.worker_id, task_id)
+
+    def _on_log(self, task_id: str, msg: str) -> None:
+        if msg.startswith(("[ERROR]", "[WARNING]", "[SUCCESS]")):
+            logger.info("%s %s", task_id, msg)
+
+    def _on_finished(self, task: DownloadTask) -> None:
+        with self._lock:
+            owned = self._owned.pop(task.id, None) is not None
+        if not owned:
+            return
+        try:
+            if self._stop.is_set() and task.status is DownloadStatus.CANCELED:
+                self.queue.release(self.worker_id, task.id)
+            elif self.queue.complete(self.worker_id, task):
+                self.completed += 1
+        except sqlite3.Error as exc:
+            logger.error("Failed to record %s: %s", task.id, exc)
+        self._wake.set()
+
+def _print_summary(queue: ClusterQueue) -> None:
+    s = queue.summary()
+    done = ", ".join(f"{k} {v}" for k, v in sorted(s["done"].items())) or "none"
+    print(
+        f"queued {s['queued']}  running {s['leased']}  finished: {done}  "
+        f"{format_bytes(s['downloaded'])} at {format_bytes(s['speed'])}/s"
+    )
+    for w in s["workers"]:
+        state = "alive" if w["alive"] else "stale"
+        print(
+            f"  {w['id']:<32} {state:<6} {w['active']}/{w['slots']} slots  "
+            f"{format_bytes(w['speed'])}/s"
+        )
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ytdlp_gui.cluster",
+        description="Share one download queue between engine processes on several hosts.",
+    )
+    parser.add_argument("--db", required=True, help="SQLite queue file on storage every host can reach")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    worker = sub.add_parser("worker", help="pull and download tasks until stopped")
+    worker.add_argument("--id", default="")
+    worker.add_argument("--slots", type=int, default=0)
+    worker.add_argument("--output-dir", default="")
+    worker.add_argument("--lease", type=float, default=_LEASE_SECONDS)
+    worker.add_argument("--heartbeat", type=float, default=_HEARTBEAT_INTERVAL)
+
+    submit = sub.add_parser("submit", help="add URLs to the queue")
+    submit.add_argument("urls", nargs="+")
+    submit.add_argument("--priority", type=int, default=0)
+    submit.add_argument("--quality", default="")
+    submit.add_argument("--format", default="")
+    submit.add_argument("--output-dir", default="")
+
+    status = sub.add_parser("status", help="show aggregated progress")
+    status.add_argument("--watch", type=float, default=0.0)
+
+    cancel = sub.add_parser("cancel", help="cancel queued or running tasks")
+    cancel.add_argument("ids", nargs="+")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    queue = ClusterQueue(args.db)
+    settings = SettingsManager().settings
+
+    if args.command == "worker":
+        w = ClusterWorker(
+            queue, settings,
+            worker_id=args.id, slots=args.slots, output_dir=args.output_dir,
+            lease_seconds=args.lease, heartbeat_interval=args.heartbeat,
+        )
+        signal.signal(signal.SIGTERM, lambda *_: w.stop())
+        try:
+            w.run()
+        except KeyboardInterrupt:
+            w.stop()
+    elif args.command == "submit":
+        defaults = task_defaults(settings)
+        options = {"priority": args.priority}
+        for key in ("quality", "format", "output_dir"):
+            if getattr(args, key):
+                options[key] = getattr(args, key)
+        for url in args.urls:
+            task = task_from_dict({"url": url, **options}, defaults)
+            queue.enqueue(task)
+            print(task.id, url)
+    elif args.command == "status":
+        while True:
+            _print_summary(queue)
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    elif args.command == "cancel":
+        for task_id in args.ids:
+            print(task_id, "canceled" if queue.cancel(task_id) else "not found or finished")
+    queue.close()
+
+if __name__ == "__main__":
+    main()
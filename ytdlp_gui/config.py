@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
-from dataclasses import asdict, dataclass, fields
+import threading
+from dataclasses import asdict, dataclass, field, fields
 from pathlib import Path
 from typing import Any
 
+from .timeplan import DEFAULT_PROFILES
+
 logger = logging.getLogger(__name__)
 
 CONFIG_DIR = Path.home() / ".ytdlp_gui"
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
 HISTORY_FILE = CONFIG_DIR / "history.json"
+SUBSCRIPTIONS_FILE = CONFIG_DIR / "subscriptions.json"
+CONTENT_INDEX_FILE = CONFIG_DIR / "content_index.db"
+SPONSOR_CACHE_FILE = CONFIG_DIR / "sponsorblock.db"
+THUMBNAIL_DIR = CONFIG_DIR / "thumbnails"
 
 @dataclass
 class AppSettings:
@@ -27,25 +35,71 @@ class AppSettings:
     metadata: bool = True
     chapters: bool = True
     sponsorblock: bool = False
+    sponsor_skip: bool = False
+    sponsor_api: str = "https://sponsor.ajay.app"
+    sponsor_cache_hours: int = 24
+    sponsor_offline: bool = False
 
     audio_codec: str = "mp3"
     audio_quality: int = 320
 
     cookies_path: str = ""
     proxy: str = ""
+    proxy_pool: list[str] = field(default_factory=list)
+    proxy_limit: int = 2
+    proxy_cooldown: int = 300
     speed_limit: int = 0
 
     max_concurrent: int = 2
     max_retries: int = 10
     fragment_retries: int = 10
     concurrent_fragments: int = 4
+    process_mode: bool = False
+    recent_tasks: int = 500
+    thumbnail_cache_mb: int = 100
     http_chunk_size: int = 10_485_760
     buffer_size: int = 131_072
     socket_timeout: int = 30
+    max_connections_per_host: int = 8
+
+    api_enabled: bool = False
+    api_host: str = "127.0.0.1"
+    api_port: int = 8765
+    api_token: str = ""
+
+    subscriptions_enabled: bool = False
+    subscription_interval: int = 60
+    subscription_rate: int = 30
+
+    schedule_enabled: bool = False
+    schedule_profiles: list[dict[str, Any]] = field(
+        default_factory=lambda: [dict(p) for p in DEFAULT_PROFILES],
+    )
 
     windows_filenames: bool = True
     restrict_filenames: bool = False
     overwrites: bool = False
+    dedup_enabled: bool = True
+    dedup_link: str = "auto"
+    verify_downloads: bool = False
+    verify_workers: int = 2
+    cancel_cleanup: str = "delete"
+
+def task_defaults(settings: AppSettings) -> dict[str, Any]:
+    return {
+        "output_dir": settings.output_dir,
+        "subtitle_langs": settings.subtitle_langs,
+        "thumbnail": settings.thumbnail,
+        "metadata": settings.metadata,
+        "chapters": settings.chapters,
+        "sponsorblock": settings.sponsorblock,
+        "sponsor_skip": settings.sponsor_skip,
+        "cookies_path": settings.cookies_path,
+        "proxy": settings.proxy,
+        "speed_limit": settings.speed_limit,
+        "audio_codec": settings.audio_codec,
+        "audio_quality": settings.audio_quality,
+    }
 
 class SettingsManager:
 
@@ -87,8 +141,13 @@ class SettingsManager:
         return AppSettings()
 
 _MAX_HISTORY = 1000
+_HISTORY_FLUSH_DELAY = 2.0
 
-def load_history() -> list[dict[str, Any]]:
+_history_lock = threading.Lock()
+_history_pending: list[dict[str, Any]] = []
+_history_timer: threading.Timer | None = None
+
+def _read_history() -> list[dict[str, Any]]:
     if HISTORY_FILE.exists():
         try:
             data = json.loads(HISTORY_FILE.read_text(encoding="utf-8"))
@@ -98,13 +157,64 @@ def load_history() -> list[dict[str, Any]]:
             pass
     return []
 
-def save_history(entries: list[dict[str, Any]]) -> None:
+def _write_history(entries: list[dict[str, Any]]) -> None:
     try:
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         trimmed = entries[:_MAX_HISTORY]
-        HISTORY_FILE.write_text(
+        tmp = HISTORY_FILE.with_suffix(".tmp")
+        tmp.write_text(
             json.dumps(trimmed, indent=2, default=str),
             encoding="utf-8",
         )
+        tmp.replace(HISTORY_FILE)
     except Exception as exc:
         logger.error("Failed to save history: %s", exc)
+
+def load_history() -> list[dict[str, Any]]:
+    with _history_lock:
+        return (_history_pending[::-1] + _read_history())[:_MAX_HISTORY]
+
+def save_history(entries: list[dict[str, Any]]) -> None:
+    with _history_lock:
+        _history_pending.clear()
+        _write_history(entries)
+
+def append_history(entry: dict[str, Any]) -> None:
+    global _history_timer
+    with _history_lock:
+        _history_pending.append(entry)
+        if _history_timer is None:
+            _history_timer = threading.Timer(_HISTORY_FLUSH_DELAY, flush_history)
+            _history_timer.daemon = True
+            _history_timer.start()
+
+def flush_history() -> None:
+    global _history_timer
+    with _history_lock:
+        _history_timer = None
+        if not _history_pending:
+            return
+        entries = _history_pending[::-1] + _read_history()
+        _history_pending.clear()
+        _write_history(entries)
+
+atexit.register(flush_history)
+
+def load_subscriptions() -> list[dict[str, Any]]:
+    if SUBSCRIPTIONS_FILE.exists():
+        try:
+            data = json.loads(SUBSCRIPTIONS_FILE.read_text(encoding="utf-8"))
+            if isinstance(data, list):
+                return data
+        except Exception:
+            logger.warning("Corrupt subscriptions file — starting empty")
+    return []
+
+def save_subscriptions(entries: list[dict[str, Any]]) -> None:
+    try:
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = SUBSCRIPTIONS_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entries, indent=1), encoding="utf-8")
+        tmp.replace(SUBSCRIPTIONS_FILE)
+    except Exception as exc:
+        logger.error("Failed to save subscriptions: %s", exc)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .models import DownloadTask
+
+if TYPE_CHECKING:
+    import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+ReuseCallback = Callable[[str, str, int], None]
+
+LINK_MODES = ("auto", "hardlink", "reflink", "copy")
+
+_CHUNK = 1024 * 1024
+_FICLONE = 0x40049409
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    added REAL NOT NULL,
+    PRIMARY KEY (key, path)
+);
+"""
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def output_fingerprint(task: DownloadTask, opts: dict[str, Any]) -> str:
+    data = {
+        "merge": opts.get("merge_output_format") or "",
+        "pp": opts.get("postprocessors", []),
+        "embed": [
+            task.metadata, task.chapters, task.thumbnail, task.sponsorblock,
+            task.subtitle_langs if task.subtitles else "",
+        ],
+        "audio": [task.audio_codec.value, task.audio_quality],
+    }
+    if task.time_ranges or task.chapter_select or task.sponsor_skip:
+        data["sections"] = [task.time_ranges, task.chapter_select, task.sponsor_skip]
+    raw = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+def content_key(info: dict[str, Any], fingerprint: str) -> str | None:
+    extractor = info.get("extractor_key") or info.get("extractor")
+    video_id = info.get("id")
+    format_id = info.get("format_id")
+    if not extractor or not video_id or not format_id:
+        return None
+    return f"{extractor}:{video_id}:{format_id}:{fingerprint}"
+
+def _reflink(src: str, dst: str) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOTSUP, "reflink is only supported on Linux")
+    import fcntl
+
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+
+def _copy_verified(src: str, dst: str, expected: str) -> None:
+    digest = hashlib.sha256()
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        while chunk := s.read(_CHUNK):
+            digest.update(chunk)
+            d.write(chunk)
+    if digest.hexdigest() != expected:
+        raise OSError(errno.EIO, f"Hash mismatch while copying {src}")
+
+def _place(src: str, dst: str, mode: str, expected: str) -> str:
+    tmp = f"{dst}.dedup-{os.getpid()}-{threading.get_ident()}"
+    methods = {
+        "auto": ("hardlink", "reflink", "copy"),
+        "hardlink": ("hardlink", "copy"),
+        "reflink": ("reflink", "copy"),
+    }.get(mode, ("copy",))
+    for method in methods:
+        try:
+            if method == "hardlink":
+                os.link(src, tmp)
+            elif method == "reflink":
+                _reflink(src, tmp)
+            else:
+                _copy_verified(src, tmp, expected)
+            os.replace(tmp, dst)
+            return method
+        except OSError as exc:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            if method == "copy":
+                raise
+            logger.debug("%s %s → %s failed: %s", method, src, dst, exc)
+    raise OSError(errno.ENOTSUP, "No placement method succeeded")
+
+class ContentIndex:
+
+    def __init__(self, path: str | Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(path), isolation_level=None, check_same_thread=False, timeout=30.0,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.bytes_saved = 0
+        self.corrupt = 0
+
+    def add(self, key: str, path: str, digest: str | None = None) -> str:
+        path = os.path.abspath(path)
+        digest = digest or file_sha256(path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (key, path, size, sha256, added) VALUES (?, ?, ?, ?, ?)",
+                (key, path, os.path.getsize(path), digest, time.time()),
+            )
+        return digest
+
+    def forget(self, key: str, path: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM files WHERE key = ? AND path = ?", (key, path))
+
+    def candidates(self, key: str) -> list[tuple[str, int, str]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT path, size, sha256 FROM files WHERE key = ? ORDER BY added", (key,),
+            ).fetchall()
+
+    def materialize(self, key: str, target: str, mode: str = "auto") -> tuple[str, str, int] | None:
+        for src, size, digest in self.candidates(key):
+            dst = os.path.abspath(str(Path(target).with_suffix(Path(src).suffix)))
+            try:
+                if not os.path.isfile(src) or os.path.getsize(src) != size:
+                    self.forget(key, src)
+                    continue
+                if file_sha256(src) != digest:
+                    self.corrupt += 1
+                    logger.warning("Content index: %s changed since it was indexed; ignoring it", src)
+                    self.forget(key, src)
+                    continue
+                if os.path.exists(dst):
+                    if not os.path.samefile(src, dst) and file_sha256(dst) != digest:
+                        return None
+                    method = "existing"
+                else:
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    method = _place(src, dst, mode, digest)
+                self.add(key, dst, digest)
+            except OSError as exc:
+                logger.warning("Content index: could not reuse %s: %s", src, exc)
+                continue
+            with self._lock:
+                self.hits += 1
+                self.bytes_saved += size
+            return dst, method, size
+        return None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "bytes_saved": self.bytes_saved,
+                "corrupt": self.corrupt,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class DedupSession:
+
+    def __init__(
+        self,
+        index: ContentIndex,
+        fingerprint: str,
+        mode: str,
+        on_reuse: ReuseCallback,
+    ) -> None:
+        self._index = index
+        self._fingerprint = fingerprint
+        self._mode = mode
+        self._on_reuse = on_reuse
+        self._ydl: yt_dlp.YoutubeDL | None = None
+        self._pending: str | None = None
+
+    def attach(self, ydl: yt_dlp.YoutubeDL) -> None:
+        self._ydl = ydl
+
+    def match_filter(self, info: dict[str, Any], *, incomplete: bool | set = False) -> str | None:
+        if incomplete or self._ydl is None:
+            return None
+        self._pending = None
+        key = content_key(info, self._fingerprint)
+        if key is None:
+            return None
+        placed = self._index.materialize(key, self._ydl.prepare_filename(info), self._mode)
+        if placed is None:
+            self._pending = key
+            return None
+        path, method, size = placed
+        self._on_reuse(path, method, size)
+        return f"{info.get('id')}: reused an identical earlier download ({method})"
+
+    def post_hook(self, filename: str) -> None:
+        key, self._pending = self._pending, None
+        if key is None:
+            return
+        try:
+            self._index.add(key, filename)
+        except OSError as exc:
+            logger.warning("Content index: could not index %s: %s", filename, exc)
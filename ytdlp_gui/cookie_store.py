@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+from yt_dlp.cookies import YoutubeDLCookieJar
+from yt_dlp.utils import expand_path
+
+logger = logging.getLogger(__name__)
+
+_Snapshot = frozenset[tuple]
+
+def _snapshot(jar: YoutubeDLCookieJar) -> _Snapshot:
+    with jar._cookies_lock:
+        return frozenset(
+            (c.domain, c.path, c.name, c.value, c.expires, c.secure) for c in jar
+        )
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class _Entry:
+    __slots__ = ("jar", "mtime", "saved", "lock")
+
+    def __init__(self, path: str) -> None:
+        self.jar = YoutubeDLCookieJar(path)
+        self.mtime: int | None = None
+        self.saved: _Snapshot = frozenset()
+        self.lock = threading.Lock()
+
+class CookieStore:
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.saves = 0
+
+    def jar(self, cookie_file: str) -> YoutubeDLCookieJar:
+        entry = self._entry(cookie_file)
+        path = entry.jar.filename
+        with entry.lock:
+            mtime = _mtime(path)
+            if mtime != entry.mtime:
+                self._reload(entry, mtime)
+        return entry.jar
+
+    def save(self, cookie_file: str) -> None:
+        entry = self._entry(cookie_file)
+        path = entry.jar.filename
+        with entry.lock:
+            if _snapshot(entry.jar) == entry.saved:
+                return
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with entry.jar._cookies_lock:
+                entry.jar.save(tmp)
+            os.replace(tmp, path)
+            entry.saved = _snapshot(entry.jar)
+            entry.mtime = _mtime(path)
+            self.saves += 1
+
+    def _entry(self, cookie_file: str) -> _Entry:
+        path = expand_path(cookie_file)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = _Entry(path)
+        return entry
+
+    def _reload(self, entry: _Entry, mtime: int | None) -> None:
+        fresh = YoutubeDLCookieJar(entry.jar.filename)
+        if mtime is not None and os.access(entry.jar.filename, os.R_OK):
+            try:
+                fresh.load()
+            except Exception as exc:
+                logger.warning("Failed to load cookies from %s: %s", Path(entry.jar.filename).name, exc)
+                return
+        with entry.jar._cookies_lock:
+            entry.jar._cookies = fresh._cookies
+        entry.mtime = mtime
+        entry.saved = _snapshot(entry.jar)
+        self.loads += 1
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import re
 import tkinter as tk
 from typing import TYPE_CHECKING, Any
 
 import customtkinter as ctk
 
+from .engine import preview_download
+from .formats import FormatTable
 from .models import (
     AudioCodec,
     DownloadTask,
+    FormatPreview,
     OutputFormat,
     QualityPreset,
     VideoInfo,
+    task_options,
 )
 from .utils import (
     format_bytes,
@@ -21,6 +26,8 @@ from .utils import (
     is_valid_youtube_url,
     looks_like_playlist_url,
     open_folder,
+    parse_playlist_items,
+    parse_time_ranges,
 )
 
 if TYPE_CHECKING:
@@ -55,6 +62,21 @@ _AUDIO_CODEC_MAP: dict[str, AudioCodec] = {
 
 _VIDEO_FORMATS = ["mp4", "mkv", "webm"]
 _AUDIO_FORMATS = ["mp3", "opus", "flac", "wav"]
+_START_NOW = "Now"
+_THUMB_SIZE = (160, 90)
+
+def _preview_line(label: str, formats: str, preview: FormatPreview) -> str:
+    streams = " + ".join(preview.streams) or "—"
+    if preview.size:
+        size = ("" if preview.exact_size else "~") + format_bytes(preview.size)
+    else:
+        size = "?"
+    rate = f"{preview.bitrate:.0f} kb/s" if preview.bitrate else "?"
+    if not preview.available:
+        action = preview.note
+    else:
+        action = ("re-encode" if preview.reencode else "copy") + f" → {preview.container}"
+    return f"{label:<22}{formats:<19}{streams:<46}{size:>10}{rate:>12}  {action}"
 
 class DownloadTab(ctk.CTkFrame):
 
@@ -62,6 +84,7 @@ class DownloadTab(ctk.CTkFrame):
         super().__init__(master, fg_color="transparent")
         self.app = app
         self._current_task_id: str | None = None
+        self._formats: FormatTable | None = None
         self._build()
 
     def _build(self) -> None:
@@ -91,11 +114,17 @@ class DownloadTab(ctk.CTkFrame):
             side="left",
         )
 
+        info_row = ctk.CTkFrame(url_frame, fg_color="transparent")
+        info_row.pack(fill="x", padx=12, pady=(0, 8))
+
+        self.thumb_lbl = ctk.CTkLabel(info_row, text="")
+        self._thumb_url = ""
+
         self.info_label = ctk.CTkLabel(
-            url_frame, text="", font=ctk.CTkFont(size=12), text_color="gray",
-            wraplength=900,
+            info_row, text="", font=ctk.CTkFont(size=12), text_color="gray",
+            wraplength=720, justify="left",
         )
-        self.info_label.pack(anchor="w", padx=12, pady=(0, 8))
+        self.info_label.pack(side="left", anchor="w")
 
         q_frame = ctk.CTkFrame(self)
         q_frame.pack(fill="x", padx=12, pady=4)
@@ -121,6 +150,7 @@ class DownloadTab(ctk.CTkFrame):
         self.format_menu = ctk.CTkOptionMenu(
             fmt_row, values=_VIDEO_FORMATS,
             variable=self.format_var, width=90,
+            command=lambda _: self._render_preview(),
         )
         self.format_menu.pack(side="left", padx=(0, 14))
 
@@ -129,6 +159,7 @@ class DownloadTab(ctk.CTkFrame):
         self.acodec_menu = ctk.CTkOptionMenu(
             fmt_row, values=list(_AUDIO_CODEC_MAP.keys()),
             variable=self.acodec_var, width=80,
+            command=lambda _: self._render_preview(),
         )
         self.acodec_menu.pack(side="left", padx=(0, 14))
 
@@ -137,9 +168,20 @@ class DownloadTab(ctk.CTkFrame):
         self.bitrate_menu = ctk.CTkOptionMenu(
             fmt_row, values=["128", "192", "256", "320"],
             variable=self.bitrate_var, width=70,
+            command=lambda _: self._render_preview(),
         )
         self.bitrate_menu.pack(side="left")
 
+        self.preview_box = ctk.CTkTextbox(
+            q_frame, height=170, wrap="none",
+            font=ctk.CTkFont(family="Consolas", size=11),
+            state="disabled",
+        )
+        self.preview_box.tag_config("current", background="#1f538d", foreground="white")
+        self.preview_note = ctk.CTkLabel(
+            q_frame, text="", font=ctk.CTkFont(size=11), text_color="gray", anchor="w",
+        )
+
         opt_frame = ctk.CTkFrame(self)
         opt_frame.pack(fill="x", padx=12, pady=4)
 
@@ -169,11 +211,15 @@ class DownloadTab(ctk.CTkFrame):
         )
         self.sponsor_var = tk.BooleanVar(value=s.sponsorblock)
         ctk.CTkCheckBox(opts_row, text="SponsorBlock", variable=self.sponsor_var).pack(
-            side="left",
+            side="left", padx=(0, 12),
         )
+        self.sponsor_skip_var = tk.BooleanVar(value=s.sponsor_skip)
+        ctk.CTkCheckBox(
+            opts_row, text="Skip sponsors while downloading", variable=self.sponsor_skip_var,
+        ).pack(side="left")
 
         opts_row2 = ctk.CTkFrame(opt_frame, fg_color="transparent")
-        opts_row2.pack(fill="x", padx=12, pady=(0, 10))
+        opts_row2.pack(fill="x", padx=12, pady=(0, 4))
 
         self.playlist_var = tk.BooleanVar(value=False)
         ctk.CTkCheckBox(opts_row2, text="Playlist mode", variable=self.playlist_var).pack(
@@ -182,9 +228,38 @@ class DownloadTab(ctk.CTkFrame):
 
         ctk.CTkLabel(opts_row2, text="Subtitle langs:").pack(side="left", padx=(0, 4))
         self.sublang_entry = ctk.CTkEntry(opts_row2, width=140, height=28)
-        self.sublang_entry.pack(side="left")
+        self.sublang_entry.pack(side="left", padx=(0, 14))
         self.sublang_entry.insert(0, s.subtitle_langs)
 
+        ctk.CTkLabel(opts_row2, text="Items:").pack(side="left", padx=(0, 4))
+        self.items_entry = ctk.CTkEntry(
+            opts_row2, width=110, height=28, placeholder_text="e.g. 1-50,60",
+        )
+        self.items_entry.pack(side="left", padx=(0, 14))
+
+        ctk.CTkLabel(opts_row2, text="Start:").pack(side="left", padx=(0, 4))
+        self.window_var = tk.StringVar(value=_START_NOW)
+        self.window_menu = ctk.CTkOptionMenu(
+            opts_row2, values=[_START_NOW, *self.app.engine.windows()],
+            variable=self.window_var, width=110,
+        )
+        self.window_menu.pack(side="left")
+
+        opts_row3 = ctk.CTkFrame(opt_frame, fg_color="transparent")
+        opts_row3.pack(fill="x", padx=12, pady=(0, 10))
+
+        ctk.CTkLabel(opts_row3, text="Time ranges:").pack(side="left", padx=(0, 4))
+        self.ranges_entry = ctk.CTkEntry(
+            opts_row3, width=180, height=28, placeholder_text="e.g. 1:30-4:00,10:00-",
+        )
+        self.ranges_entry.pack(side="left", padx=(0, 14))
+
+        ctk.CTkLabel(opts_row3, text="Chapters:").pack(side="left", padx=(0, 4))
+        self.chapter_entry = ctk.CTkEntry(
+            opts_row3, width=180, height=28, placeholder_text="title pattern, e.g. intro|demo",
+        )
+        self.chapter_entry.pack(side="left")
+
         dir_frame = ctk.CTkFrame(self)
         dir_frame.pack(fill="x", padx=12, pady=4)
 
@@ -222,7 +297,13 @@ class DownloadTab(ctk.CTkFrame):
             fg_color="#dc3545", hover_color="#c82333",
             state="disabled", command=self._cancel,
         )
-        self.cancel_btn.pack(side="left")
+        self.cancel_btn.pack(side="left", padx=(0, 10))
+
+        ctk.CTkButton(
+            btn_row, text="Subscribe", height=44, width=110,
+            fg_color="#7E57C2", hover_color="#673AB7",
+            command=self._subscribe,
+        ).pack(side="left")
 
         prog_frame = ctk.CTkFrame(self)
         prog_frame.pack(fill="x", padx=12, pady=4)
@@ -279,6 +360,51 @@ class DownloadTab(ctk.CTkFrame):
             self.format_menu.configure(values=_VIDEO_FORMATS)
             if self.format_var.get() in _AUDIO_FORMATS:
                 self.format_var.set("mp4")
+        self._render_preview()
+
+    def _render_preview(self) -> None:
+        table = self._formats
+        if table is None:
+            self.preview_box.pack_forget()
+            self.preview_note.pack_forget()
+            return
+
+        current = _QUALITY_MAP.get(self.quality_var.get(), QualityPreset.MAXIMUM)
+        current_fmt = self.format_var.get()
+        acodec = _AUDIO_CODEC_MAP.get(self.acodec_var.get(), AudioCodec.MP3)
+        try:
+            bitrate = int(self.bitrate_var.get())
+        except ValueError:
+            bitrate = 320
+
+        lines = [f"{'Quality':<22}{'Format':<19}{'Streams':<46}{'Size':>10}{'Bitrate':>12}  Output"]
+        selected: tuple[int, FormatPreview] | None = None
+        for label, preset in _QUALITY_MAP.items():
+            names = _AUDIO_FORMATS if preset == QualityPreset.AUDIO_ONLY else _VIDEO_FORMATS
+            groups: dict[tuple[Any, ...], tuple[list[str], FormatPreview]] = {}
+            for name in names:
+                preview = preview_download(table, preset, _FORMAT_MAP[name], acodec, bitrate)
+                key = (
+                    tuple(preview.streams), preview.container, preview.size,
+                    preview.reencode, preview.note,
+                )
+                groups.setdefault(key, ([], preview))[0].append(name)
+            for group, preview in groups.values():
+                if preset == current and current_fmt in group:
+                    selected = (len(lines), preview)
+                lines.append(_preview_line(label, "/".join(group), preview))
+
+        self.preview_box.configure(state="normal")
+        self.preview_box.delete("1.0", "end")
+        self.preview_box.insert("1.0", "\n".join(lines))
+        if selected is not None:
+            row = selected[0] + 1
+            self.preview_box.tag_add("current", f"{row}.0", f"{row}.end")
+            self.preview_note.configure(text=f"Selected: {selected[1].note}")
+        self.preview_box.configure(state="disabled")
+        if not self.preview_box.winfo_ismapped():
+            self.preview_box.pack(fill="x", padx=12, pady=(0, 2))
+            self.preview_note.pack(fill="x", padx=12, pady=(0, 8))
 
     def _paste(self) -> None:
         try:
@@ -294,8 +420,27 @@ class DownloadTab(ctk.CTkFrame):
         url = self.url_entry.get().strip()
         if not url:
             return
+        items = self.items_entry.get().strip()
+        try:
+            parse_playlist_items(items)
+        except ValueError as exc:
+            self.info_label.configure(text=str(exc), text_color="#f44336")
+            return
         self.info_label.configure(text="Analyzing…", text_color="gray")
-        self.app.analyze_url(url, self._on_analysis_done)
+        self._thumb_url = ""
+        self.thumb_lbl.pack_forget()
+        self._formats = None
+        self._render_preview()
+        self.app.analyze_url(
+            url, self._on_analysis_done,
+            on_count=self._on_analysis_count,
+            playlist_items=items,
+        )
+
+    def _on_analysis_count(self, count: int) -> None:
+        self.info_label.configure(
+            text=f"Analyzing playlist… {count} videos found", text_color="gray",
+        )
 
     def _on_analysis_done(self, vi: Any) -> None:
         info: VideoInfo = vi
@@ -303,6 +448,9 @@ class DownloadTab(ctk.CTkFrame):
             self.info_label.configure(text=f"Error: {info.error}", text_color="#f44336")
             return
 
+        self._formats = info.formats if info.formats is not None and len(info.formats) else None
+        self._render_preview()
+
         if info.is_playlist:
             text = f"Playlist: {info.title} — {info.playlist_count} videos"
             self.playlist_var.set(True)
@@ -327,6 +475,16 @@ class DownloadTab(ctk.CTkFrame):
 
         self.info_label.configure(text=text, text_color="#4CAF50")
 
+        if info.thumbnail_url:
+            url = self._thumb_url = info.thumbnail_url
+            self.app.request_thumbnail(url, _THUMB_SIZE, lambda image: self._show_thumbnail(url, image))
+
+    def _show_thumbnail(self, url: str, image: Any) -> None:
+        if url != self._thumb_url:
+            return
+        self.thumb_lbl.configure(image=image)
+        self.thumb_lbl.pack(side="left", padx=(0, 10), before=self.info_label)
+
     def _browse(self) -> None:
         folder = ctk.filedialog.askdirectory()
         if folder:
@@ -365,6 +523,51 @@ class DownloadTab(ctk.CTkFrame):
             )
             return
 
+        items = self.items_entry.get().strip()
+        try:
+            parse_playlist_items(items)
+            parse_time_ranges(self.ranges_entry.get())
+        except ValueError as exc:
+            self.info_label.configure(text=str(exc), text_color="#f44336")
+            return
+        try:
+            re.compile(self.chapter_entry.get().strip())
+        except re.error as exc:
+            self.info_label.configure(text=f"Invalid chapter pattern: {exc}", text_color="#f44336")
+            return
+
+        self.app.cancel_analysis()
+        task = self._task_from_form(url, out_dir, items)
+
+        self._current_task_id = task.id
+        self.cancel_btn.configure(state="normal")
+        self.prog_bar.set(0)
+        self.prog_title.configure(text="Queued…", text_color=("gray10", "gray90"))
+        self.prog_detail.configure(text="")
+        self.info_label.configure(text="Download queued ✓", text_color="#2196F3")
+        self.app.submit_download(task)
+
+    def _subscribe(self) -> None:
+        url = self.url_entry.get().strip()
+        if not url or not is_valid_youtube_url(url):
+            self.info_label.configure(text="Enter a channel or playlist URL to subscribe", text_color="#f44336")
+            return
+        out_dir = self.dir_entry.get().strip()
+        if not out_dir:
+            self.info_label.configure(
+                text="Please select an output directory", text_color="#f44336",
+            )
+            return
+        try:
+            self.app.subscribe(url, task_options(self._task_from_form(url, out_dir, "")))
+        except ValueError as exc:
+            self.info_label.configure(text=str(exc), text_color="#f44336")
+            return
+        self.info_label.configure(
+            text="Subscribed ✓ — new uploads will be queued automatically", text_color="#2196F3",
+        )
+
+    def _task_from_form(self, url: str, out_dir: str, items: str) -> DownloadTask:
         preset = _QUALITY_MAP.get(self.quality_var.get(), QualityPreset.MAXIMUM)
         fmt = _FORMAT_MAP.get(self.format_var.get(), OutputFormat.MP4)
         acodec = _AUDIO_CODEC_MAP.get(self.acodec_var.get(), AudioCodec.MP3)
@@ -374,7 +577,7 @@ class DownloadTab(ctk.CTkFrame):
         except ValueError:
             bitrate = 320
 
-        task = DownloadTask(
+        return DownloadTask(
             url=url,
             output_dir=out_dir,
             quality=preset,
@@ -385,21 +588,23 @@ class DownloadTab(ctk.CTkFrame):
             metadata=self.meta_var.get(),
             chapters=self.chapters_var.get(),
             sponsorblock=self.sponsor_var.get(),
+            sponsor_skip=self.sponsor_skip_var.get(),
+            time_ranges=self.ranges_entry.get().strip(),
+            chapter_select=self.chapter_entry.get().strip(),
             cookies_path=self.app.settings.settings.cookies_path,
             proxy=self.app.settings.settings.proxy,
             speed_limit=self.app.settings.settings.speed_limit,
             playlist_mode=self.playlist_var.get(),
+            playlist_items=items,
             audio_codec=acodec,
             audio_quality=bitrate,
+            window="" if self.window_var.get() == _START_NOW else self.window_var.get(),
         )
 
-        self._current_task_id = task.id
-        self.cancel_btn.configure(state="normal")
-        self.prog_bar.set(0)
-        self.prog_title.configure(text="Queued…", text_color=("gray10", "gray90"))
-        self.prog_detail.configure(text="")
-        self.info_label.configure(text="Download queued ✓", text_color="#2196F3")
-        self.app.submit_download(task)
+    def set_windows(self, names: list[str]) -> None:
+        self.window_menu.configure(values=[_START_NOW, *names])
+        if self.window_var.get() not in names:
+            self.window_var.set(_START_NOW)
 
     def update_progress(self, data: dict[str, object]) -> None:
         progress = float(data.get("progress", 0))
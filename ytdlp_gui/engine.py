@@ -1,23 +1,59 @@
 from __future__ import annotations
 
+import functools
 import logging
 import os
 import threading
 import time
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import yt_dlp
-
+from yt_dlp.utils import prepend_extension, replace_extension
+
+from .cancel import CancelToken, remove_partials
+from .config import CONTENT_INDEX_FILE, SPONSOR_CACHE_FILE, THUMBNAIL_DIR
+from .content_index import ContentIndex, DedupSession, output_fingerprint
+from .cookie_store import CookieStore
+from .flights import FlightTable, canonical_id, warm_extractors
+from .formats import FormatTable
 from .models import (
     AudioCodec,
     DownloadStatus,
     DownloadTask,
+    EngineEvent,
+    EventKind,
+    FormatPreview,
     OutputFormat,
     QualityPreset,
+    TimeProfile,
     VideoInfo,
 )
+from .netpool import HttpPool, interrupt
+from .postprocess import (
+    PostProcessPlan,
+    audio_container,
+    audio_format_selector,
+    plan_audio,
+    plan_postprocessing,
+    plan_remux,
+)
+from .procpool import ProcessPool
+from .proxies import ProxyPool, redact
+from .scheduler import TaskScheduler
+from .sections import NO_SECTIONS, JoinSectionsPP, SectionPlan, piece_template, wants_sections
+from .sponsor_cache import DEFAULT_API, SponsorCache, service_for
+from .thumbnails import CachedThumbnailPP, ThumbnailCache, thumbnail_url
+from .timeplan import RateLimiter, TimePlan, describe_profile, profiles_from_settings
+from .utils import format_bytes, is_online, parse_playlist_items
+from .verify import ProbePool, ProbeResult, VerifyPP
+from .ydl_pool import YdlPool
+
+if TYPE_CHECKING:
+    from .config import AppSettings
 
 logger = logging.getLogger(__name__)
 
@@ -74,18 +110,9 @@ class QualityPresets:
         }
 
     @staticmethod
-    def audio(codec: AudioCodec = AudioCodec.MP3, quality: int = 320) -> dict[str, Any]:
-        preferred = codec.value if codec != AudioCodec.BEST else "best"
-        pp: dict[str, Any] = {
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": preferred,
-        }
-        if codec in (AudioCodec.MP3, AudioCodec.AAC, AudioCodec.VORBIS, AudioCodec.OPUS):
-            pp["preferredquality"] = str(min(max(quality, 64), 320))
-
+    def audio(codec: AudioCodec = AudioCodec.MP3) -> dict[str, Any]:
         return {
-            "format": "bestaudio/best",
-            "postprocessors": [pp],
+            "format": audio_format_selector(codec),
             "format_sort": ["abr", "acodec:opus", "acodec:aac"],
         }
 
@@ -127,29 +154,149 @@ _FALLBACK_FORMATS_AUDIO = [
     "best",
 ]
 
+_AUDIO_FORMATS = (OutputFormat.MP3, OutputFormat.OPUS, OutputFormat.FLAC, OutputFormat.WAV)
+
+def is_audio_output(quality: QualityPreset, fmt: OutputFormat) -> bool:
+    return quality == QualityPreset.AUDIO_ONLY or fmt in _AUDIO_FORMATS
+
+def preset_options(
+    quality: QualityPreset, fmt: OutputFormat, audio_codec: AudioCodec = AudioCodec.MP3,
+) -> dict[str, Any]:
+    if is_audio_output(quality, fmt):
+        return QualityPresets.audio(codec=audio_codec)
+    if quality == QualityPreset.VIDEO_ONLY:
+        return QualityPresets.video_only()
+    if quality == QualityPreset.MAXIMUM:
+        opts = QualityPresets.maximum()
+        opts.setdefault("merge_output_format", "mkv")
+        return opts
+    opts = QualityPresets.high() if quality == QualityPreset.HIGH else QualityPresets.balanced()
+    if fmt in (OutputFormat.MKV, OutputFormat.WEBM, OutputFormat.MP4):
+        opts["merge_output_format"] = fmt.value
+    return opts
+
+_LOSSLESS_KBPS = {AudioCodec.WAV: 1411.2}
+
+def preview_download(
+    table: FormatTable,
+    quality: QualityPreset,
+    fmt: OutputFormat,
+    audio_codec: AudioCodec = AudioCodec.MP3,
+    audio_quality: int = 320,
+) -> FormatPreview:
+    preview = FormatPreview(quality, fmt)
+    opts = preset_options(quality, fmt, audio_codec)
+    picks = table.resolve(opts["format"], opts.get("format_sort", ()))
+    if picks is None:
+        preview.note = "no matching formats"
+        return preview
+
+    preview.streams = [table.label(i) for i in picks]
+    preview.size = sum(table.size[i] for i in picks)
+    preview.exact_size = all(table.exact_size(i) for i in picks)
+    preview.bitrate = sum(table.bitrate(i) for i in picks)
+
+    if is_audio_output(quality, fmt):
+        source_ext = table.ext_of(picks[0])
+        preview.container = audio_container(table.acodec_of(picks[0]), audio_codec, source_ext)
+        preview.reencode, preview.note = plan_audio(table.acodec_of(picks[0]), audio_codec, source_ext)
+        kbps = _LOSSLESS_KBPS.get(audio_codec) or (
+            audio_quality if audio_codec != AudioCodec.FLAC else 0
+        )
+        if preview.reencode and kbps and table.duration:
+            preview.bitrate = kbps
+            preview.size = int(kbps * table.duration * 125)
+            preview.exact_size = False
+        return preview
+
+    container = "" if quality == QualityPreset.VIDEO_ONLY else opts.get("merge_output_format") or ""
+    preview.container = container or table.ext_of(picks[0])
+    if not container:
+        preview.note = "single stream, no remux"
+        return preview
+    streams = [{"vcodec": table.vcodec_of(i), "acodec": table.acodec_of(i)} for i in picks]
+    remux, extra, preview.note = plan_remux(container, streams)
+    preview.reencode = bool(extra)
+    if not remux:
+        preview.container = table.ext_of(picks[0])
+    return preview
+
 ProgressCallback = Callable[[str, dict[str, Any]], None]
 StatusCallback = Callable[[str, DownloadStatus], None]
 LogCallback = Callable[[str, str], None]
+CountCallback = Callable[[int], None]
+FinishedCallback = Callable[[DownloadTask], None]
+EventListener = Callable[[EngineEvent], None]
+
+_COUNT_EMIT_INTERVAL = 0.25
+_MAX_VERIFY_REQUEUES = 2
+_SPONSOR_BATCH = 50
+_MAX_URL_REDIRECTS = 5
+_FORMAT_CACHE_SIZE = 64
+_FORMAT_CACHE_TTL = 1800.0
+_CONNECTIVITY_POLL = 5.0
+_SKIPPED_FRAGMENT = "Skipping fragment"
+_SHARED_FIELDS = (
+    "progress", "speed", "eta", "downloaded_bytes", "total_bytes", "title",
+    "thumbnail_url", "playlist_index", "playlist_total",
+)
+_RESULT_FIELDS = (
+    "error", "output_path", "started_at", "completed_at", "io_saved_bytes",
+    "reused_files", "reused_bytes", "skipped_bytes", "verified_files", "verify_failures",
+)
+_FINISHED = frozenset({DownloadStatus.COMPLETED, DownloadStatus.FAILED, DownloadStatus.CANCELED})
+_AUDIO_PPS = ("CodecAwareAudio", "FFmpegExtractAudio")
+_AUDIO_EXTS = ("mp3", "m4a", "opus", "ogg", "flac", "wav")
+_THROTTLE_ERRORS = ("HTTP Error 429", "HTTP Error 403")
+
+def _route(task: DownloadTask) -> str:
+    return task.proxy or task.leased_proxy
+
+def _proxy_outcome(error: str) -> str:
+    return "throttled" if any(p in error for p in _THROTTLE_ERRORS) else "failed"
+
+def iter_entries(
+    info: dict[str, Any],
+    playlist_items: str = "",
+    cancel: threading.Event | None = None,
+) -> Iterator[dict[str, Any]]:
+    matches, last = parse_playlist_items(playlist_items)
+    for index, entry in enumerate(info.get("entries") or (), start=1):
+        if cancel is not None and cancel.is_set():
+            return
+        if index > last:
+            return
+        if entry and matches(index):
+            yield entry
 
 class _YtdlpLogger:
 
-    def __init__(self, engine: DownloadEngine, task_id: str) -> None:
+    def __init__(self, engine: DownloadEngine, task: DownloadTask, cancel: CancelToken | None = None) -> None:
         self._engine = engine
-        self._task_id = task_id
+        self._task_id = task.id
+        self._probe_url = _route(task) or task.url
+        self._cancel = cancel
         self.errors: list[str] = []
 
     def debug(self, msg: str) -> None:
-        pass
+        if self._cancel is None or _SKIPPED_FRAGMENT not in msg:
+            return
+        if not self._cancel.is_set() and not is_online(self._probe_url):
+            self._cancel.pause("offline")
+        if self._cancel.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Canceled by user")
 
     def info(self, msg: str) -> None:
         pass
 
     def warning(self, msg: str) -> None:
-        self._engine._log(self._task_id, f"[WARNING] {msg}")
+        if self._cancel is None or not self._cancel.is_set():
+            self._engine._log(self._task_id, f"[WARNING] {msg}")
 
     def error(self, msg: str) -> None:
         self.errors.append(msg)
-        self._engine._log(self._task_id, f"[ERROR] {msg}")
+        if self._cancel is None or not self._cancel.is_set():
+            self._engine._log(self._task_id, f"[ERROR] {msg}")
 
 class DownloadEngine:
 
@@ -163,9 +310,27 @@ class DownloadEngine:
         http_chunk_size: int = 10_485_760,
         buffer_size: int = 131_072,
         socket_timeout: int = 30,
+        max_connections_per_host: int = 8,
+        process_mode: bool = False,
+        profiles: list[TimeProfile] | None = None,
+        content_index: str = "",
+        dedup_link: str = "auto",
+        verify: bool = False,
+        verify_workers: int = 2,
+        cancel_cleanup: str = "delete",
+        proxy_pool: list[str] | None = None,
+        proxy_limit: int = 2,
+        proxy_cooldown: int = 300,
+        sponsor_cache: str = "",
+        sponsor_api: str = DEFAULT_API,
+        sponsor_ttl: int = 86400,
+        sponsor_offline: bool = False,
+        thumbnail_cache: str = "",
+        thumbnail_cache_mb: int = 100,
         on_progress: ProgressCallback | None = None,
         on_status_change: StatusCallback | None = None,
         on_log: LogCallback | None = None,
+        on_finished: FinishedCallback | None = None,
     ) -> None:
         self._max_concurrent = max_concurrent
         self._concurrent_fragments = concurrent_fragments
@@ -174,6 +339,21 @@ class DownloadEngine:
         self._http_chunk_size = http_chunk_size
         self._buffer_size = buffer_size
         self._socket_timeout = socket_timeout
+        self._max_connections_per_host = max_connections_per_host
+        self._content_index_path = content_index
+        self._dedup_link = dedup_link
+        self._verify = verify
+        self._verify_workers = verify_workers
+        self._cancel_cleanup = cancel_cleanup
+        self._proxy_pool = list(proxy_pool or [])
+        self._proxy_limit = proxy_limit
+        self._proxy_cooldown = proxy_cooldown
+        self._sponsor_cache_path = sponsor_cache
+        self._sponsor_api = sponsor_api
+        self._sponsor_ttl = sponsor_ttl
+        self._sponsor_offline = sponsor_offline
+        self._thumbnail_cache_path = thumbnail_cache
+        self._thumbnail_cache_mb = thumbnail_cache_mb
 
         self._windows_filenames: bool = True
         self._restrict_filenames: bool = False
@@ -182,135 +362,576 @@ class DownloadEngine:
         self._on_progress = on_progress
         self._on_status_change = on_status_change
         self._on_log = on_log
-
-        self._semaphore = threading.Semaphore(max_concurrent)
-        self._cancel_events: dict[str, threading.Event] = {}
+        self._on_finished = on_finished
+
+        self._scheduler = TaskScheduler(max_concurrent, self._start)
+        self._flights = FlightTable()
+        threading.Thread(target=warm_extractors, daemon=True, name="extractor-warmup").start()
+        self._listeners: tuple[EventListener, ...] = ()
+        self._tasks: dict[str, DownloadTask] = {}
+        self._cancel_events: dict[str, CancelToken] = {}
         self._threads: dict[str, threading.Thread] = {}
+        self._format_tables: OrderedDict[str, tuple[float, FormatTable]] = OrderedDict()
         self._lock = threading.Lock()
+        self._http_pool = HttpPool(max_per_host=max_connections_per_host)
+        self._cookie_store = CookieStore()
+        self._ydl_pool = YdlPool(
+            max_idle_per_profile=max_concurrent + 1,
+            http_pool=self._http_pool,
+            cookie_store=self._cookie_store,
+        )
+        self._process_pool = ProcessPool(max_idle=max_concurrent) if process_mode else None
+        self._content_index = ContentIndex(content_index) if content_index else None
+        self._probe_pool: ProbePool | None = None
+        if verify and not process_mode:
+            self._probe_pool = ProbePool(verify_workers)
+            if not self._probe_pool.available:
+                logger.warning("ffprobe not found; downloads will not be verified")
+        self._verify_totals = {"files": 0, "failed": 0, "seconds": 0.0, "requeued": 0}
+        self._cancel_totals: dict[str, dict[str, float]] = {}
+        self._paused: dict[str, DownloadTask] = {}
+        self._queue_hold = ""
+        self._closing = threading.Event()
+        self._limiter = RateLimiter()
+        self._proxies = ProxyPool(self._proxy_pool, proxy_limit, proxy_cooldown)
+        self._sponsors = SponsorCache(sponsor_cache or ":memory:", sponsor_api, sponsor_ttl, sponsor_offline)
+        self._thumbnails = (
+            ThumbnailCache(thumbnail_cache, thumbnail_cache_mb * 1024 * 1024) if thumbnail_cache else None
+        )
+        self._timeplan = TimePlan(
+            profiles or [], on_change=self._apply_profile, on_release=self._release_held,
+        )
 
-    def analyze(self, url: str, cookies_path: str = "", proxy: str = "") -> VideoInfo:
+    def analyze(
+        self,
+        url: str,
+        cookies_path: str = "",
+        proxy: str = "",
+        *,
+        playlist_items: str = "",
+        on_count: CountCallback | None = None,
+        cancel: threading.Event | None = None,
+    ) -> VideoInfo:
+        vi = VideoInfo()
+        with self._ydl_pool.session(self._probe_opts(cookies_path, proxy)) as ydl:
+            info = self._extract_lazy(ydl, url)
+            if info is None:
+                vi.error = "No information returned"
+                return vi
+
+            if info.get("_type") == "playlist":
+                vi.is_playlist = True
+                vi.title = info.get("title") or "Unknown Playlist"
+                vi.thumbnail_url = thumbnail_url(info)
+                last_emit = 0.0
+                for _ in iter_entries(info, playlist_items, cancel):
+                    vi.playlist_count += 1
+                    now = time.monotonic()
+                    if on_count and now - last_emit >= _COUNT_EMIT_INTERVAL:
+                        last_emit = now
+                        on_count(vi.playlist_count)
+                if on_count:
+                    on_count(vi.playlist_count)
+                return vi
+
+            info = ydl.process_ie_result(info, download=False)
+
+        if info is None:
+            vi.error = "No information returned"
+            return vi
+
+        vi.title = info.get("title") or "Unknown"
+        vi.duration = info.get("duration") or 0
+        vi.uploader = info.get("uploader") or "Unknown"
+        vi.view_count = info.get("view_count") or 0
+        vi.like_count = info.get("like_count") or 0
+        vi.upload_date = info.get("upload_date") or ""
+        vi.description = (info.get("description") or "")[:500]
+        vi.thumbnail_url = thumbnail_url(info)
+
+        table = FormatTable.from_info(info)
+        self._cache_formats(table, url, info.get("webpage_url"))
+        vi.formats = table
+        vi.available_resolutions = table.resolutions
+        vi.max_resolution = table.max_height
+        vi.max_fps = table.max_fps
+        vi.has_hdr = table.has_hdr
+        vi.filesize_approx = table.max_size
+        return vi
+
+    def format_table(self, url: str) -> FormatTable | None:
+        with self._lock:
+            entry = self._format_tables.get(url)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > _FORMAT_CACHE_TTL:
+                del self._format_tables[url]
+                return None
+            self._format_tables.move_to_end(url)
+            return entry[1]
+
+    def _cache_formats(self, table: FormatTable, *urls: str | None) -> None:
+        if not len(table):
+            return
+        now = time.monotonic()
+        with self._lock:
+            for url in dict.fromkeys(u for u in urls if u):
+                self._format_tables[url] = (now, table)
+                self._format_tables.move_to_end(url)
+            while len(self._format_tables) > _FORMAT_CACHE_SIZE:
+                self._format_tables.popitem(last=False)
+
+    def _expected_streams(
+        self, task: DownloadTask, table: FormatTable, format_override: str | None = None,
+    ) -> tuple[int, ...] | None:
+        opts = preset_options(task.quality, task.format, task.audio_codec)
+        return table.resolve(format_override or opts["format"], opts.get("format_sort", ()))
+
+    def _probe_opts(
+        self, cookies_path: str, proxy: str, *, noplaylist: bool = False,
+    ) -> dict[str, Any]:
         opts: dict[str, Any] = {
             "quiet": True,
             "no_warnings": True,
             "extract_flat": "in_playlist",
             "socket_timeout": self._socket_timeout,
+            "noplaylist": noplaylist,
         }
         if cookies_path and os.path.isfile(cookies_path):
             opts["cookiefile"] = cookies_path
         if proxy:
             opts["proxy"] = proxy
+        return opts
 
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-
-        vi = VideoInfo()
-        if info is None:
-            vi.error = "No information returned"
-            return vi
+    @contextmanager
+    def open_playlist(
+        self, url: str, cookies_path: str = "", proxy: str = "",
+    ) -> Iterator[dict[str, Any] | None]:
+        with self._ydl_pool.session(self._probe_opts(cookies_path, proxy)) as ydl:
+            yield self._extract_lazy(ydl, url)
 
-        if "entries" in info:
-            entries = list(info.get("entries") or [])
-            vi.is_playlist = True
-            vi.playlist_count = len(entries)
-            vi.title = info.get("title") or "Unknown Playlist"
-        else:
-            vi.title = info.get("title") or "Unknown"
-            vi.duration = info.get("duration") or 0
-            vi.uploader = info.get("uploader") or "Unknown"
-            vi.view_count = info.get("view_count") or 0
-            vi.like_count = info.get("like_count") or 0
-            vi.upload_date = info.get("upload_date") or ""
-            vi.description = (info.get("description") or "")[:500]
-            vi.thumbnail_url = info.get("thumbnail") or ""
-
-            resolutions = sorted(
-                {f["height"] for f in info.get("formats", []) if f.get("height")},
-                reverse=True,
+    @staticmethod
+    def _extract_lazy(ydl: yt_dlp.YoutubeDL, url: str) -> dict[str, Any] | None:
+        info = ydl.extract_info(url, download=False, process=False)
+        for _ in range(_MAX_URL_REDIRECTS):
+            if not info or info.get("_type") not in ("url", "url_transparent"):
+                break
+            info = ydl.extract_info(
+                info["url"], download=False, process=False, ie_key=info.get("ie_key"),
             )
-            vi.available_resolutions = resolutions
-            vi.max_resolution = resolutions[0] if resolutions else 0
+        return info
+
+    def submit(self, task: DownloadTask) -> None:
+        with self._lock:
+            self._cancel_events[task.id] = CancelToken()
+            self._tasks[task.id] = task
+        task.status = DownloadStatus.WAITING
+        self._enqueue(task)
+
+    def _enqueue(self, task: DownloadTask) -> None:
+        leader_id = self._flights.join(self._flight_key(task), task)
+        if leader_id is not None:
+            task.shared_with = leader_id
+            self._log(task.id, f"[INFO] Same video and options as task {leader_id}; sharing its download")
+            leader = self.get_task(leader_id)
+            if leader is not None and leader.status not in _FINISHED:
+                for name in _SHARED_FIELDS:
+                    setattr(task, name, getattr(leader, name))
+                self._set_status(task, leader.status)
+                self._emit_progress(task)
+            return
+        self._admit(task)
+
+    def _admit(self, task: DownloadTask) -> None:
+        if self._queue_hold:
+            self._park(task)
+            return
+        if task.window and task.window not in self._timeplan.window_names():
+            self._log(task.id, f"[WARNING] Unknown schedule window '{task.window}'; starting now")
+            task.window = ""
+        if self._timeplan.hold(task):
+            self._set_status(task, DownloadStatus.SCHEDULED)
+            self._log(task.id, f"[INFO] Scheduled: {self._hold_reason(task)}")
+            self._emit_progress(task)
+            return
+        self._log(task.id, "[INFO] Waiting for download slot…")
+        self._scheduler.submit(task)
+
+    def cancel(self, task_id: str) -> None:
+        with self._lock:
+            ev = self._cancel_events.get(task_id)
+        if ev:
+            task = self._tasks.get(task_id)
+            ev.paused = ""
+            ev.set(task.status.value if task is not None else "")
+        task = (
+            self._flights.leave(task_id)
+            or self._unpark(task_id)
+            or self._scheduler.remove(task_id)
+            or self._timeplan.remove(task_id)
+        )
+        if task is not None:
+            self._finish_pending(task)
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            for task_id, ev in self._cancel_events.items():
+                task = self._tasks.get(task_id)
+                ev.paused = ""
+                ev.set(task.status.value if task is not None else "")
+            paused, self._paused = list(self._paused.values()), {}
+        for task in self._flights.leave_all():
+            self._finish_pending(task)
+        for task in paused:
+            self._finish_pending(task)
+        for task in self._timeplan.held():
+            if self._timeplan.remove(task.id) is not None:
+                self._finish_pending(task)
+        for task in self._scheduler.pending():
+            if self._scheduler.remove(task.id) is not None:
+                self._finish_pending(task)
+
+    def pause(self, task_id: str) -> bool:
+        task = self.get_task(task_id)
+        if task is None or task.status in _FINISHED or task.status is DownloadStatus.PAUSED:
+            return False
+        if task.shared_with:
+            if self._flights.leave(task_id) is None:
+                return False
+            task.shared_with = ""
+            self._park(task)
+            return True
+        pending = self._scheduler.remove(task_id) or self._timeplan.remove(task_id)
+        if pending is not None:
+            self._park(pending)
+            return True
+        with self._lock:
+            ev = self._cancel_events.get(task_id)
+        if ev is None or ev.is_set():
+            return False
+        ev.pause()
+        return True
 
-            fps_values = [
-                f.get("fps", 0) or 0
-                for f in info.get("formats", [])
-                if f.get("fps")
+    def resume(self, task_id: str) -> bool:
+        with self._lock:
+            task = self._paused.pop(task_id, None)
+        if task is None:
+            task = self.get_task(task_id)
+            return task is not None and bool(task.shared_with) and self.resume(task.shared_with)
+        self._set_status(task, DownloadStatus.WAITING)
+        self._log(task.id, "[INFO] Resumed")
+        self._emit_progress(task)
+        self._enqueue(task)
+        return True
+
+    def pause_all(self, reason: str = "user") -> int:
+        self._queue_hold = reason
+        count = 0
+        for task in [*self._timeplan.held(), *self._scheduler.pending()]:
+            if (self._scheduler.remove(task.id) or self._timeplan.remove(task.id)) is not None:
+                self._park(task)
+                count += 1
+        with self._lock:
+            running = [
+                ev for task_id, ev in self._cancel_events.items()
+                if task_id in self._threads and not ev.is_set()
             ]
-            vi.max_fps = max(fps_values) if fps_values else 0
+        for ev in running:
+            ev.pause(reason)
+        logger.info("Queue paused (%s): %d waiting, %d running", reason, count, len(running))
+        return count + len(running)
 
-            for f in info.get("formats", []):
-                if (f.get("dynamic_range") or "").lower() in ("hdr", "hdr10", "hlg"):
-                    vi.has_hdr = True
-                    break
+    def resume_all(self) -> int:
+        self._queue_hold = ""
+        with self._lock:
+            task_ids = list(self._paused)
+        return sum(self.resume(task_id) for task_id in task_ids)
 
-            for f in reversed(info.get("formats", [])):
-                sz = f.get("filesize") or f.get("filesize_approx") or 0
-                if sz > vi.filesize_approx:
-                    vi.filesize_approx = sz
+    @property
+    def queue_paused(self) -> str:
+        return self._queue_hold
 
-        return vi
+    def set_profiles(self, profiles: list[TimeProfile]) -> None:
+        self._timeplan.set_profiles(profiles)
 
-    def submit(self, task: DownloadTask) -> None:
-        cancel = threading.Event()
+    def reconfigure(
+        self,
+        *,
+        max_concurrent: int | None = None,
+        concurrent_fragments: int | None = None,
+        max_retries: int | None = None,
+        fragment_retries: int | None = None,
+        http_chunk_size: int | None = None,
+        buffer_size: int | None = None,
+        socket_timeout: int | None = None,
+        max_connections_per_host: int | None = None,
+        dedup_link: str | None = None,
+        windows_filenames: bool | None = None,
+        restrict_filenames: bool | None = None,
+        overwrites: bool | None = None,
+        cancel_cleanup: str | None = None,
+        proxy_pool: list[str] | None = None,
+        proxy_limit: int | None = None,
+        proxy_cooldown: int | None = None,
+        sponsor_api: str | None = None,
+        sponsor_ttl: int | None = None,
+        sponsor_offline: bool | None = None,
+        thumbnail_cache_mb: int | None = None,
+        profiles: list[TimeProfile] | None = None,
+    ) -> list[str]:
+        values = {
+            "max_concurrent": max_concurrent,
+            "concurrent_fragments": concurrent_fragments,
+            "max_retries": max_retries,
+            "fragment_retries": fragment_retries,
+            "http_chunk_size": http_chunk_size,
+            "buffer_size": buffer_size,
+            "socket_timeout": socket_timeout,
+            "max_connections_per_host": max_connections_per_host,
+            "dedup_link": dedup_link,
+            "windows_filenames": windows_filenames,
+            "restrict_filenames": restrict_filenames,
+            "overwrites": overwrites,
+            "cancel_cleanup": cancel_cleanup,
+            "proxy_pool": proxy_pool,
+            "proxy_limit": proxy_limit,
+            "proxy_cooldown": proxy_cooldown,
+            "sponsor_api": sponsor_api,
+            "sponsor_ttl": sponsor_ttl,
+            "sponsor_offline": sponsor_offline,
+            "thumbnail_cache_mb": thumbnail_cache_mb,
+        }
+        changed = [
+            name for name, value in values.items()
+            if value is not None and getattr(self, f"_{name}") != value
+        ]
+        for name in changed:
+            setattr(self, f"_{name}", values[name])
+
+        if "max_concurrent" in changed:
+            self._ydl_pool.set_max_idle(self._max_concurrent + 1)
+            if self._process_pool is not None:
+                self._process_pool.set_max_idle(self._max_concurrent)
+            profile = self._timeplan.active
+            self._scheduler.set_limit(profile.slots if profile is not None and profile.slots else self._max_concurrent)
+            self.set_rate_limit(self.rate_limit)
+        if "max_connections_per_host" in changed:
+            self._http_pool.set_max_per_host(self._max_connections_per_host)
+        if {"proxy_pool", "proxy_limit", "proxy_cooldown"} & set(changed):
+            self._proxies.configure(self._proxy_pool, self._proxy_limit, self._proxy_cooldown)
+        if {"sponsor_api", "sponsor_ttl", "sponsor_offline"} & set(changed):
+            self._sponsors.configure(self._sponsor_api, self._sponsor_ttl, self._sponsor_offline)
+        if "thumbnail_cache_mb" in changed and self._thumbnails is not None:
+            self._thumbnails.set_limit(self._thumbnail_cache_mb * 1024 * 1024)
+        if changed and self._process_pool is not None:
+            self._process_pool.refresh()
+        if profiles is not None:
+            self.set_profiles(profiles)
+        if changed:
+            logger.info("Engine reconfigured: %s", ", ".join(changed))
+        return changed
+
+    def windows(self) -> list[str]:
+        return self._timeplan.window_names()
+
+    def set_rate_limit(self, rate: int) -> None:
+        self._limiter.set_rate(rate)
+        if self._process_pool is not None:
+            self._process_pool.set_rate(rate // self._scheduler.limit if rate else 0)
+
+    @property
+    def active_profile(self) -> TimeProfile | None:
+        return self._timeplan.active
+
+    @property
+    def rate_limit(self) -> int:
+        return self._limiter.rate
+
+    def reprioritize(self, task_id: str, priority: int) -> bool:
+        if self._scheduler.reprioritize(task_id, priority):
+            return True
         with self._lock:
-            self._cancel_events[task.id] = cancel
-        task.status = DownloadStatus.WAITING
+            task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        task.priority = priority
+        return True
 
-        t = threading.Thread(
-            target=self._run,
-            args=(task, cancel),
-            daemon=True,
-            name=f"dl-{task.id}",
-        )
+    def get_task(self, task_id: str) -> DownloadTask | None:
         with self._lock:
-            self._threads[task.id] = t
-        t.start()
+            return self._tasks.get(task_id)
 
-    def cancel(self, task_id: str) -> None:
+    def tasks(self) -> list[DownloadTask]:
         with self._lock:
-            ev = self._cancel_events.get(task_id)
-        if ev:
-            ev.set()
+            return list(self._tasks.values())
 
-    def cancel_all(self) -> None:
+    def add_listener(self, listener: EventListener) -> None:
         with self._lock:
-            for ev in self._cancel_events.values():
-                ev.set()
+            self._listeners = (*self._listeners, listener)
+
+    def remove_listener(self, listener: EventListener) -> None:
+        with self._lock:
+            self._listeners = tuple(fn for fn in self._listeners if fn is not listener)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._scheduler.running_count,
+            "pending": self._scheduler.pending_count,
+            "scheduled": self._timeplan.held_count,
+            "paused": len(self._paused),
+            "queue_paused": self._queue_hold or None,
+            "max_concurrent": self._scheduler.limit,
+            "rate_limit": self._limiter.rate,
+            "profile": self._timeplan.active.name if self._timeplan.active else None,
+            "process_mode": self.process_mode,
+            "http_pool": self._http_pool.stats(),
+            "content_index": self._content_index.stats() if self._content_index else None,
+            "verification": {
+                **self._verify_totals, "seconds": round(self._verify_totals["seconds"], 3),
+            } if self._verify else None,
+            "cancellation": self.cancel_stats(),
+            "single_flight": self._flights.stats(),
+            "proxies": self._proxies.stats() if self._proxies.enabled else None,
+            "sponsorblock": self._sponsors.stats(),
+            "thumbnails": self._thumbnails.stats() if self._thumbnails else None,
+        }
+
+    def cancel_stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                phase: {
+                    "count": int(t["count"]),
+                    "mean_ms": round(t["seconds"] / t["count"] * 1000, 1),
+                    "max_ms": round(t["max"] * 1000, 1),
+                }
+                for phase, t in self._cancel_totals.items()
+            }
+
+    def shutdown(self) -> None:
+        self._closing.set()
+        self.cancel_all()
+        self._timeplan.close()
+        if self._process_pool is not None:
+            self._process_pool.close()
+        self._ydl_pool.close()
+        self._http_pool.close()
+        if self._content_index is not None:
+            self._content_index.close()
+        self._sponsors.close()
+        if self._thumbnails is not None:
+            self._thumbnails.close()
+        if self._probe_pool is not None:
+            self._probe_pool.close()
+
+    def http_pool_stats(self) -> dict[str, int]:
+        return self._http_pool.stats()
+
+    def proxy_stats(self) -> list[dict[str, Any]]:
+        return self._proxies.stats()
+
+    @property
+    def thumbnails(self) -> ThumbnailCache | None:
+        return self._thumbnails
+
+    def prefetch_sponsors(self, entries: Iterable[dict[str, Any]]) -> int:
+        by_service: dict[str, list[str]] = {}
+        for entry in entries:
+            service = service_for(entry)
+            if service and entry.get("id"):
+                by_service.setdefault(service, []).append(entry["id"])
+        return sum(self._sponsors.prefetch(ids, service) for service, ids in by_service.items())
+
+    @property
+    def process_mode(self) -> bool:
+        return self._process_pool is not None
 
     @property
     def active_count(self) -> int:
-        with self._lock:
-            return sum(1 for t in self._threads.values() if t.is_alive())
+        return (
+            self._scheduler.running_count
+            + self._scheduler.pending_count
+            + self._timeplan.held_count
+            + self._flights.attached_count
+            + len(self._paused)
+        )
+
+    def _worker_settings(self) -> dict[str, Any]:
+        return {
+            "max_concurrent": 1,
+            "concurrent_fragments": self._concurrent_fragments,
+            "max_retries": self._max_retries,
+            "fragment_retries": self._fragment_retries,
+            "http_chunk_size": self._http_chunk_size,
+            "buffer_size": self._buffer_size,
+            "socket_timeout": self._socket_timeout,
+            "max_connections_per_host": self._max_connections_per_host,
+            "content_index": self._content_index_path,
+            "dedup_link": self._dedup_link,
+            "verify": self._verify,
+            "verify_workers": self._verify_workers,
+            "cancel_cleanup": self._cancel_cleanup,
+            "remote_proxies": self._proxies.enabled,
+            "sponsor_cache": self._sponsor_cache_path,
+            "sponsor_api": self._sponsor_api,
+            "sponsor_ttl": self._sponsor_ttl,
+            "sponsor_offline": self._sponsor_offline,
+            "thumbnail_cache": self._thumbnail_cache_path,
+            "thumbnail_cache_mb": self._thumbnail_cache_mb,
+            "flags": {
+                "_windows_filenames": self._windows_filenames,
+                "_restrict_filenames": self._restrict_filenames,
+                "_overwrites": self._overwrites,
+            },
+        }
 
     def _log(self, task_id: str, msg: str) -> None:
         if self._on_log:
             self._on_log(task_id, msg)
+        self._notify(EngineEvent(task_id, EventKind.LOG, msg))
 
     def _set_status(self, task: DownloadTask, status: DownloadStatus) -> None:
         task.status = status
         if self._on_status_change:
             self._on_status_change(task.id, status)
+        self._notify(EngineEvent(task.id, EventKind.STATUS, status))
+        if status not in _FINISHED:
+            for follower in self._flights.followers(task.id):
+                self._set_status(follower, status)
 
     def _emit_progress(self, task: DownloadTask) -> None:
+        data = {
+            "progress": task.progress,
+            "speed": task.speed,
+            "eta": task.eta,
+            "downloaded": task.downloaded_bytes,
+            "total": task.total_bytes,
+            "title": task.title,
+            "thumbnail": task.thumbnail_url,
+            "status": task.status.value,
+            "playlist_index": task.playlist_index,
+            "playlist_total": task.playlist_total,
+            "shared_with": task.shared_with,
+            "skipped": task.skipped_bytes,
+        }
         if self._on_progress:
-            self._on_progress(
-                task.id,
-                {
-                    "progress": task.progress,
-                    "speed": task.speed,
-                    "eta": task.eta,
-                    "downloaded": task.downloaded_bytes,
-                    "total": task.total_bytes,
-                    "title": task.title,
-                    "status": task.status.value,
-                    "playlist_index": task.playlist_index,
-                    "playlist_total": task.playlist_total,
-                },
-            )
+            self._on_progress(task.id, data)
+        self._notify(EngineEvent(task.id, EventKind.PROGRESS, data))
+        for follower in self._flights.followers(task.id):
+            for name in _SHARED_FIELDS:
+                setattr(follower, name, getattr(task, name))
+            self._emit_progress(follower)
+
+    def _notify(self, event: EngineEvent) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Engine listener failed")
 
     def _build_opts(
         self,
         task: DownloadTask,
-        cancel: threading.Event,
+        cancel: CancelToken,
         *,
         format_override: str | None = None,
     ) -> dict[str, Any]:
@@ -331,7 +952,7 @@ class DownloadEngine:
             "no_warnings": False,
             "quiet": True,
             "no_color": True,
-            "logger": _YtdlpLogger(self, task.id),
+            "logger": _YtdlpLogger(self, task, cancel),
             "retries": self._max_retries,
             "fragment_retries": self._fragment_retries,
             "file_access_retries": 5,
@@ -341,8 +962,9 @@ class DownloadEngine:
             "http_chunk_size": self._http_chunk_size,
             "socket_timeout": self._socket_timeout,
             "progress_hooks": [self._make_progress_hook(task, cancel)],
-            "postprocessor_hooks": [self._make_pp_hook(task)],
+            "postprocessor_hooks": [self._make_pp_hook(task, cancel)],
             "noplaylist": not task.playlist_mode,
+            "lazy_playlist": task.playlist_mode,
             "windowsfilenames": self._windows_filenames,
             "restrictfilenames": self._restrict_filenames,
             "overwrites": self._overwrites,
@@ -351,92 +973,125 @@ class DownloadEngine:
         if task.cookies_path and os.path.isfile(task.cookies_path):
             opts["cookiefile"] = task.cookies_path
 
-        if task.proxy:
-            opts["proxy"] = task.proxy
+        if _route(task):
+            opts["proxy"] = _route(task)
+        if task.playlist_mode and task.playlist_items:
+            opts["playlist_items"] = task.playlist_items
         if task.speed_limit and task.speed_limit > 0:
             opts["ratelimit"] = task.speed_limit
 
-        is_audio = task.quality == QualityPreset.AUDIO_ONLY or task.format in (
-            OutputFormat.MP3, OutputFormat.OPUS, OutputFormat.FLAC, OutputFormat.WAV,
-        )
-
-        if is_audio:
-            opts.update(
-                QualityPresets.audio(
-                    codec=task.audio_codec,
-                    quality=task.audio_quality,
-                )
-            )
-        elif task.quality == QualityPreset.VIDEO_ONLY:
-            opts.update(QualityPresets.video_only())
-        elif task.quality == QualityPreset.MAXIMUM:
-            opts.update(QualityPresets.maximum())
-        elif task.quality == QualityPreset.HIGH:
-            opts.update(QualityPresets.high())
-        else:
-            opts.update(QualityPresets.balanced())
+        is_audio = is_audio_output(task.quality, task.format)
+        opts.update(preset_options(task.quality, task.format, task.audio_codec))
 
         if format_override:
             opts["format"] = format_override
 
-        postprocessors: list[dict[str, Any]] = list(opts.get("postprocessors", []))
-
         if task.thumbnail and not is_audio:
-            postprocessors.append(
-                {"key": "EmbedThumbnail", "already_have_thumbnail": False}
-            )
             opts["writethumbnail"] = True
 
-        if task.metadata:
-            postprocessors.append(
-                {"key": "FFmpegMetadata", "add_chapters": task.chapters}
-            )
-
         if task.subtitles:
             langs = [lang.strip() for lang in task.subtitle_langs.split(",") if lang.strip()]
             opts["writesubtitles"] = True
             opts["writeautomaticsub"] = True
             opts["subtitleslangs"] = langs or ["en", "en-US"]
-            postprocessors.append({"key": "FFmpegEmbedSubtitle"})
-
-        if task.sponsorblock:
-            postprocessors.append(
-                {"key": "SponsorBlock", "categories": ["sponsor", "selfpromo", "interaction"]}
-            )
-            postprocessors.append({"key": "ModifyChapters", "remove_sponsor_segments": ["sponsor"]})
 
+        container = ""
         if not is_audio and task.quality != QualityPreset.VIDEO_ONLY:
-            if task.quality == QualityPreset.MAXIMUM:
-                opts.setdefault("merge_output_format", "mkv")
-            elif task.format == OutputFormat.MKV:
-                opts["merge_output_format"] = "mkv"
-            elif task.format == OutputFormat.WEBM:
-                opts["merge_output_format"] = "webm"
-            elif task.format == OutputFormat.MP4:
-                if not opts.get("merge_output_format"):
-                    postprocessors.append(
-                        {"key": "FFmpegVideoRemuxer", "preferedformat": "mp4"}
-                    )
+            container = opts.get("merge_output_format") or ""
 
+        plan = plan_postprocessing(task, is_audio=is_audio, container=container)
+        postprocessors: list[dict[str, Any]] = list(opts.get("postprocessors", []))
+        postprocessors.extend(plan.separate)
         if postprocessors:
             opts["postprocessors"] = postprocessors
+        opts["_pp_plan"] = plan
+
+        if wants_sections(task):
+            opts["outtmpl"] = piece_template(outtmpl)
+            opts["download_ranges"] = opts["_sections"] = SectionPlan(
+                task,
+                on_note=lambda note: self._log(task.id, f"[INFO] {note}"),
+                sponsors=self._sponsors,
+            )
+        elif self._content_index is not None:
+            dedup = DedupSession(
+                self._content_index,
+                output_fingerprint(task, opts),
+                self._dedup_link,
+                on_reuse=lambda path, method, size: self._report_reuse(task, path, method, size),
+            )
+            opts["match_filter"] = dedup.match_filter
+            opts["post_hooks"] = [dedup.post_hook]
+            opts["_dedup"] = dedup
 
         return opts
 
+    def _report_pp(
+        self, task: DownloadTask, plan: PostProcessPlan, stages: list[str], saved: int,
+    ) -> None:
+        task.io_saved_bytes += saved
+        self._log(
+            task.id,
+            f"[INFO] Post-processing fused {len(stages)} stage(s) into 1 pass "
+            f"({plan.legacy_passes} → {plan.planned_passes} rewrites, "
+            f"~{format_bytes(saved)} I/O saved)",
+        )
+
+    def _report_sections(
+        self, task: DownloadTask, path: str, saved: int, kept: float, duration: float,
+    ) -> None:
+        task.output_path = path
+        if not saved:
+            return
+        task.skipped_bytes += saved
+        self._log(
+            task.id,
+            f"[INFO] Downloaded {kept / duration:.0%} of the video; "
+            f"~{format_bytes(saved)} not downloaded",
+        )
+
+    def _record_verify(self, task: DownloadTask, result: ProbeResult) -> None:
+        task.verified_files += 1
+        task.verify_seconds += result.seconds
+        if result.ok:
+            return
+        task.verify_failures += 1
+        self._log(
+            task.id,
+            f"[WARNING] Verification failed for {Path(result.path).name}: {'; '.join(result.problems)}",
+        )
+
+    def _report_reuse(self, task: DownloadTask, path: str, method: str, size: int) -> None:
+        task.output_path = path
+        task.title = Path(path).stem
+        task.reused_files += 1
+        task.reused_bytes += size
+        self._log(
+            task.id,
+            f"[INFO] Reused {Path(path).name} from the content index ({method}, "
+            f"{format_bytes(size)} not downloaded)",
+        )
+
     def _make_progress_hook(
-        self, task: DownloadTask, cancel: threading.Event,
+        self, task: DownloadTask, cancel: CancelToken,
     ) -> Callable[[dict[str, Any]], None]:
-        last_emit = {"t": 0.0}
+        last_emit = {"t": 0.0, "bytes": 0}
 
         def hook(d: dict[str, Any]) -> None:
-            if cancel.is_set():
-                raise yt_dlp.utils.DownloadError("Canceled by user")
-
             status = d.get("status", "")
+            if status == "downloading":
+                cancel.track(d.get("filename"), d.get("tmpfilename"))
+            if cancel.is_set():
+                raise yt_dlp.utils.DownloadCancelled("Canceled by user")
 
             if status == "downloading":
                 total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
                 downloaded = d.get("downloaded_bytes") or 0
+                delta = downloaded - last_emit["bytes"]
+                last_emit["bytes"] = downloaded
+                delta = delta if delta >= 0 else downloaded
+                task.transferred_bytes += delta
+                self._limiter.throttle(delta, cancel)
                 task.speed = d.get("speed") or 0
                 task.eta = d.get("eta") or 0
                 task.downloaded_bytes = downloaded
@@ -448,6 +1103,8 @@ class DownloadEngine:
                 pl_idx = info.get("playlist_index") or info.get("playlist_autonumber") or 0
                 if pl_idx:
                     task.playlist_index = int(pl_idx)
+                if info.get("thumbnail"):
+                    task.thumbnail_url = info["thumbnail"]
 
                 now = time.monotonic()
                 if now - last_emit["t"] >= 0.20:
@@ -470,13 +1127,20 @@ class DownloadEngine:
         return hook
 
     def _make_pp_hook(
-        self, task: DownloadTask,
+        self, task: DownloadTask, cancel: CancelToken,
     ) -> Callable[[dict[str, Any]], None]:
         def hook(d: dict[str, Any]) -> None:
             pp_status = d.get("status", "")
             if pp_status == "started":
                 pp = d.get("postprocessor", "unknown")
-                self._set_status(task, DownloadStatus.MERGING)
+                path = (d.get("info_dict") or {}).get("filepath")
+                if path:
+                    cancel.track(prepend_extension(path, "temp"), new_only=True)
+                    if pp in _AUDIO_PPS:
+                        cancel.track(*(replace_extension(path, ext) for ext in _AUDIO_EXTS), new_only=True)
+                self._set_status(
+                    task, DownloadStatus.VERIFYING if pp == "Verify" else DownloadStatus.MERGING,
+                )
                 self._log(task.id, f"[INFO] Post-processing: {pp}")
             elif pp_status == "finished":
                 info = d.get("info_dict") or {}
@@ -487,11 +1151,186 @@ class DownloadEngine:
 
         return hook
 
-    def _run(self, task: DownloadTask, cancel: threading.Event) -> None:
-        self._log(task.id, "[INFO] Waiting for download slot…")
-        self._semaphore.acquire()
+    def _start(self, task: DownloadTask) -> None:
+        with self._lock:
+            cancel = self._cancel_events[task.id]
+        t = threading.Thread(
+            target=self._run,
+            args=(task, cancel),
+            daemon=True,
+            name=f"dl-{task.id}",
+        )
+        with self._lock:
+            self._threads[task.id] = t
+        if self._queue_hold:
+            cancel.pause()
+        t.start()
+
+    def _run(self, task: DownloadTask, cancel: CancelToken) -> None:
+        before = (task.verified_files, task.verify_seconds)
+        try:
+            if self._process_pool is not None:
+                self._process_pool.execute(self, task, cancel)
+            else:
+                self._execute(task, cancel)
+        finally:
+            totals = self._verify_totals
+            totals["files"] += task.verified_files - before[0]
+            totals["seconds"] += task.verify_seconds - before[1]
+            totals["failed"] += task.verify_failures
+            if task.status is DownloadStatus.PAUSED:
+                self._scheduler.finish(task.id)
+                self._park(task, cancel)
+                if not cancel.is_set() or cancel.paused == "offline":
+                    self._pause_for_outage(task)
+            elif task.status is DownloadStatus.WAITING and not cancel.is_set():
+                totals["requeued"] += 1
+                self._scheduler.finish(task.id)
+                self._scheduler.submit(task)
+            else:
+                self._release(task)
+                self._scheduler.finish(task.id)
+                if cancel.is_set():
+                    self._record_cancel(task, cancel)
+
+    def _record_cancel(self, task: DownloadTask, cancel: CancelToken) -> None:
+        task.cancel_latency = cancel.elapsed
+        phase = cancel.phase or "unknown"
+        with self._lock:
+            totals = self._cancel_totals.setdefault(phase, {"count": 0, "seconds": 0.0, "max": 0.0})
+            totals["count"] += 1
+            totals["seconds"] += task.cancel_latency
+            totals["max"] = max(totals["max"], task.cancel_latency)
+        self._log(
+            task.id,
+            f"[INFO] Cancel took effect in {task.cancel_latency * 1000:.0f} ms ({phase})",
+        )
+
+    def _hold_reason(self, task: DownloadTask) -> str:
+        parts = []
+        if task.not_before > time.time():
+            parts.append(f"not before {time.strftime('%Y-%m-%d %H:%M', time.localtime(task.not_before))}")
+        if task.window:
+            parts.append(f"in the '{task.window}' window")
+        return "held until " + " and ".join(parts)
 
+    def _park(self, task: DownloadTask, cancel: CancelToken | None = None) -> None:
+        with self._lock:
+            if cancel is not None:
+                fresh = CancelToken()
+                fresh.files = cancel.files
+                self._cancel_events[task.id] = fresh
+                self._threads.pop(task.id, None)
+            self._paused[task.id] = task
+        task.speed = 0
+        task.eta = 0
+        if task.status is not DownloadStatus.PAUSED:
+            self._set_status(task, DownloadStatus.PAUSED)
+            self._log(task.id, "[INFO] Paused")
+        self._emit_progress(task)
+
+    def _unpark(self, task_id: str) -> DownloadTask | None:
+        with self._lock:
+            return self._paused.pop(task_id, None)
+
+    def _pause_for_outage(self, task: DownloadTask) -> None:
+        if self._queue_hold:
+            return
+        self._log(task.id, "[WARNING] Network unreachable; pausing the queue until it is back")
+        self.pause_all("offline")
+        threading.Thread(
+            target=self._watch_connectivity,
+            args=(_route(task) or task.url,),
+            daemon=True,
+            name="connectivity",
+        ).start()
+
+    def _watch_connectivity(self, url: str) -> None:
+        while self._queue_hold == "offline" and not self._closing.wait(_CONNECTIVITY_POLL):
+            if is_online(url):
+                if self._queue_hold == "offline":
+                    logger.info("Network is back; resuming the queue")
+                    self.resume_all()
+                return
+
+    def _offline(self, task: DownloadTask, cancel: CancelToken, result: bool | None) -> bool:
+        return result is False and not cancel.is_set() and not is_online(_route(task) or task.url)
+
+    def _release_held(self, task: DownloadTask) -> None:
+        if self._queue_hold:
+            self._park(task)
+            return
+        task.status = DownloadStatus.WAITING
+        self._log(task.id, "[INFO] Schedule window open; waiting for download slot…")
+        self._emit_progress(task)
+        self._scheduler.submit(task)
+
+    def _apply_profile(self, profile: TimeProfile | None) -> None:
+        limit = profile.slots if profile is not None and profile.slots else self._max_concurrent
+        self._scheduler.set_limit(limit)
+        self.set_rate_limit(profile.rate if profile is not None else 0)
+        logger.info("Schedule profile: %s", describe_profile(profile, self._max_concurrent))
+
+    def _finish_pending(self, task: DownloadTask) -> None:
+        with self._lock:
+            cancel = self._cancel_events.get(task.id)
+        task.completed_at = time.time()
+        task.speed = 0
+        self._set_status(task, DownloadStatus.CANCELED)
+        self._log(task.id, "[WARNING] Download canceled")
+        if cancel is not None:
+            self._remove_partials(task, cancel)
+        self._emit_progress(task)
+        self._release(task)
+        if cancel is not None and cancel.is_set():
+            self._record_cancel(task, cancel)
+
+    def _flight_key(self, task: DownloadTask) -> str:
+        fingerprint = output_fingerprint(task, preset_options(task.quality, task.format, task.audio_codec))
+        return "|".join((
+            canonical_id(task.url, task.playlist_mode),
+            os.path.abspath(task.output_dir),
+            task.playlist_items if task.playlist_mode else "",
+            task.quality.value,
+            task.format.value,
+            fingerprint,
+        ))
+
+    def _land(self, task: DownloadTask) -> None:
+        if task.status is DownloadStatus.CANCELED:
+            successor = self._flights.hand_over(task.id)
+            if successor is None:
+                return
+            successor.shared_with = ""
+            for follower in self._flights.followers(successor.id):
+                follower.shared_with = successor.id
+            self._log(successor.id, f"[INFO] Task {task.id} was canceled; downloading here instead")
+            self._admit(successor)
+            return
+        for follower in self._flights.land(task.id):
+            for name in (*_SHARED_FIELDS, *_RESULT_FIELDS):
+                setattr(follower, name, getattr(task, name))
+            self._set_status(follower, task.status)
+            self._log(follower.id, f"[INFO] Shared download from task {task.id} {task.status.value}")
+            self._emit_progress(follower)
+            self._release(follower)
+
+    def _release(self, task: DownloadTask) -> None:
+        self._land(task)
+        with self._lock:
+            self._cancel_events.pop(task.id, None)
+            self._threads.pop(task.id, None)
+            self._tasks.pop(task.id, None)
+        if self._on_finished:
+            self._on_finished(task)
+
+    def _execute(self, task: DownloadTask, cancel: CancelToken) -> None:
+        with cancel.bind():
+            self._execute_bound(task, cancel)
+
+    def _execute_bound(self, task: DownloadTask, cancel: CancelToken) -> None:
         task.started_at = time.time()
+        task.verify_failures = 0
         self._set_status(task, DownloadStatus.DOWNLOADING)
         self._log(task.id, f"[INFO] Starting download: {task.url}")
         self._log(
@@ -500,41 +1339,48 @@ class DownloadEngine:
             + (f" | Proxy: {task.proxy}" if task.proxy else ""),
         )
 
-        is_audio = task.quality == QualityPreset.AUDIO_ONLY or task.format in (
-            OutputFormat.MP3, OutputFormat.OPUS, OutputFormat.FLAC, OutputFormat.WAV,
-        )
+        is_audio = is_audio_output(task.quality, task.format)
         fallback_chain = _FALLBACK_FORMATS_AUDIO if is_audio else _FALLBACK_FORMATS_VIDEO
+        result: bool | None = False
+        lease: dict[str, Any] = {"tried": set()}
 
         try:
-            try:
-                opts0 = {
-                    "quiet": True, "no_warnings": True,
-                    "extract_flat": "in_playlist",
-                    "socket_timeout": self._socket_timeout,
-                }
-                if task.cookies_path and os.path.isfile(task.cookies_path):
-                    opts0["cookiefile"] = task.cookies_path
-                if task.proxy:
-                    opts0["proxy"] = task.proxy
-
-                with yt_dlp.YoutubeDL(opts0) as ydl0:
-                    info0 = ydl0.extract_info(task.url, download=False)
-                if info0:
-                    task.title = info0.get("title") or task.title
-                    if "entries" in info0:
-                        entries = list(info0.get("entries") or [])
-                        task.playlist_total = len(entries)
-                    self._emit_progress(task)
-            except Exception:
-                pass
+            self._lease_proxy(task, cancel, lease)
+            self._preflight(task, cancel)
+
+            table = None if task.playlist_mode else self.format_table(task.url)
+            tried: set[tuple[int, ...]] = set()
+            if table is not None:
+                picks = self._expected_streams(task, table)
+                if picks is not None:
+                    tried.add(picks)
+                    size = sum(table.size[i] for i in picks)
+                    self._log(
+                        task.id,
+                        "[INFO] Expected streams: "
+                        + " + ".join(table.label(i) for i in picks)
+                        + (f" (~{format_bytes(size)})" if size else ""),
+                    )
 
             result = self._attempt_download(task, cancel, format_override=None)
             success = result is True
+            offline = self._offline(task, cancel, result)
 
-            if result is False and not cancel.is_set():
+            if result is False and not cancel.is_set() and not offline:
                 for idx, fmt in enumerate(fallback_chain, start=1):
                     if cancel.is_set():
                         break
+                    if table is not None:
+                        picks = self._expected_streams(task, table, fmt)
+                        if picks is not None and picks in tried:
+                            self._log(
+                                task.id,
+                                f"[INFO] Skipping fallback strategy {idx}/{len(fallback_chain)}: "
+                                "it selects the same streams",
+                            )
+                            continue
+                        if picks is not None:
+                            tried.add(picks)
                     task.retries_used += 1
                     self._log(
                         task.id,
@@ -543,21 +1389,55 @@ class DownloadEngine:
                     task.progress = 0
                     task.downloaded_bytes = 0
                     self._emit_progress(task)
+                    if task.leased_proxy:
+                        self._return_proxy(task, lease, _proxy_outcome(task.error))
+                        self._lease_proxy(task, cancel, lease)
 
                     result = self._attempt_download(task, cancel, format_override=fmt)
                     success = result is True
                     if result is True or result is None:
                         break
+                    if self._offline(task, cancel, result):
+                        offline = True
+                        break
 
             if cancel.is_set():
-                self._set_status(task, DownloadStatus.CANCELED)
-                self._log(task.id, "[WARNING] Download canceled")
+                self._finish_canceled(task, cancel)
+            elif offline:
+                task.speed = 0
+                self._set_status(task, DownloadStatus.PAUSED)
+                self._log(
+                    task.id,
+                    f"[WARNING] Network unreachable; paused at {format_bytes(task.downloaded_bytes)}"
+                    "; partial data kept for resume",
+                )
+            elif success and task.verify_failures:
+                if task.requeues < _MAX_VERIFY_REQUEUES:
+                    task.requeues += 1
+                    task.progress = 0
+                    task.downloaded_bytes = 0
+                    self._log(
+                        task.id,
+                        f"[WARNING] {task.verify_failures} file(s) failed verification; "
+                        f"requeued ({task.requeues}/{_MAX_VERIFY_REQUEUES})",
+                    )
+                    self._set_status(task, DownloadStatus.WAITING)
+                else:
+                    task.error = f"{task.verify_failures} file(s) failed verification"
+                    self._set_status(task, DownloadStatus.FAILED)
+                    self._log(task.id, f"[ERROR] {task.error}")
             elif success:
                 task.progress = 100
                 task.completed_at = time.time()
                 elapsed = task.completed_at - task.started_at
                 self._set_status(task, DownloadStatus.COMPLETED)
                 self._log(task.id, f"[SUCCESS] Completed in {elapsed:.1f}s")
+                if task.verified_files:
+                    self._log(
+                        task.id,
+                        f"[INFO] Verified {task.verified_files} file(s) in {task.verify_seconds:.2f}s",
+                    )
+                self._log(task.id, f"[INFO] Connection pool: {self._http_pool.summary()}")
             else:
                 if not task.error:
                     task.error = "All download strategies failed"
@@ -566,8 +1446,7 @@ class DownloadEngine:
 
         except Exception as exc:
             if cancel.is_set():
-                self._set_status(task, DownloadStatus.CANCELED)
-                self._log(task.id, "[WARNING] Download canceled")
+                self._finish_canceled(task, cancel)
             else:
                 task.error = str(exc)
                 self._set_status(task, DownloadStatus.FAILED)
@@ -575,17 +1454,133 @@ class DownloadEngine:
                 logger.exception("Download failed for %s", task.url)
 
         finally:
-            task.completed_at = task.completed_at or time.time()
+            if task.leased_proxy:
+                if cancel.is_set() or task.status is DownloadStatus.PAUSED:
+                    outcome = "aborted"
+                else:
+                    outcome = "ok" if result is not False else _proxy_outcome(task.error)
+                self._return_proxy(task, lease, outcome)
+            if task.status not in (DownloadStatus.WAITING, DownloadStatus.PAUSED):
+                task.completed_at = task.completed_at or time.time()
             self._emit_progress(task)
-            with self._lock:
-                self._cancel_events.pop(task.id, None)
-                self._threads.pop(task.id, None)
-            self._semaphore.release()
+
+    def _lease_proxy(self, task: DownloadTask, cancel: CancelToken, lease: dict[str, Any]) -> None:
+        if task.proxy or not self._proxies.enabled:
+            return
+        t0 = time.monotonic()
+        url = self._proxies.lease(lease["tried"], cancel)
+        if not url:
+            return
+        task.leased_proxy = url
+        lease["tried"].add(url)
+        lease["bytes"] = task.transferred_bytes
+        lease["t"] = time.monotonic()
+        waited = lease["t"] - t0
+        self._log(
+            task.id,
+            f"[INFO] Proxy: {redact(url)}" + (f" (waited {waited:.1f}s)" if waited >= 1 else ""),
+        )
+
+    def _return_proxy(self, task: DownloadTask, lease: dict[str, Any], outcome: str) -> None:
+        self._proxies.release(
+            task.leased_proxy,
+            task.transferred_bytes - lease["bytes"],
+            time.monotonic() - lease["t"],
+            outcome,
+        )
+        task.leased_proxy = ""
+
+    def _finish_canceled(self, task: DownloadTask, cancel: CancelToken) -> None:
+        if cancel.paused:
+            task.speed = 0
+            self._set_status(task, DownloadStatus.PAUSED)
+            self._log(
+                task.id,
+                ("[WARNING] Network unreachable; paused" if cancel.paused == "offline" else "[INFO] Paused")
+                + f" at {format_bytes(task.downloaded_bytes)}; partial data kept for resume",
+            )
+            return
+        self._set_status(task, DownloadStatus.CANCELED)
+        self._log(task.id, "[WARNING] Download canceled")
+        self._remove_partials(task, cancel)
+
+    def _remove_partials(self, task: DownloadTask, cancel: CancelToken) -> None:
+        if self._cancel_cleanup != "delete" or not cancel.files:
+            return
+        removed, freed = remove_partials(cancel.files)
+        if removed:
+            self._log(task.id, f"[INFO] Removed {removed} partial file(s) ({format_bytes(freed)})")
+
+    def _preflight(self, task: DownloadTask, cancel: CancelToken) -> None:
+        if cancel.is_set():
+            return
+        cancel.stage = "extracting"
+        ydl = self._ydl_pool.acquire(
+            self._probe_opts(task.cookies_path, _route(task), noplaylist=not task.playlist_mode)
+        )
+        try:
+            with cancel.on_cancel(functools.partial(interrupt, ydl)):
+                info = self._extract_lazy(ydl, task.url)
+        except Exception:
+            self._ydl_pool.release(ydl, reuse=False)
+            return
+
+        if info:
+            task.title = info.get("title") or task.title
+            task.thumbnail_url = thumbnail_url(info) or task.thumbnail_url
+            self._emit_progress(task)
+            if info.get("formats") and self.format_table(task.url) is None:
+                self._cache_formats(FormatTable.from_info(info), task.url, info.get("webpage_url"))
+        if not info or info.get("_type") != "playlist":
+            self._ydl_pool.release(ydl)
+            return
+
+        threading.Thread(
+            target=self._count_entries,
+            args=(task, cancel, ydl, info),
+            daemon=True,
+            name=f"count-{task.id}",
+        ).start()
+
+    def _count_entries(
+        self,
+        task: DownloadTask,
+        cancel: CancelToken,
+        ydl: yt_dlp.YoutubeDL,
+        info: dict[str, Any],
+    ) -> None:
+        last_emit = 0.0
+        count = 0
+        batch: list[dict[str, Any]] = []
+        try:
+            with cancel.on_cancel(functools.partial(interrupt, ydl)):
+                for entry in iter_entries(info, task.playlist_items, cancel):
+                    if task.completed_at:
+                        return
+                    if task.sponsorblock:
+                        batch.append(entry)
+                        if len(batch) >= _SPONSOR_BATCH:
+                            self.prefetch_sponsors(batch)
+                            batch.clear()
+                    count += 1
+                    task.playlist_total = max(task.playlist_total, count)
+                    now = time.monotonic()
+                    if now - last_emit >= _COUNT_EMIT_INTERVAL:
+                        last_emit = now
+                        self._emit_progress(task)
+            if batch:
+                self.prefetch_sponsors(batch)
+            if not task.completed_at:
+                self._emit_progress(task)
+        except Exception as exc:
+            logger.debug("Playlist count stopped for %s: %s", task.url, exc)
+        finally:
+            self._ydl_pool.release(ydl, reuse=False)
 
     def _attempt_download(
         self,
         task: DownloadTask,
-        cancel: threading.Event,
+        cancel: CancelToken,
         *,
         format_override: str | None,
     ) -> bool | None:
@@ -594,20 +1589,57 @@ class DownloadEngine:
         try:
             opts = self._build_opts(task, cancel, format_override=format_override)
             ytdlp_logger: _YtdlpLogger = opts["logger"]
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                exit_code = ydl.download([task.url])
+            plan: PostProcessPlan = opts["_pp_plan"]
+            with self._ydl_pool.session(opts) as ydl:
+                if "_dedup" in opts:
+                    opts["_dedup"].attach(ydl)
+                if self._thumbnails is not None and opts.get("writethumbnail"):
+                    ydl.add_post_processor(CachedThumbnailPP(ydl, self._thumbnails), when="video")
+                if self._probe_pool is not None and self._probe_pool.available:
+                    is_audio = is_audio_output(task.quality, task.format)
+                    ydl.add_post_processor(
+                        VerifyPP(
+                            self._probe_pool,
+                            video=not is_audio,
+                            audio=task.quality != QualityPreset.VIDEO_ONLY,
+                            on_result=lambda result: self._record_verify(task, result),
+                        ),
+                        when="after_move",
+                    )
+                plan.attach(
+                    ydl,
+                    on_report=lambda stages, saved: self._report_pp(task, plan, stages, saved),
+                    on_note=lambda note: self._log(task.id, f"[INFO] {note}"),
+                    sponsors=self._sponsors,
+                )
+                if "_sections" in opts:
+                    ydl.add_post_processor(
+                        JoinSectionsPP(
+                            ydl,
+                            opts["_sections"],
+                            on_joined=lambda path, saved, kept, duration: self._report_sections(
+                                task, path, saved, kept, duration,
+                            ),
+                            on_note=lambda note: self._log(task.id, f"[INFO] {note}"),
+                        ),
+                        when="after_video",
+                    )
+                cancel.stage = ""
+                with cancel.on_cancel(functools.partial(interrupt, ydl)):
+                    exit_code = ydl.download([task.url])
             if exit_code == 0:
                 task.error = ""
                 return True
 
-            if task.output_path:
+            if task.output_path or task.verify_failures:
                 task.error = ""
                 return True
 
             combined = " ".join(ytdlp_logger.errors)
 
             non_retryable = ("Video unavailable", "Private video", "This video is not available",
-                             "copyright", "has been removed", "is not available in your country")
+                             "copyright", "has been removed", "is not available in your country",
+                             NO_SECTIONS, "downloading the video partially", "cannot be partially downloaded")
             if any(p.lower() in combined.lower() for p in non_retryable):
                 task.error = combined[:300] or "Download failed"
                 return None
@@ -631,6 +1663,7 @@ class DownloadEngine:
                                   "urlopen error", "timed out", "Connection reset",
                                   "Incomplete data", "Got server HTTP error")
             if any(p in msg for p in retryable_patterns):
+                task.error = msg[:300]
                 self._log(task.id, f"[WARNING] Retryable error: {msg[:200]}")
                 return False
 
@@ -645,3 +1678,77 @@ class DownloadEngine:
             self._log(task.id, f"[ERROR] {exc}")
             logger.exception("Attempt failed for %s", task.url)
             return None
+
+def engine_from_settings(
+    settings: AppSettings,
+    *,
+    on_progress: ProgressCallback | None = None,
+    on_status_change: StatusCallback | None = None,
+    on_log: LogCallback | None = None,
+    on_finished: FinishedCallback | None = None,
+) -> DownloadEngine:
+    engine = DownloadEngine(
+        max_concurrent=settings.max_concurrent,
+        concurrent_fragments=settings.concurrent_fragments,
+        max_retries=settings.max_retries,
+        fragment_retries=settings.fragment_retries,
+        http_chunk_size=settings.http_chunk_size,
+        buffer_size=settings.buffer_size,
+        socket_timeout=settings.socket_timeout,
+        max_connections_per_host=settings.max_connections_per_host,
+        process_mode=settings.process_mode,
+        content_index=str(CONTENT_INDEX_FILE) if settings.dedup_enabled else "",
+        dedup_link=settings.dedup_link,
+        verify=settings.verify_downloads,
+        verify_workers=settings.verify_workers,
+        cancel_cleanup=settings.cancel_cleanup,
+        proxy_pool=settings.proxy_pool,
+        proxy_limit=settings.proxy_limit,
+        proxy_cooldown=settings.proxy_cooldown,
+        sponsor_cache=str(SPONSOR_CACHE_FILE),
+        sponsor_api=settings.sponsor_api,
+        sponsor_ttl=settings.sponsor_cache_hours * 3600,
+        sponsor_offline=settings.sponsor_offline,
+        thumbnail_cache=str(THUMBNAIL_DIR),
+        thumbnail_cache_mb=settings.thumbnail_cache_mb,
+        profiles=profiles_from_settings(settings.schedule_profiles) if settings.schedule_enabled else None,
+        on_progress=on_progress,
+        on_status_change=on_status_change,
+        on_log=on_log,
+        on_finished=on_finished,
+    )
+    engine._windows_filenames = settings.windows_filenames
+    engine._restrict_filenames = settings.restrict_filenames
+    engine._overwrites = settings.overwrites
+    return engine
+
+def reconfigure_from_settings(engine: DownloadEngine, settings: AppSettings) -> bool:
+    engine.reconfigure(
+        max_concurrent=settings.max_concurrent,
+        concurrent_fragments=settings.concurrent_fragments,
+        max_retries=settings.max_retries,
+        fragment_retries=settings.fragment_retries,
+        http_chunk_size=settings.http_chunk_size,
+        buffer_size=settings.buffer_size,
+        socket_timeout=settings.socket_timeout,
+        max_connections_per_host=settings.max_connections_per_host,
+        dedup_link=settings.dedup_link,
+        windows_filenames=settings.windows_filenames,
+        restrict_filenames=settings.restrict_filenames,
+        overwrites=settings.overwrites,
+        cancel_cleanup=settings.cancel_cleanup,
+        proxy_pool=settings.proxy_pool,
+        proxy_limit=settings.proxy_limit,
+        proxy_cooldown=settings.proxy_cooldown,
+        sponsor_api=settings.sponsor_api,
+        sponsor_ttl=settings.sponsor_cache_hours * 3600,
+        sponsor_offline=settings.sponsor_offline,
+        thumbnail_cache_mb=settings.thumbnail_cache_mb,
+        profiles=profiles_from_settings(settings.schedule_profiles) if settings.schedule_enabled else [],
+    )
+    return (
+        (engine._process_pool is not None) == settings.process_mode
+        and bool(engine._content_index_path) == settings.dedup_enabled
+        and engine._verify == settings.verify_downloads
+        and (not engine._verify or engine._verify_workers == settings.verify_workers)
+    )
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import functools
+import threading
+import urllib.parse
+
+from yt_dlp.extractor import gen_extractor_classes
+
+from .models import DownloadTask
+
+_PLAYLIST_PARAMS = frozenset({"list", "index"})
+
+@functools.cache
+def _extractors() -> tuple[type, ...]:
+    return tuple(ie for ie in gen_extractor_classes() if ie.ie_key() != "Generic")
+
+@functools.cache
+def warm_extractors() -> None:
+    for ie in _extractors():
+        ie.suitable("")
+
+def _match(url: str) -> type | None:
+    for ie in _extractors():
+        if ie.suitable(url):
+            return ie
+    return None
+
+def _strip_playlist(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query) if k not in _PLAYLIST_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+@functools.lru_cache(maxsize=1024)
+def canonical_id(url: str, playlist: bool = False) -> str:
+    url = url.strip()
+    ie = _match(url)
+    if ie is not None and not playlist and ie.ie_key().startswith("Youtube"):
+        stripped = _strip_playlist(url)
+        if stripped != url:
+            url, ie = stripped, _match(stripped) or ie
+    if ie is not None:
+        temp_id = ie.get_temp_id(url)
+        if temp_id:
+            return f"{ie.ie_key()}:{temp_id}"
+    return f"url:{url}"
+
+class FlightTable:
+
+    def __init__(self) -> None:
+        self._leaders: dict[str, str] = {}
+        self._keys: dict[str, str] = {}
+        self._followers: dict[str, list[DownloadTask]] = {}
+        self._leader_of: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key: str, task: DownloadTask) -> str | None:
+        with self._lock:
+            leader_id = self._leaders.get(key)
+            if leader_id is None or leader_id == task.id:
+                self._leaders[key] = task.id
+                self._keys[task.id] = key
+                return None
+            self._followers.setdefault(leader_id, []).append(task)
+            self._leader_of[task.id] = leader_id
+            self.coalesced += 1
+            return leader_id
+
+    def followers(self, leader_id: str) -> list[DownloadTask]:
+        with self._lock:
+            return list(self._followers.get(leader_id, ()))
+
+    def leave(self, task_id: str) -> DownloadTask | None:
+        with self._lock:
+            leader_id = self._leader_of.pop(task_id, None)
+            if leader_id is None:
+                return None
+            followers = self._followers[leader_id]
+            task = next(t for t in followers if t.id == task_id)
+            followers.remove(task)
+            if not followers:
+                del self._followers[leader_id]
+            return task
+
+    def leave_all(self) -> list[DownloadTask]:
+        with self._lock:
+            tasks = [t for followers in self._followers.values() for t in followers]
+            self._followers.clear()
+            self._leader_of.clear()
+        return tasks
+
+    def land(self, leader_id: str) -> list[DownloadTask]:
+        with self._lock:
+            key = self._keys.pop(leader_id, None)
+            if key is not None and self._leaders.get(key) == leader_id:
+                del self._leaders[key]
+            followers = self._followers.pop(leader_id, [])
+            for task in followers:
+                self._leader_of.pop(task.id, None)
+        return followers
+
+    def hand_over(self, leader_id: str) -> DownloadTask | None:
+        with self._lock:
+            key = self._keys.pop(leader_id, None)
+            followers = self._followers.pop(leader_id, [])
+            if key is None or not followers:
+                if key is not None and self._leaders.get(key) == leader_id:
+                    del self._leaders[key]
+                return None
+            successor, rest = followers[0], followers[1:]
+            self._leader_of.pop(successor.id, None)
+            self._leaders[key] = successor.id
+            self._keys[successor.id] = key
+            if rest:
+                self._followers[successor.id] = rest
+                for task in rest:
+                    self._leader_of[task.id] = successor.id
+        return successor
+
+    @property
+    def attached_count(self) -> int:
+        with self._lock:
+            return len(self._leader_of)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._leaders),
+                "attached": len(self._leader_of),
+                "coalesced": self.coalesced,
+            }
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import operator
+import re
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+from .postprocess import normalize_codec
+
+_VIDEO = 1
+_AUDIO = 2
+_EXACT_SIZE = 4
+
+_DYNAMIC_RANGES = ("SDR", "HLG", "HDR10", "HDR10+", "HDR12", "DV")
+_HDR_NAMES = frozenset({"hlg", "hdr10", "hdr10+", "hdr12", "hdr", "dv"})
+_VCODEC_ORDER = ("av1", "vp9.2", "vp9", "hevc", "h264", "vp8")
+_ACODEC_ORDER = ("flac", "alac", "wav", "opus", "vorbis", "aac", "mp3", "eac3", "ac3")
+_DEFAULT_SORT = ("res", "fps", "hdr:12", "vcodec", "acodec", "size", "tbr")
+_SORT_ALIASES = {"codec": "vcodec", "br": "tbr", "filesize": "size", "fs": "size"}
+
+_ATOM_RE = re.compile(r"^(bv\*|bestvideo\*|bv|bestvideo|ba|bestaudio|b|best)((?:\[[^\]]+\])*)$")
+_FILTER_RE = re.compile(r"\[(\w+)\s*(<=|>=|!=|\^=|\$=|\*=|=|<|>)\s*([^\]]+)\]")
+_NUMERIC_OPS: dict[str, Callable[[float, float], bool]] = {
+    "<=": operator.le, ">=": operator.ge, "<": operator.lt, ">": operator.gt,
+    "=": operator.eq, "!=": operator.ne,
+}
+_STRING_OPS: dict[str, Callable[[str, str], bool]] = {
+    "=": operator.eq, "!=": operator.ne,
+    "^=": str.startswith, "$=": str.endswith, "*=": operator.contains,
+}
+
+def _num(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _vcodec_name(raw: str) -> str:
+    lower = raw.lower()
+    if lower.startswith(("vp09.02", "vp9.2")):
+        return "vp9.2"
+    return normalize_codec(raw)
+
+def _rank(name: str, order: Sequence[str]) -> int:
+    return len(order) - order.index(name) if name in order else 0
+
+def _limited(value: float, limit: float) -> tuple[bool, float]:
+    return (value <= limit, value if value <= limit else -value)
+
+class FormatTable:
+
+    __slots__ = (
+        "ids", "_pool", "_pool_index", "kind", "ext", "vcodec", "acodec",
+        "height", "fps", "dynamic_range", "vbr", "abr", "tbr", "size",
+        "resolutions", "max_height", "max_fps", "has_hdr", "max_size", "duration",
+    )
+
+    def __init__(self, formats: Iterable[dict[str, Any]], duration: float = 0.0) -> None:
+        self.ids: list[str] = []
+        self._pool: list[str] = [""]
+        self._pool_index: dict[str, int] = {"": 0}
+        self.kind = array("B")
+        self.ext = array("H")
+        self.vcodec = array("H")
+        self.acodec = array("H")
+        self.height = array("H")
+        self.fps = array("f")
+        self.dynamic_range = array("B")
+        self.vbr = array("f")
+        self.abr = array("f")
+        self.tbr = array("f")
+        self.size = array("q")
+        self.duration = duration
+        self.max_height = 0
+        self.max_fps = 0
+        self.has_hdr = False
+        self.max_size = 0
+
+        heights: set[int] = set()
+        for f in formats:
+            vcodec = f.get("vcodec")
+            acodec = f.get("acodec")
+            kind = (_VIDEO if vcodec != "none" else 0) | (_AUDIO if acodec != "none" else 0)
+            height = int(_num(f.get("height")))
+            fps = _num(f.get("fps"))
+            tbr = _num(f.get("tbr"))
+            size = int(_num(f.get("filesize")))
+            if size:
+                kind |= _EXACT_SIZE
+            else:
+                size = int(_num(f.get("filesize_approx"))) or int(tbr * duration * 125)
+            dynamic_range = (f.get("dynamic_range") or "SDR").upper()
+
+            self.ids.append(str(f.get("format_id") or len(self.ids)))
+            self.kind.append(kind)
+            self.ext.append(self._intern(f.get("ext") or ""))
+            self.vcodec.append(self._intern(vcodec or ""))
+            self.acodec.append(self._intern(acodec or ""))
+            self.height.append(min(height, 0xFFFF))
+            self.fps.append(fps)
+            self.dynamic_range.append(
+                _DYNAMIC_RANGES.index(dynamic_range) if dynamic_range in _DYNAMIC_RANGES else 0,
+            )
+            self.vbr.append(_num(f.get("vbr")))
+            self.abr.append(_num(f.get("abr")))
+            self.tbr.append(tbr)
+            self.size.append(size)
+
+            if height:
+                heights.add(height)
+            if fps > self.max_fps:
+                self.max_fps = int(fps)
+            if dynamic_range.lower() in _HDR_NAMES:
+                self.has_hdr = True
+            if size > self.max_size:
+                self.max_size = size
+
+        self.resolutions = sorted(heights, reverse=True)
+        self.max_height = self.resolutions[0] if self.resolutions else 0
+
+    @classmethod
+    def from_info(cls, info: dict[str, Any]) -> FormatTable:
+        return cls(info.get("formats") or (), _num(info.get("duration")))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _intern(self, value: str) -> int:
+        code = self._pool_index.get(value)
+        if code is None:
+            code = self._pool_index[value] = len(self._pool)
+            self._pool.append(value)
+        return code
+
+    def has_video(self, i: int) -> bool:
+        return bool(self.kind[i] & _VIDEO)
+
+    def has_audio(self, i: int) -> bool:
+        return bool(self.kind[i] & _AUDIO)
+
+    def exact_size(self, i: int) -> bool:
+        return bool(self.kind[i] & _EXACT_SIZE)
+
+    def ext_of(self, i: int) -> str:
+        return self._pool[self.ext[i]]
+
+    def vcodec_of(self, i: int) -> str:
+        return self._pool[self.vcodec[i]] if self.has_video(i) else "none"
+
+    def acodec_of(self, i: int) -> str:
+        return self._pool[self.acodec[i]] if self.has_audio(i) else "none"
+
+    def bitrate(self, i: int) -> float:
+        return self.tbr[i] or (self.vbr[i] + self.abr[i])
+
+    def index(self, format_id: str) -> int | None:
+        try:
+            return self.ids.index(format_id)
+        except ValueError:
+            return None
+
+    def label(self, i: int) -> str:
+        parts = [self.ids[i]]
+        if self.has_video(i):
+            if self.height[i]:
+                parts.append(f"{self.height[i]}p" + (f"{self.fps[i]:.0f}" if self.fps[i] > 30 else ""))
+            if self.dynamic_range[i]:
+                parts.append(_DYNAMIC_RANGES[self.dynamic_range[i]])
+            parts.append(_vcodec_name(self.vcodec_of(i)))
+        if self.has_audio(i):
+            parts.append(normalize_codec(self.acodec_of(i)))
+        parts.append(self.ext_of(i))
+        return " ".join(p for p in parts if p)
+
+    def resolve(self, selector: str, sort: Sequence[str] = ()) -> tuple[int, ...] | None:
+        key = self._sort_key(sort)
+        for alternative in selector.split("/"):
+            picks: list[int] = []
+            for atom in alternative.split("+"):
+                best = self._best(atom.strip(), key)
+                if best is None:
+                    break
+                picks.append(best)
+            else:
+                if picks:
+                    return tuple(picks)
+        return None
+
+    def _best(self, atom: str, key: Callable[[int], tuple]) -> int | None:
+        match = _ATOM_RE.match(atom)
+        if match is None:
+            return None
+        name, filters = match.groups()
+        if name in ("bv", "bestvideo"):
+            wanted: Callable[[int], bool] = lambda i: self.kind[i] & 3 == _VIDEO
+        elif name in ("bv*", "bestvideo*"):
+            wanted = lambda i: bool(self.kind[i] & _VIDEO)
+        elif name in ("ba", "bestaudio"):
+            wanted = lambda i: self.kind[i] & 3 == _AUDIO
+        else:
+            wanted = lambda i: self.kind[i] & 3 == 3
+        tests = [self._filter(*f) for f in _FILTER_RE.findall(filters)]
+        rows = [i for i in range(len(self.ids)) if wanted(i) and all(t(i) for t in tests)]
+        if not rows and name in ("b", "best") and self._incomplete():
+            rows = [i for i in range(len(self.ids)) if self.kind[i] & 3 and all(t(i) for t in tests)]
+        return max(rows, key=key) if rows else None
+
+    def _incomplete(self) -> bool:
+        return not any(k & _VIDEO for k in self.kind) or not any(k & _AUDIO for k in self.kind)
+
+    def _filter(self, field: str, op: str, value: str) -> Callable[[int], bool]:
+        value = value.strip()
+        columns: dict[str, array] = {
+            "height": self.height, "fps": self.fps, "vbr": self.vbr, "abr": self.abr,
+            "tbr": self.tbr, "filesize": self.size,
+        }
+        if field in columns and op in _NUMERIC_OPS:
+            column, compare, limit = columns[field], _NUMERIC_OPS[op], _num(value)
+            return lambda i: bool(column[i]) and compare(column[i], limit)
+        strings = {"ext": self.ext, "vcodec": self.vcodec, "acodec": self.acodec}
+        if field in strings and op in _STRING_OPS:
+            column, test = strings[field], _STRING_OPS[op]
+            return lambda i: test(self._pool[column[i]], value)
+        return lambda i: False
+
+    def _sort_key(self, sort: Sequence[str]) -> Callable[[int], tuple]:
+        fields: dict[str, str] = {}
+        for token in (*sort, *_DEFAULT_SORT):
+            name, _, limit = token.partition(":")
+            fields.setdefault(_SORT_ALIASES.get(name, name), limit)
+        vranks = [_rank(_vcodec_name(c), _VCODEC_ORDER) for c in self._pool]
+        aranks = [_rank(normalize_codec(c), _ACODEC_ORDER) for c in self._pool]
+        vcap = _rank(_vcodec_name(fields.get("vcodec", "")), _VCODEC_ORDER) or len(_VCODEC_ORDER)
+        acap = _rank(normalize_codec(fields.get("acodec", "")), _ACODEC_ORDER) or len(_ACODEC_ORDER)
+
+        getters: list[Callable[[int], Any]] = []
+        for name, limit in fields.items():
+            if name == "res":
+                cap = _num(limit) or float("inf")
+                getters.append(lambda i, cap=cap: _limited(self.height[i], cap))
+            elif name == "fps":
+                getters.append(lambda i: self.fps[i])
+            elif name == "hdr":
+                top = _DYNAMIC_RANGES.index("HDR12") if limit == "12" else len(_DYNAMIC_RANGES)
+                getters.append(lambda i, top=top: _limited(self.dynamic_range[i], top))
+            elif name == "vcodec":
+                getters.append(
+                    lambda i: _limited(vranks[self.vcodec[i]] if self.kind[i] & _VIDEO else 0, vcap),
+                )
+            elif name == "acodec":
+                getters.append(
+                    lambda i: _limited(aranks[self.acodec[i]] if self.kind[i] & _AUDIO else 0, acap),
+                )
+            elif name in ("vbr", "abr", "tbr", "size"):
+                column = {"vbr": self.vbr, "abr": self.abr, "tbr": self.tbr, "size": self.size}[name]
+                getters.append(lambda i, column=column: column[i])
+        return lambda i: tuple(g(i) for g in getters)
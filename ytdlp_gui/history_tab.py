@@ -12,6 +12,8 @@ from .config import load_history, save_history
 if TYPE_CHECKING:
     from .app import App
 
+_THUMB_SIZE = (64, 36)
+
 _STATUS_COLORS = {
     "completed": "#4CAF50",
     "failed": "#f44336",
@@ -95,6 +97,12 @@ class HistoryTab(ctk.CTkFrame):
             top = ctk.CTkFrame(card, fg_color="transparent")
             top.pack(fill="x", padx=10, pady=(6, 2))
 
+            if entry.get("thumbnail"):
+                self.app.request_thumbnail(
+                    entry["thumbnail"], _THUMB_SIZE,
+                    lambda image, c=card, t=top: self._show_thumbnail(c, t, image),
+                )
+
             ctk.CTkLabel(
                 top, text=entry.get("title", "Unknown"),
                 font=ctk.CTkFont(size=12, weight="bold"), anchor="w",
@@ -139,6 +147,12 @@ class HistoryTab(ctk.CTkFrame):
                 font=ctk.CTkFont(size=10), text_color="gray", anchor="w",
             ).pack(side="left", fill="x", expand=True)
 
+    @staticmethod
+    def _show_thumbnail(card: ctk.CTkFrame, top: ctk.CTkFrame, image: Any) -> None:
+        if not card.winfo_exists():
+            return
+        ctk.CTkLabel(card, text="", image=image).pack(side="left", padx=(8, 0), pady=4, before=top)
+
     def add_entry(self, entry: dict[str, Any]) -> None:
         self.entries.insert(0, entry)
         if len(self.entries) > 1000:
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+import re
 import uuid
-from dataclasses import dataclass, field
+from datetime import datetime
+from dataclasses import dataclass, field, fields
 from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from .utils import parse_time_ranges
+
+if TYPE_CHECKING:
+    from .formats import FormatTable
 
 class DownloadStatus(Enum):
     QUEUED = "queued"
+    SCHEDULED = "scheduled"
     WAITING = "waiting"
+    PAUSED = "paused"
     DOWNLOADING = "downloading"
     MERGING = "merging"
+    VERIFYING = "verifying"
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELED = "canceled"
 
+class EventKind(Enum):
+    PROGRESS = "progress"
+    STATUS = "status"
+    LOG = "log"
+
 class QualityPreset(Enum):
     MAXIMUM = "maximum"
     HIGH = "high"
@@ -38,7 +54,7 @@ class AudioCodec(Enum):
     VORBIS = "vorbis"
     BEST = "best"
 
-@dataclass
+@dataclass(slots=True)
 class DownloadTask:
 
     url: str
@@ -51,16 +67,24 @@ class DownloadTask:
     metadata: bool = True
     chapters: bool = True
     sponsorblock: bool = False
+    sponsor_skip: bool = False
+    time_ranges: str = ""
+    chapter_select: str = ""
     cookies_path: str = ""
     proxy: str = ""
     speed_limit: int = 0
     playlist_mode: bool = False
+    playlist_items: str = ""
     audio_codec: AudioCodec = AudioCodec.MP3
     audio_quality: int = 320
+    priority: int = 0
+    not_before: float = 0.0
+    window: str = ""
 
     id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
     status: DownloadStatus = DownloadStatus.QUEUED
     title: str = "Pending…"
+    thumbnail_url: str = ""
     progress: float = 0.0
     speed: float = 0.0
     eta: int = 0
@@ -73,6 +97,18 @@ class DownloadTask:
     playlist_index: int = 0
     playlist_total: int = 0
     output_path: str = ""
+    io_saved_bytes: int = 0
+    reused_files: int = 0
+    reused_bytes: int = 0
+    skipped_bytes: int = 0
+    verified_files: int = 0
+    verify_failures: int = 0
+    verify_seconds: float = 0.0
+    requeues: int = 0
+    cancel_latency: float = 0.0
+    shared_with: str = ""
+    leased_proxy: str = ""
+    transferred_bytes: int = 0
 
 @dataclass
 class VideoInfo:
@@ -91,4 +127,117 @@ class VideoInfo:
     max_fps: int = 0
     has_hdr: bool = False
     filesize_approx: int = 0
+    formats: FormatTable | None = None
+    error: str = ""
+
+@dataclass
+class FormatPreview:
+    quality: QualityPreset
+    format: OutputFormat
+    streams: list[str] = field(default_factory=list)
+    container: str = ""
+    size: int = 0
+    exact_size: bool = False
+    bitrate: float = 0.0
+    reencode: bool = False
+    note: str = ""
+
+    @property
+    def available(self) -> bool:
+        return bool(self.streams)
+
+@dataclass
+class TimeProfile:
+    name: str
+    start: str = "00:00"
+    end: str = "00:00"
+    rate: int = 0
+    slots: int = 0
+
+@dataclass
+class Subscription:
+    url: str
+    title: str = ""
+    options: dict[str, Any] = field(default_factory=dict)
+    interval: int = 0
+    seen: list[str] = field(default_factory=list)
+    last_sync: float = 0.0
+    last_new: int = 0
+    failures: int = 0
     error: str = ""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+
+@dataclass
+class EngineEvent:
+    task_id: str
+    kind: EventKind
+    data: Any = None
+
+_TASK_OPTIONS = (
+    "url", "output_dir", "quality", "format", "subtitles", "subtitle_langs",
+    "thumbnail", "metadata", "chapters", "sponsorblock", "sponsor_skip", "time_ranges",
+    "chapter_select", "cookies_path", "proxy", "speed_limit", "playlist_mode", "playlist_items",
+    "audio_codec", "audio_quality", "priority", "not_before", "window",
+)
+_LOCAL_OPTIONS = ("cookies_path", "proxy")
+
+def task_to_dict(task: DownloadTask) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for f in fields(task):
+        value = getattr(task, f.name)
+        out[f.name] = value.value if isinstance(value, Enum) else value
+    return out
+
+def task_options(task: DownloadTask) -> dict[str, Any]:
+    data = task_to_dict(task)
+    return {
+        k: data[k] for k in _TASK_OPTIONS
+        if k not in ("url", "playlist_mode", "playlist_items", "not_before", "time_ranges", "chapter_select")
+    }
+
+def task_from_dict(
+    data: dict[str, Any], defaults: dict[str, Any] | None = None, *, local_options: bool = True,
+) -> DownloadTask:
+    if not local_options:
+        for key in _LOCAL_OPTIONS:
+            if data.get(key):
+                raise PermissionError(f"{key} can only be set when the API requires a token")
+    merged = {**(defaults or {}), **data}
+    kwargs = {k: merged[k] for k in _TASK_OPTIONS if k in merged}
+    if not kwargs.get("url"):
+        raise ValueError("url is required")
+    if not kwargs.get("output_dir"):
+        raise ValueError("output_dir is required")
+    for name, enum in (("quality", QualityPreset), ("format", OutputFormat), ("audio_codec", AudioCodec)):
+        if name in kwargs and not isinstance(kwargs[name], enum):
+            kwargs[name] = enum(kwargs[name])
+    for name in ("speed_limit", "audio_quality", "priority"):
+        if name in kwargs:
+            kwargs[name] = int(kwargs[name])
+    if kwargs.get("time_ranges"):
+        parse_time_ranges(kwargs["time_ranges"])
+    if kwargs.get("chapter_select"):
+        try:
+            re.compile(kwargs["chapter_select"])
+        except re.error as exc:
+            raise ValueError(f"Invalid chapter pattern: {exc}") from None
+    if isinstance(kwargs.get("not_before"), str):
+        kwargs["not_before"] = datetime.fromisoformat(kwargs["not_before"]).timestamp()
+    elif "not_before" in kwargs:
+        kwargs["not_before"] = float(kwargs["not_before"] or 0)
+    return DownloadTask(**kwargs)
+
+def history_entry(task: DownloadTask) -> dict[str, Any]:
+    return {
+        "url": task.url,
+        "title": task.title,
+        "thumbnail": task.thumbnail_url,
+        "status": task.status.value,
+        "quality": task.quality.value,
+        "format": task.format.value,
+        "duration": round(task.completed_at - task.started_at, 1)
+        if task.completed_at and task.started_at
+        else 0,
+        "timestamp": datetime.now().isoformat(),
+        "error": task.error,
+    }
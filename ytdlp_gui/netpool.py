@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+import functools
+import http.client
+import logging
+import select
+import socket
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Callable
+from typing import Any
+
+import yt_dlp
+from yt_dlp.networking._urllib import HTTPHandler, ProxyHandler, RedirectHandler, UrllibRH
+from yt_dlp.networking.common import _REQUEST_HANDLERS, _RH_PREFERENCES
+
+logger = logging.getLogger(__name__)
+
+AddrInfo = tuple[Any, ...]
+PoolKey = tuple[Any, ...]
+
+_PREFERENCE = 1000
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+class DnsCache:
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        overrides: dict[str, str] | None = None,
+    ) -> None:
+        self._ttl = ttl
+        self._overrides = dict(overrides or {})
+        self._entries: dict[tuple[str, int], tuple[float, list[AddrInfo]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host: str, port: int) -> list[AddrInfo]:
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        addrs = socket.getaddrinfo(self._overrides.get(host, host), port, 0, socket.SOCK_STREAM)
+        if not addrs:
+            raise OSError("getaddrinfo returns an empty list")
+        with self._lock:
+            self._entries[key] = (now + self._ttl, addrs)
+        return addrs
+
+    def invalidate(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def connect(
+        self,
+        address: tuple[str, int],
+        timeout: Any = socket._GLOBAL_DEFAULT_TIMEOUT,
+        source_address: tuple[str, int] | None = None,
+    ) -> socket.socket:
+        host, port = address
+        addrs = self.resolve(host, port)
+        if source_address is not None:
+            family = socket.AF_INET6 if ":" in source_address[0] else socket.AF_INET
+            addrs = [a for a in addrs if a[0] == family]
+            if not addrs:
+                raise OSError(f'No addresses for "{host}" match source address {source_address[0]}')
+
+        err: OSError | None = None
+        for family, socktype, proto, _, sockaddr in addrs:
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as exc:
+                err = exc
+                if sock is not None:
+                    sock.close()
+        self.invalidate(host, port)
+        try:
+            raise err
+        finally:
+            err = None
+
+class _PooledResponse(http.client.HTTPResponse):
+    _on_done: Callable[[bool], None] | None = None
+    _aborted = False
+
+    def _close_conn(self) -> None:
+        super()._close_conn()
+        on_done, self._on_done = self._on_done, None
+        if on_done is not None:
+            on_done(not self._aborted and not self.will_close)
+
+    def close(self) -> None:
+        if self.fp is not None:
+            self._aborted = True
+        super().close()
+
+class _InFlight:
+
+    def __init__(self) -> None:
+        self._conns: set[http.client.HTTPConnection] = set()
+        self._lock = threading.Lock()
+        self.interrupted = False
+
+    def add(self, conn: http.client.HTTPConnection) -> bool:
+        with self._lock:
+            if self.interrupted:
+                return False
+            self._conns.add(conn)
+            return True
+
+    def discard(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._conns.discard(conn)
+
+    def interrupt(self) -> int:
+        with self._lock:
+            self.interrupted = True
+            conns = list(self._conns)
+        for conn in conns:
+            sock = conn.sock
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return len(conns)
+
+class _PooledHTTPConnection(http.client.HTTPConnection):
+    response_class = _PooledResponse
+
+class _PooledHTTPSConnection(http.client.HTTPSConnection):
+    response_class = _PooledResponse
+
+class HttpPool:
+
+    def __init__(
+        self,
+        max_per_host: int = 8,
+        idle_timeout: float = 30.0,
+        resolver: DnsCache | None = None,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        self.max_per_host = max(1, max_per_host)
+        self._idle_timeout = idle_timeout
+        self.resolver = resolver or DnsCache()
+        self._ssl_override = ssl_context
+        self._ssl_contexts: dict[Any, ssl.SSLContext] = {}
+        self._idle: dict[PoolKey, list[tuple[float, http.client.HTTPConnection]]] = {}
+        self._open: dict[PoolKey, int] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.overflow = 0
+
+    def ssl_context(self, settings: Any, factory: Callable[[], ssl.SSLContext]) -> ssl.SSLContext:
+        if self._ssl_override is not None:
+            return self._ssl_override
+        with self._cond:
+            ctx = self._ssl_contexts.get(settings)
+        if ctx is None:
+            ctx = factory()
+            with self._cond:
+                ctx = self._ssl_contexts.setdefault(settings, ctx)
+        return ctx
+
+    def acquire(
+        self,
+        key: PoolKey,
+        factory: Callable[[], http.client.HTTPConnection],
+        timeout: float | None = None,
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                conn = self._pop_idle(key)
+                if conn is not None:
+                    self.hits += 1
+                    return conn, True
+                if self._closed or self._open.get(key, 0) < self.max_per_host:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.overflow += 1
+                    conn = factory()
+                    conn._pool_overflow = True
+                    return conn, False
+                self._cond.wait(remaining)
+            self._open[key] = self._open.get(key, 0) + 1
+            self.misses += 1
+        return factory(), False
+
+    def set_max_per_host(self, max_per_host: int) -> None:
+        with self._cond:
+            self.max_per_host = max(1, max_per_host)
+            self._cond.notify_all()
+
+    def release(self, key: PoolKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if getattr(conn, "_pool_overflow", False):
+            conn.close()
+            return
+        with self._cond:
+            if reusable and conn.sock is not None and not self._closed:
+                self._idle.setdefault(key, []).append((time.monotonic(), conn))
+                self._cond.notify()
+                return
+            self._forget(key)
+        conn.close()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = [conn for conns in self._idle.values() for _, conn in conns]
+            self._idle.clear()
+            self._open.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "overflow": self.overflow,
+                "idle": sum(len(conns) for conns in self._idle.values()),
+                "open": sum(self._open.values()),
+                "dns_hits": self.resolver.hits,
+                "dns_misses": self.resolver.misses,
+            }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['hits']} reused / {s['misses']} opened connections, "
+            f"DNS cache {s['dns_hits']} hits / {s['dns_misses']} misses"
+        )
+
+    def _pop_idle(self, key: PoolKey) -> http.client.HTTPConnection | None:
+        conns = self._idle.get(key)
+        now = time.monotonic()
+        while conns:
+            since, conn = conns.pop()
+            if now - since < self._idle_timeout and _is_alive(conn):
+                return conn
+            self._forget(key)
+            conn.close()
+        return None
+
+    def _forget(self, key: PoolKey) -> None:
+        count = self._open.get(key, 0) - 1
+        if count > 0:
+            self._open[key] = count
+        else:
+            self._open.pop(key, None)
+        self._cond.notify()
+
+def _is_alive(conn: http.client.HTTPConnection) -> bool:
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+class PooledHTTPHandler(HTTPHandler):
+
+    def __init__(
+        self, pool: HttpPool, inflight: _InFlight, context=None, source_address=None, *args, **kwargs,
+    ) -> None:
+        super().__init__(context, source_address, *args, **kwargs)
+        self._pool = pool
+        self._inflight = inflight
+
+    def http_open(self, req):
+        return self._pooled_open(req, https=False)
+
+    def https_open(self, req):
+        return self._pooled_open(req, https=True)
+
+    def _pooled_open(self, req, *, https: bool):
+        host = req.host
+        if not host:
+            raise urllib.error.URLError("no host given")
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): value for name, value in headers.items()}
+        tunnel_headers = {}
+        if req._tunnel_host and "Proxy-Authorization" in headers:
+            tunnel_headers["Proxy-Authorization"] = headers.pop("Proxy-Authorization")
+
+        source = (self._source_address, 0) if self._source_address else None
+        key = (
+            https, host, req._tunnel_host, tunnel_headers.get("Proxy-Authorization"),
+            id(self._context) if https else None, source,
+        )
+        factory = functools.partial(self._connect, host, https, req, tunnel_headers, source)
+        retryable = req.data is None or isinstance(req.data, bytes)
+
+        while True:
+            if self._inflight.interrupted:
+                raise urllib.error.URLError("request interrupted")
+            conn, reused = self._pool.acquire(key, factory, req.timeout)
+            if reused and conn.sock is not None:
+                conn.timeout = req.timeout
+                conn.sock.settimeout(req.timeout)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                if not self._inflight.add(conn):
+                    raise ConnectionAbortedError("request interrupted")
+                conn.request(
+                    req.get_method(), req.selector, req.data, headers,
+                    encode_chunked=req.has_header("Transfer-encoding"),
+                )
+                res = conn.getresponse()
+            except Exception as exc:
+                self._inflight.discard(conn)
+                self._pool.release(key, conn, reusable=False)
+                if reused and retryable and isinstance(exc, _STALE_ERRORS) and not self._inflight.interrupted:
+                    self._pool.stale += 1
+                    continue
+                if isinstance(exc, OSError):
+                    raise urllib.error.URLError(exc) from exc
+                raise
+            break
+
+        res._on_done = functools.partial(self._done, key, conn)
+        res.url = req.get_full_url()
+        res.msg = res.reason
+        return res
+
+    def _done(self, key: PoolKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        self._inflight.discard(conn)
+        self._pool.release(key, conn, reusable and not self._inflight.interrupted)
+
+    def _connect(self, host, https, req, tunnel_headers, source) -> http.client.HTTPConnection:
+        if https:
+            conn = _PooledHTTPSConnection(host, timeout=req.timeout, context=self._context)
+        else:
+            conn = _PooledHTTPConnection(host, timeout=req.timeout)
+        conn.set_debuglevel(self._debuglevel)
+        conn._create_connection = self._pool.resolver.connect
+        if source is not None:
+            conn.source_address = source
+        if req._tunnel_host:
+            conn.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+        return conn
+
+class PooledHTTPRH(UrllibRH):
+    _SUPPORTED_URL_SCHEMES = ("http", "https")
+    _SUPPORTED_PROXY_SCHEMES = ("http",)
+    RH_NAME = "pooled-http"
+
+    def __init__(self, *, http_pool: HttpPool, enable_file_urls: bool = False, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._http_pool = http_pool
+        self.inflight = _InFlight()
+
+    def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
+        legacy = self.legacy_ssl_support if legacy_ssl_support is None else legacy_ssl_support
+        settings = (
+            self.verify, legacy, self.prefer_system_certs,
+            tuple(sorted(self._client_cert.items())),
+        )
+        context = self._http_pool.ssl_context(
+            settings, functools.partial(self._make_sslcontext, legacy_ssl_support=legacy),
+        )
+        opener = urllib.request.OpenerDirector()
+        for handler in (
+            ProxyHandler(proxies),
+            PooledHTTPHandler(
+                self._http_pool,
+                self.inflight,
+                debuglevel=int(bool(self.verbose)),
+                context=context,
+                source_address=self.source_address,
+            ),
+            urllib.request.HTTPCookieProcessor(cookiejar),
+            urllib.request.UnknownHandler(),
+            urllib.request.HTTPDefaultErrorHandler(),
+            urllib.request.HTTPErrorProcessor(),
+            RedirectHandler(),
+        ):
+            opener.add_handler(handler)
+        opener.addheaders = []
+        return opener
+
+def _prefer_pooled(rh, _request) -> int:
+    return _PREFERENCE if isinstance(rh, PooledHTTPRH) else 0
+
+def _pooled_handler(ydl: yt_dlp.YoutubeDL) -> PooledHTTPRH | None:
+    director = ydl.__dict__.get("_request_director")
+    for rh in getattr(director, "handlers", {}).values():
+        if isinstance(rh, PooledHTTPRH):
+            return rh
+    return None
+
+def interrupt(ydl: yt_dlp.YoutubeDL) -> int:
+    rh = _pooled_handler(ydl)
+    return rh.inflight.interrupt() if rh is not None else 0
+
+def interrupted(ydl: yt_dlp.YoutubeDL) -> bool:
+    rh = _pooled_handler(ydl)
+    return rh is not None and rh.inflight.interrupted
+
+def install(ydl: yt_dlp.YoutubeDL, pool: HttpPool) -> None:
+    previous = ydl.__dict__.pop("_request_director", None)
+    if previous is not None:
+        previous.close()
+    handlers = [functools.partial(PooledHTTPRH, http_pool=pool), *_REQUEST_HANDLERS.values()]
+    ydl.__dict__["_request_director"] = ydl.build_request_director(
+        handlers, {*_RH_PREFERENCES, _prefer_pooled},
+    )
@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.postprocessor.ffmpeg import ACODECS, FFmpegExtractAudioPP, FFmpegMetadataPP
+from yt_dlp.postprocessor.sponsorblock import SponsorBlockPP
+from yt_dlp.utils import ISO639Utils, prepend_extension, replace_extension
+
+from .models import AudioCodec, DownloadTask, OutputFormat, QualityPreset
+from .sponsor_cache import CachedSponsorBlockPP, SponsorCache
+
+logger = logging.getLogger(__name__)
+
+_CODEC_ALIASES = {
+    "avc1": "h264", "avc3": "h264", "h264": "h264",
+    "hev1": "hevc", "hvc1": "hevc", "hevc": "hevc", "h265": "hevc",
+    "av01": "av1", "av1": "av1",
+    "vp09": "vp9", "vp9": "vp9", "vp8": "vp8",
+    "mp4a": "aac", "aac": "aac",
+    "opus": "opus", "vorbis": "vorbis", "mp3": "mp3", "flac": "flac",
+    "ac-3": "ac3", "ac3": "ac3", "ec-3": "eac3", "eac3": "eac3",
+}
+
+_CONTAINER_CODECS: dict[str, tuple[frozenset[str], frozenset[str]]] = {
+    "mp4": (
+        frozenset({"h264", "hevc", "av1", "vp9"}),
+        frozenset({"aac", "mp3", "opus", "flac", "ac3", "eac3"}),
+    ),
+    "webm": (
+        frozenset({"vp8", "vp9", "av1"}),
+        frozenset({"opus", "vorbis"}),
+    ),
+}
+
+_AUDIO_TRANSCODE = {
+    "mp4": ("-c:a", "aac", "-b:a", "192k"),
+    "webm": ("-c:a", "libopus", "-b:a", "160k"),
+}
+
+_AUDIO_TARGETS: dict[AudioCodec, str] = {
+    AudioCodec.MP3: "mp3",
+    AudioCodec.AAC: "aac",
+    AudioCodec.OPUS: "opus",
+    AudioCodec.VORBIS: "vorbis",
+    AudioCodec.FLAC: "flac",
+    AudioCodec.WAV: "wav",
+}
+
+_LOSSLESS_TARGETS = (AudioCodec.FLAC, AudioCodec.WAV)
+
+def normalize_codec(codec: str | None) -> str:
+    if not codec or codec == "none":
+        return ""
+    head = codec.lower().split(".")[0]
+    return _CODEC_ALIASES.get(head, head)
+
+def container_accepts(container: str, vcodec: str | None, acodec: str | None) -> tuple[bool, bool]:
+    allowed = _CONTAINER_CODECS.get(container)
+    v, a = normalize_codec(vcodec), normalize_codec(acodec)
+    if allowed is None:
+        return True, True
+    return (not v or v in allowed[0]), (not a or a in allowed[1])
+
+def audio_format_selector(codec: AudioCodec) -> str:
+    if codec == AudioCodec.AAC:
+        return "bestaudio[ext=m4a]/bestaudio[acodec^=mp4a]/bestaudio/best"
+    target = _AUDIO_TARGETS.get(codec)
+    if target and codec not in _LOSSLESS_TARGETS:
+        return f"bestaudio[acodec={target}]/bestaudio/best"
+    return "bestaudio/best"
+
+def plan_audio(
+    source_acodec: str | None, target: AudioCodec, source_ext: str = "",
+) -> tuple[bool, str]:
+    source = normalize_codec(source_acodec) or "unknown"
+    wanted = _AUDIO_TARGETS.get(target, "best")
+    if wanted == "best" and source_ext in FFmpegExtractAudioPP.COMMON_AUDIO_EXTS:
+        return False, f"keeping the downloaded {source_ext} file"
+    if wanted == "best" and source == "unknown":
+        return False, "keeping source stream"
+    if wanted in ("best", source) and source in ACODECS:
+        return False, f"source stream is already {source}"
+    if wanted == "best":
+        return True, f"{source} has no audio-only container; converting to mp3"
+    if target in _LOSSLESS_TARGETS:
+        return True, f"{wanted} is a lossless target and the source is {source}"
+    return True, f"no {wanted} stream was available (source is {source})"
+
+def audio_container(source_acodec: str | None, target: AudioCodec, source_ext: str = "") -> str:
+    wanted = _AUDIO_TARGETS.get(target, "best")
+    if wanted == "best":
+        if source_ext in FFmpegExtractAudioPP.COMMON_AUDIO_EXTS:
+            return source_ext
+        wanted = normalize_codec(source_acodec)
+        if not wanted:
+            return source_ext
+    return ACODECS.get(wanted, ACODECS["mp3"])[0]
+
+def plan_remux(
+    container: str, formats: list[dict[str, Any]],
+) -> tuple[bool, list[str], str]:
+    vcodec = next((f.get("vcodec") for f in formats if normalize_codec(f.get("vcodec"))), None)
+    acodec = next((f.get("acodec") for f in formats if normalize_codec(f.get("acodec"))), None)
+    video_ok, audio_ok = container_accepts(container, vcodec, acodec)
+    if not video_ok:
+        return False, [], (
+            f"{normalize_codec(vcodec)} video cannot be stream-copied into {container}; "
+            "keeping the source container instead of re-encoding video"
+        )
+    if not audio_ok:
+        return True, list(_AUDIO_TRANSCODE[container]), (
+            f"{normalize_codec(acodec)} audio is not valid in {container}; "
+            "re-encoding the audio track only"
+        )
+    return True, [], f"stream copy into {container}"
+
+_SUBTITLE_EXTS = ("mp4", "mov", "m4a", "webm", "mkv", "mka")
+_THUMBNAIL_EXTS = ("mp4", "mov", "m4a", "mkv", "mka")
+_MATROSKA_EXTS = ("mkv", "mka")
+
+_REWRITING_PPS = ("ModifyChapters",)
+_LEGACY_REWRITING_PPS = (
+    "EmbedThumbnail", "FFmpegMetadata", "FFmpegEmbedSubtitle", "ModifyChapters", "FFmpegVideoRemuxer",
+)
+
+ReportCallback = Callable[[list[str], int], None]
+NoteCallback = Callable[[str], None]
+
+@dataclass
+class PostProcessPlan:
+    container: str = ""
+    remux: bool = False
+    metadata: bool = False
+    chapters: bool = False
+    subtitles: bool = False
+    thumbnail: bool = False
+    audio_codec: AudioCodec | None = None
+    audio_quality: int = 0
+    sponsor_categories: tuple[str, ...] = ()
+    separate: list[dict[str, Any]] = field(default_factory=list)
+    legacy_passes: int = 0
+
+    @property
+    def fused_stages(self) -> list[str]:
+        stages = [
+            name for name, enabled in (
+                ("metadata", self.metadata),
+                ("chapters", self.chapters),
+                ("subtitles", self.subtitles),
+                ("thumbnail", self.thumbnail),
+                ("remux", self.remux),
+            ) if enabled
+        ]
+        return stages
+
+    @property
+    def planned_passes(self) -> int:
+        separate = sum(1 for pp in self.separate if pp["key"] in _REWRITING_PPS)
+        return separate + (1 if self.fused_stages else 0)
+
+    def io_saved(self, file_size: int) -> int:
+        avoided = max(self.legacy_passes - self.planned_passes, 0)
+        return avoided * file_size * 2
+
+    def attach(
+        self,
+        ydl: Any,
+        on_report: ReportCallback | None = None,
+        on_note: NoteCallback | None = None,
+        sponsors: SponsorCache | None = None,
+    ) -> None:
+        if self.sponsor_categories:
+            ydl.add_post_processor(
+                CachedSponsorBlockPP(ydl, sponsors, self.sponsor_categories)
+                if sponsors is not None else SponsorBlockPP(ydl, self.sponsor_categories),
+                when="after_filter",
+            )
+        if self.audio_codec is not None:
+            _register(ydl, CodecAwareAudioPP(ydl, self.audio_codec, self.audio_quality, on_note))
+        if self.fused_stages:
+            _register(ydl, FusedEmbedPP(ydl, self, on_report, on_note))
+
+def _register(ydl: Any, pp: PostProcessor) -> None:
+    ydl.add_post_processor(pp, when="post_process")
+    pp._progress_hooks = list(dict.fromkeys(pp._progress_hooks))
+
+def plan_postprocessing(
+    task: DownloadTask, *, is_audio: bool, container: str,
+) -> PostProcessPlan:
+    plan = PostProcessPlan(
+        container=container,
+        remux=bool(container) and not is_audio,
+        metadata=task.metadata,
+        chapters=task.metadata and task.chapters,
+        subtitles=task.subtitles,
+        thumbnail=task.thumbnail and not is_audio and container != "webm",
+    )
+    if is_audio:
+        plan.audio_codec = task.audio_codec
+        plan.audio_quality = task.audio_quality
+
+    if plan.thumbnail and container not in _MATROSKA_EXTS:
+        plan.separate.append(
+            {"key": "FFmpegThumbnailsConvertor", "format": "jpg", "when": "before_dl"}
+        )
+
+    if task.sponsorblock and not task.sponsor_skip:
+        plan.sponsor_categories = ("sponsor", "selfpromo", "interaction")
+        plan.separate.append({"key": "ModifyChapters", "remove_sponsor_segments": ["sponsor"]})
+
+    plan.legacy_passes = sum(
+        1 for key in legacy_postprocessors(task, is_audio=is_audio, container=container)
+        if key in _LEGACY_REWRITING_PPS
+    )
+    return plan
+
+def legacy_postprocessors(
+    task: DownloadTask, *, is_audio: bool, container: str,
+) -> list[str]:
+    keys: list[str] = []
+    if task.thumbnail and not is_audio:
+        keys.append("EmbedThumbnail")
+    if task.metadata:
+        keys.append("FFmpegMetadata")
+    if task.subtitles:
+        keys.append("FFmpegEmbedSubtitle")
+    if task.sponsorblock:
+        keys += ["SponsorBlock", "ModifyChapters"]
+    if (
+        not is_audio
+        and task.quality not in (QualityPreset.VIDEO_ONLY, QualityPreset.MAXIMUM)
+        and task.format == OutputFormat.MP4
+        and not container
+    ):
+        keys.append("FFmpegVideoRemuxer")
+    return keys
+
+class FusedEmbedPP(FFmpegMetadataPP):
+
+    def __init__(
+        self,
+        downloader: Any,
+        plan: PostProcessPlan,
+        on_report: ReportCallback | None = None,
+        on_note: NoteCallback | None = None,
+    ) -> None:
+        super().__init__(
+            downloader,
+            add_metadata=plan.metadata,
+            add_chapters=plan.chapters,
+            add_infojson=False,
+        )
+        self._plan = plan
+        self._on_report = on_report
+        self._on_note = on_note
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+        self._fixup_chapters(info)
+        filename = info["filepath"]
+        source_ext = info["ext"]
+        target_ext = source_ext
+        transcode: list[str] = []
+        if self._plan.remux and self._plan.container and source_ext != self._plan.container:
+            remux_ok, transcode, reason = plan_remux(
+                self._plan.container, info.get("requested_formats") or [info],
+            )
+            if remux_ok:
+                target_ext = self._plan.container
+            if self._on_note:
+                self._on_note(f"Output {source_ext} → {self._plan.container}: {reason}")
+
+        stages: list[str] = []
+        inputs: list[str] = [filename]
+        options: list[str] = [*self.stream_copy_opts(ext=target_ext), *transcode]
+        files_to_delete: list[str] = []
+
+        if self._plan.chapters and info.get("chapters"):
+            metadata_filename = replace_extension(filename, "meta")
+            for opt in self._get_chapter_opts(info["chapters"], metadata_filename):
+                options.extend(opt)
+            inputs.append(metadata_filename)
+            files_to_delete.append(metadata_filename)
+            stages.append("chapters")
+
+        if self._plan.metadata:
+            for opt in self._get_metadata_opts(info):
+                options.extend(opt)
+            stages.append("metadata")
+
+        subs = self._subtitle_inputs(info, target_ext)
+        if subs:
+            options.extend(("-map", "-0:s"))
+            for i, (lang, name, path) in enumerate(subs):
+                options.extend(("-map", f"{len(inputs)}:0"))
+                inputs.append(path)
+                lang_code = ISO639Utils.short2long(lang) or lang
+                options.extend((f"-metadata:s:s:{i}", f"language={lang_code}"))
+                if name:
+                    options.extend((f"-metadata:s:s:{i}", f"title={name}"))
+            files_to_delete.extend(path for _, _, path in subs)
+            stages.append("subtitles")
+
+        thumb = self._thumbnail_input(info, target_ext)
+        if thumb:
+            if target_ext in _MATROSKA_EXTS:
+                ext = os.path.splitext(thumb)[1].lstrip(".").lower() or "jpg"
+                mimetype = "image/png" if ext == "png" else f"image/{'jpeg' if ext == 'jpg' else ext}"
+                options.extend((
+                    "-attach", self._ffmpeg_filename_argument(thumb),
+                    "-metadata:s:t", f"mimetype={mimetype}",
+                    "-metadata:s:t", f"filename=cover.{ext}",
+                ))
+            else:
+                video_streams = sum(
+                    1 for fmt in info.get("requested_formats") or [info]
+                    if fmt.get("vcodec") not in (None, "none")
+                )
+                options.extend((
+                    "-map", f"{len(inputs)}:0",
+                    f"-disposition:v:{video_streams}", "attached_pic",
+                ))
+                inputs.append(thumb)
+            files_to_delete.append(thumb)
+            stages.append("thumbnail")
+
+        if target_ext != source_ext:
+            stages.append("remux")
+
+        if not stages:
+            return [], info
+
+        if target_ext == source_ext:
+            out_path = prepend_extension(filename, "temp")
+        else:
+            out_path = replace_extension(filename, target_ext, source_ext)
+
+        self.to_screen(f'Fused post-processing ({", ".join(stages)}) for "{filename}"')
+        self.run_ffmpeg_multiple_files(inputs, out_path, options)
+
+        if target_ext == source_ext:
+            os.replace(out_path, filename)
+        else:
+            files_to_delete.append(filename)
+            info["filepath"] = out_path
+            info["ext"] = target_ext
+
+        if self._on_report:
+            try:
+                size = os.path.getsize(info["filepath"])
+            except OSError:
+                size = 0
+            self._on_report(stages, self._plan.io_saved(size))
+
+        return files_to_delete, info
+
+    def _subtitle_inputs(
+        self, info: dict[str, Any], target_ext: str,
+    ) -> list[tuple[str, str, str]]:
+        if not self._plan.subtitles or target_ext not in _SUBTITLE_EXTS:
+            return []
+        subs: list[tuple[str, str, str]] = []
+        for lang, sub in (info.get("requested_subtitles") or {}).items():
+            path = sub.get("filepath") or ""
+            sub_ext = sub.get("ext") or ""
+            if not path or not os.path.exists(path) or sub_ext == "json":
+                continue
+            if target_ext == "webm" and sub_ext != "vtt":
+                continue
+            subs.append((lang, sub.get("name") or "", path))
+        return subs
+
+    def _thumbnail_input(self, info: dict[str, Any], target_ext: str) -> str:
+        if not self._plan.thumbnail or target_ext not in _THUMBNAIL_EXTS:
+            return ""
+        thumbnails = info.get("thumbnails") or []
+        path = thumbnails[-1].get("filepath") if thumbnails else ""
+        if not path or not os.path.exists(path):
+            return ""
+        if target_ext not in _MATROSKA_EXTS and not path.lower().endswith((".jpg", ".jpeg", ".png")):
+            return ""
+        return path
+
+class CodecAwareAudioPP(FFmpegExtractAudioPP):
+
+    def __init__(
+        self,
+        downloader: Any,
+        codec: AudioCodec,
+        quality: int,
+        on_note: NoteCallback | None = None,
+    ) -> None:
+        preferred = _AUDIO_TARGETS.get(codec, "best")
+        lossy = codec in (AudioCodec.MP3, AudioCodec.AAC, AudioCodec.VORBIS, AudioCodec.OPUS)
+        super().__init__(
+            downloader,
+            preferredcodec=preferred,
+            preferredquality=str(min(max(quality, 64), 320)) if lossy else None,
+        )
+        self._codec = codec
+        self._on_note = on_note
+        self._encoder: str | None = None
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, information: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+        source = normalize_codec(information.get("acodec")) or information.get("ext") or "unknown"
+        self._encoder = None
+        files, info = super().run(information)
+        if self._on_note:
+            if self._encoder is None:
+                self._on_note(f"Audio kept as downloaded: {source} in {info['ext']}")
+            elif self._encoder == "copy":
+                self._on_note(f"Audio stream copy: {source} into {info['ext']}")
+            else:
+                self._on_note(f"Audio transcoding: {source} → {info['ext']} ({self._encoder})")
+        return files, info
+
+    def run_ffmpeg(self, path: str, out_path: str, codec: str | None, more_opts: list[str]) -> None:
+        self._encoder = codec or "ffmpeg default"
+        super().run_ffmpeg(path, out_path, codec, more_opts)
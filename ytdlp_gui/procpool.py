@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections.abc import Callable, Collection
+from dataclasses import fields
+from multiprocessing.connection import Connection
+from typing import TYPE_CHECKING, Any
+
+from .cancel import CancelToken
+from .models import DownloadStatus, DownloadTask
+
+if TYPE_CHECKING:
+    from .engine import DownloadEngine
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.1
+_CANCEL_GRACE = 10.0
+_STOP_TIMEOUT = 2.0
+
+_MSG_RUN = "r"
+_MSG_CANCEL = "c"
+_MSG_STOP = "x"
+_MSG_RATE = "t"
+_MSG_PROGRESS = "p"
+_MSG_LOG = "l"
+_MSG_STATUS = "s"
+_MSG_DONE = "d"
+_MSG_LEASE = "q"
+_MSG_LEASED = "a"
+_MSG_RETURN = "b"
+
+_PROGRESS_FIELDS = (
+    "progress", "speed", "eta", "downloaded_bytes", "total_bytes",
+    "title", "thumbnail_url", "playlist_index", "playlist_total",
+)
+
+class _RemoteProxies:
+
+    enabled = True
+
+    def __init__(self, send: Callable[[tuple], None]) -> None:
+        self._send = send
+        self._replies: queue.Queue[str] = queue.Queue()
+
+    def lease(self, exclude: Collection[str] = (), cancel: threading.Event | None = None) -> str | None:
+        self._send((_MSG_LEASE, list(exclude)))
+        return self._replies.get() or None
+
+    def deliver(self, url: str) -> None:
+        self._replies.put(url)
+
+    def release(self, url: str, nbytes: int = 0, seconds: float = 0.0, outcome: str = "ok") -> None:
+        self._send((_MSG_RETURN, url, nbytes, seconds, outcome))
+
+def _worker_main(conn: Connection, settings: dict[str, Any]) -> None:
+    from .engine import DownloadEngine
+
+    send_lock = threading.Lock()
+
+    def send(msg: tuple) -> None:
+        with send_lock:
+            conn.send(msg)
+
+    def on_progress(_task_id: str, d: dict[str, Any]) -> None:
+        send((
+            _MSG_PROGRESS, d["progress"], d["speed"], d["eta"], d["downloaded"],
+            d["total"], d["title"], d["thumbnail"], d["playlist_index"], d["playlist_total"],
+        ))
+
+    flags = settings.pop("flags", {})
+    remote = _RemoteProxies(send) if settings.pop("remote_proxies", False) else None
+    engine = DownloadEngine(
+        **settings,
+        on_progress=on_progress,
+        on_status_change=lambda _task_id, status: send((_MSG_STATUS, status.value)),
+        on_log=lambda _task_id, msg: send((_MSG_LOG, msg)),
+    )
+    for name, value in flags.items():
+        setattr(engine, name, value)
+    if remote is not None:
+        engine._proxies = remote
+
+    cancel: CancelToken | None = None
+    runner: threading.Thread | None = None
+
+    def run(task: DownloadTask, ev: CancelToken) -> None:
+        try:
+            engine._execute(task, ev)
+        finally:
+            send((_MSG_DONE, task))
+
+    try:
+        while True:
+            msg = conn.recv()
+            kind = msg[0]
+            if kind == _MSG_RUN:
+                engine.set_rate_limit(msg[2])
+                cancel = CancelToken()
+                runner = threading.Thread(target=run, args=(msg[1], cancel), daemon=True)
+                runner.start()
+            elif kind == _MSG_CANCEL and cancel is not None:
+                if msg[1]:
+                    cancel.pause(msg[1])
+                else:
+                    cancel.paused = ""
+                    cancel.set()
+            elif kind == _MSG_RATE:
+                engine.set_rate_limit(msg[1])
+            elif kind == _MSG_LEASED and remote is not None:
+                remote.deliver(msg[1])
+            elif kind == _MSG_STOP:
+                break
+    except (EOFError, OSError):
+        pass
+    finally:
+        if cancel is not None:
+            cancel.set()
+        if runner is not None:
+            runner.join(_STOP_TIMEOUT)
+        engine.shutdown()
+
+class _Worker:
+
+    def __init__(self, ctx: Any, settings: dict[str, Any], generation: int = 0) -> None:
+        self.generation = generation
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, settings), daemon=True, name="ytdlp-worker",
+        )
+        self.process.start()
+        child.close()
+        self._send_lock = threading.Lock()
+
+    def send(self, msg: tuple) -> None:
+        with self._send_lock:
+            self.conn.send(msg)
+
+    def stop(self) -> None:
+        try:
+            self.send((_MSG_STOP,))
+        except (OSError, ValueError):
+            pass
+        self.process.join(_STOP_TIMEOUT)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(_STOP_TIMEOUT)
+        self.conn.close()
+
+class ProcessPool:
+
+    def __init__(self, max_idle: int = 2) -> None:
+        self._ctx = multiprocessing.get_context("spawn")
+        self._max_idle = max_idle
+        self._idle: list[_Worker] = []
+        self._busy: set[_Worker] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._rate = 0
+        self._generation = 0
+
+    def set_rate(self, rate: int) -> None:
+        with self._lock:
+            self._rate = rate
+            busy = list(self._busy)
+        for worker in busy:
+            try:
+                worker.send((_MSG_RATE, rate))
+            except (OSError, ValueError):
+                pass
+
+    def set_max_idle(self, max_idle: int) -> None:
+        with self._lock:
+            self._max_idle = max_idle
+            excess = self._idle[max_idle:]
+            del self._idle[max_idle:]
+        for worker in excess:
+            worker.stop()
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def execute(self, engine: DownloadEngine, task: DownloadTask, cancel: CancelToken) -> None:
+        worker = self._acquire(engine._worker_settings())
+        healthy = False
+        try:
+            healthy = self._drive(engine, worker, task, cancel)
+        finally:
+            self._release(worker, healthy)
+            if not healthy and task.status is not DownloadStatus.PAUSED:
+                task.completed_at = task.completed_at or time.time()
+                engine._emit_progress(task)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers = [*self._idle, *self._busy]
+            self._idle.clear()
+        for worker in workers:
+            worker.stop()
+
+    def _drive(
+        self,
+        engine: DownloadEngine,
+        worker: _Worker,
+        task: DownloadTask,
+        cancel: CancelToken,
+    ) -> bool:
+        worker.send((_MSG_RUN, task, self._rate))
+        leased: list[str] = []
+        try:
+            return self._pump(engine, worker, task, cancel, leased)
+        finally:
+            for url in leased:
+                engine._proxies.release(url, outcome="aborted")
+
+    def _pump(
+        self,
+        engine: DownloadEngine,
+        worker: _Worker,
+        task: DownloadTask,
+        cancel: CancelToken,
+        leased: list[str],
+    ) -> bool:
+        kill_at = 0.0
+        requested: str | None = None
+        while True:
+            if cancel.is_set() and requested != cancel.paused:
+                requested = cancel.paused
+                worker.send((_MSG_CANCEL, requested))
+                kill_at = kill_at or time.monotonic() + _CANCEL_GRACE
+            try:
+                if not worker.conn.poll(_POLL_INTERVAL):
+                    if kill_at and time.monotonic() > kill_at:
+                        engine._log(task.id, "[WARNING] Worker did not stop in time; terminated")
+                        engine._set_status(
+                            task, DownloadStatus.PAUSED if cancel.paused else DownloadStatus.CANCELED,
+                        )
+                        return False
+                    continue
+                msg = worker.conn.recv()
+            except (EOFError, OSError) as exc:
+                logger.error("Worker process for %s exited: %s", task.url, exc)
+                if cancel.is_set():
+                    engine._set_status(
+                        task, DownloadStatus.PAUSED if cancel.paused else DownloadStatus.CANCELED,
+                    )
+                else:
+                    task.error = "Worker process exited unexpectedly"
+                    engine._set_status(task, DownloadStatus.FAILED)
+                    engine._log(task.id, f"[ERROR] {task.error}")
+                return False
+
+            kind = msg[0]
+            if kind == _MSG_PROGRESS:
+                for name, value in zip(_PROGRESS_FIELDS, msg[1:]):
+                    setattr(task, name, value)
+                engine._emit_progress(task)
+            elif kind == _MSG_LOG:
+                engine._log(task.id, msg[1])
+            elif kind == _MSG_STATUS:
+                engine._set_status(task, DownloadStatus(msg[1]))
+            elif kind == _MSG_LEASE:
+                url = engine._proxies.lease(msg[1], cancel) or ""
+                if url:
+                    leased.append(url)
+                worker.send((_MSG_LEASED, url))
+            elif kind == _MSG_RETURN:
+                if msg[1] in leased:
+                    leased.remove(msg[1])
+                    engine._proxies.release(*msg[1:])
+            elif kind == _MSG_DONE:
+                for f in fields(DownloadTask):
+                    setattr(task, f.name, getattr(msg[1], f.name))
+                return True
+
+    def _acquire(self, settings: dict[str, Any]) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    self._busy.add(worker)
+                    return worker
+                worker.kill()
+        worker = _Worker(self._ctx, settings, self._generation)
+        with self._lock:
+            self._busy.add(worker)
+        return worker
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        with self._lock:
+            self._busy.discard(worker)
+            if (
+                healthy
+                and not self._closed
+                and worker.generation == self._generation
+                and len(self._idle) < self._max_idle
+            ):
+                self._idle.append(worker)
+                return
+        if healthy:
+            worker.stop()
+        else:
+            worker.kill()
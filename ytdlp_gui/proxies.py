@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import urllib.parse
+from collections.abc import Collection, Iterable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ("ok", "throttled", "failed", "aborted")
+
+_ALPHA = 0.3
+_MIN_SAMPLE = 256 * 1024
+_FAILURES_TO_COOL = 3
+_MAX_BACKOFF = 8
+_WAIT_SLICE = 0.5
+
+def parse_proxies(text: str) -> list[str]:
+    out: list[str] = []
+    for line in text.replace(",", "\n").splitlines():
+        url = line.split("#", 1)[0].strip()
+        if url and url not in out:
+            out.append(url)
+    return out
+
+def redact(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    if not parts.password:
+        return url
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+    return urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+
+class _Proxy:
+    __slots__ = (
+        "url", "active", "leases", "ok", "throttled", "failed", "bytes",
+        "rate", "error_rate", "streak", "cool_until",
+    )
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.active = 0
+        self.leases = 0
+        self.ok = 0
+        self.throttled = 0
+        self.failed = 0
+        self.bytes = 0
+        self.rate = 0.0
+        self.error_rate = 0.0
+        self.streak = 0
+        self.cool_until = 0.0
+
+class ProxyPool:
+
+    def __init__(self, proxies: Iterable[str] = (), limit: int = 2, cooldown: float = 300.0) -> None:
+        self._cond = threading.Condition()
+        self._proxies: dict[str, _Proxy] = {}
+        self._limit = 1
+        self._cooldown = 0.0
+        self.configure(proxies, limit, cooldown)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._proxies)
+
+    def configure(self, proxies: Iterable[str], limit: int, cooldown: float) -> None:
+        with self._cond:
+            old = self._proxies
+            self._proxies = {url: old.get(url) or _Proxy(url) for url in proxies}
+            self._limit = max(1, limit)
+            self._cooldown = max(0.0, cooldown)
+            self._cond.notify_all()
+
+    def lease(self, exclude: Collection[str] = (), cancel: threading.Event | None = None) -> str | None:
+        with self._cond:
+            while self._proxies and not (cancel is not None and cancel.is_set()):
+                proxy = self._pick(exclude)
+                if proxy is not None:
+                    proxy.active += 1
+                    proxy.leases += 1
+                    return proxy.url
+                self._cond.wait(_WAIT_SLICE)
+        return None
+
+    def release(self, url: str, nbytes: int = 0, seconds: float = 0.0, outcome: str = "ok") -> None:
+        with self._cond:
+            proxy = self._proxies.get(url)
+            if proxy is None:
+                return
+            proxy.active = max(0, proxy.active - 1)
+            proxy.bytes += nbytes
+            if outcome == "ok":
+                proxy.ok += 1
+                proxy.streak = 0
+                proxy.error_rate *= 1 - _ALPHA
+                if nbytes >= _MIN_SAMPLE and seconds > 0:
+                    sample = nbytes / seconds
+                    proxy.rate = sample if not proxy.rate else proxy.rate + _ALPHA * (sample - proxy.rate)
+            elif outcome in ("throttled", "failed"):
+                setattr(proxy, outcome, getattr(proxy, outcome) + 1)
+                proxy.streak += 1
+                proxy.error_rate += _ALPHA * (1 - proxy.error_rate)
+                if outcome == "throttled" or proxy.streak >= _FAILURES_TO_COOL:
+                    backoff = self._cooldown * min(2 ** (proxy.streak - 1), _MAX_BACKOFF)
+                    proxy.cool_until = time.monotonic() + backoff
+                    logger.warning("Proxy %s %s; cooling down for %.0fs", redact(url), outcome, backoff)
+            self._cond.notify_all()
+
+    def stats(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        with self._cond:
+            return [
+                {
+                    "proxy": redact(p.url),
+                    "active": p.active,
+                    "limit": self._limit,
+                    "leases": p.leases,
+                    "ok": p.ok,
+                    "throttled": p.throttled,
+                    "failed": p.failed,
+                    "bytes": p.bytes,
+                    "rate": round(p.rate),
+                    "error_rate": round(p.error_rate, 3),
+                    "cooling": round(max(0.0, p.cool_until - now), 1),
+                }
+                for p in self._proxies.values()
+            ]
+
+    def _pick(self, exclude: Collection[str]) -> _Proxy | None:
+        now = time.monotonic()
+        healthy = [p for p in self._proxies.values() if p.cool_until <= now]
+        ready = [p for p in healthy if p.active < self._limit]
+        fresh = [p for p in ready if p.url not in exclude]
+        others = [p for p in healthy if p.url not in exclude]
+        candidates = fresh if fresh or others else ready
+        if not candidates:
+            return None
+        best = max((p.rate for p in self._proxies.values()), default=0.0) or 1.0
+        return max(
+            candidates,
+            key=lambda p: (p.rate or best) * (1 - p.error_rate) ** 2 / (1 + p.active),
+        )
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import customtkinter as ctk
 
@@ -10,11 +10,16 @@ from .utils import format_bytes, format_speed, format_eta
 if TYPE_CHECKING:
     from .app import App
 
+_THUMB_SIZE = (96, 54)
+
 _STATUS_COLORS = {
     "queued": "gray",
     "waiting": "#9E9E9E",
+    "scheduled": "#7E57C2",
+    "paused": "#FFC107",
     "downloading": "#2196F3",
     "merging": "#FF9800",
+    "verifying": "#00897B",
     "completed": "#4CAF50",
     "failed": "#f44336",
     "canceled": "#9E9E9E",
@@ -30,15 +35,25 @@ class _TaskCard(ctk.CTkFrame):
         on_cancel: Callable[[str], None],
         on_retry: Callable[[str], None],
         on_open: Callable[[str], None],
+        on_pause: Callable[[str], None],
+        on_resume: Callable[[str], None],
+        request_thumbnail: Callable[[str, tuple[int, int], Callable[[Any], None]], None],
     ) -> None:
         super().__init__(master, corner_radius=8)
         self.task_id = task_id
         self.current_status = "queued"
         self._on_retry = on_retry
         self._on_open = on_open
+        self._on_pause = on_pause
+        self._on_resume = on_resume
+        self._request_thumbnail = request_thumbnail
+        self._thumb_url = ""
+
+        self.thumb_lbl = ctk.CTkLabel(self, text="")
 
         top = ctk.CTkFrame(self, fg_color="transparent")
         top.pack(fill="x", padx=10, pady=(8, 2))
+        self._top = top
 
         self.title_lbl = ctk.CTkLabel(
             top, text=title,
@@ -70,6 +85,13 @@ class _TaskCard(ctk.CTkFrame):
             command=lambda: on_cancel(task_id),
         ).pack(side="right")
 
+        self.pause_btn = ctk.CTkButton(
+            top, text="⏸", width=30, height=26,
+            fg_color="transparent", hover_color="#FFC107",
+            command=self._toggle_pause,
+        )
+        self.pause_btn.pack(side="right", padx=(4, 0))
+
         self.pbar = ctk.CTkProgressBar(self, height=10)
         self.pbar.pack(fill="x", padx=10, pady=2)
         self.pbar.set(0)
@@ -80,10 +102,28 @@ class _TaskCard(ctk.CTkFrame):
         )
         self.detail_lbl.pack(fill="x", padx=10, pady=(0, 8))
 
+    def _toggle_pause(self) -> None:
+        if self.current_status == "paused":
+            self._on_resume(self.task_id)
+        else:
+            self._on_pause(self.task_id)
+
+    def _show_thumbnail(self, url: str, image: Any) -> None:
+        if url != self._thumb_url or not self.winfo_exists():
+            return
+        self.thumb_lbl.configure(image=image)
+        if not self.thumb_lbl.winfo_ismapped():
+            self.thumb_lbl.pack(side="left", padx=(8, 0), pady=6, before=self._top)
+
     def update_data(self, data: dict) -> None:
         progress = float(data.get("progress", 0))
         self.pbar.set(progress / 100)
 
+        thumb = str(data.get("thumbnail") or "")
+        if thumb and thumb != self._thumb_url:
+            self._thumb_url = thumb
+            self._request_thumbnail(thumb, _THUMB_SIZE, lambda image: self._show_thumbnail(thumb, image))
+
         title = str(data.get("title", "Downloading…"))
         status = str(data.get("status", "queued"))
         prev_status = self.current_status
@@ -95,8 +135,15 @@ class _TaskCard(ctk.CTkFrame):
             text_color=_STATUS_COLORS.get(status, "gray"),
         )
 
+        if status in ("completed", "failed", "canceled"):
+            self.pause_btn.pack_forget()
+        else:
+            self.pause_btn.configure(text="▶" if status == "paused" else "⏸")
+
         if status == "completed":
-            self.detail_lbl.configure(text="Download complete ✓")
+            skipped = int(data.get("skipped", 0))
+            skipped_str = f"   ·   {format_bytes(skipped)} skipped" if skipped else ""
+            self.detail_lbl.configure(text=f"Download complete ✓{skipped_str}")
             if prev_status != "completed":
                 self.open_btn.pack(side="right", padx=(4, 0))
         elif status == "failed":
@@ -114,9 +161,11 @@ class _TaskCard(ctk.CTkFrame):
             pl_idx = int(data.get("playlist_index", 0))
             pl_total = int(data.get("playlist_total", 0))
             pl_str = f"  [{pl_idx}/{pl_total}]" if pl_total > 1 else ""
+            shared = data.get("shared_with")
+            shared_str = f"   ·   shared with {shared}" if shared else ""
 
             self.detail_lbl.configure(
-                text=f"{dl} / {total}   ·   {spd}   ·   ETA {eta_s}   ·   {progress:.1f}%{pl_str}",
+                text=f"{dl} / {total}   ·   {spd}   ·   ETA {eta_s}   ·   {progress:.1f}%{pl_str}{shared_str}",
             )
 
 class QueueTab(ctk.CTkFrame):
@@ -148,6 +197,13 @@ class QueueTab(ctk.CTkFrame):
             command=self._clear_completed,
         ).pack(side="left", padx=(0, 5))
 
+        self.pause_all_btn = ctk.CTkButton(
+            btn_frame, text="Pause All", width=100,
+            fg_color="#FFA000", hover_color="#FF8F00",
+            command=self._toggle_queue,
+        )
+        self.pause_all_btn.pack(side="left", padx=(0, 5))
+
         ctk.CTkButton(
             btn_frame, text="Cancel All", width=100,
             fg_color="#dc3545", hover_color="#c82333",
@@ -171,6 +227,9 @@ class QueueTab(ctk.CTkFrame):
             on_cancel=self.app.cancel_download,
             on_retry=self.app.retry_download,
             on_open=self.app.open_task_folder,
+            on_pause=self.app.pause_download,
+            on_resume=self.app.resume_download,
+            request_thumbnail=self.app.request_thumbnail,
         )
         card.pack(fill="x", pady=3)
         self._cards[task_id] = card
@@ -190,6 +249,13 @@ class QueueTab(ctk.CTkFrame):
             self.empty_lbl.pack(pady=50)
         self._update_summary()
 
+    def _toggle_queue(self) -> None:
+        if self.app.engine.queue_paused:
+            self.app.resume_all_downloads()
+        else:
+            self.app.pause_all_downloads()
+        self._update_summary()
+
     def _clear_completed(self) -> None:
         done = [
             tid for tid, c in self._cards.items()
@@ -201,10 +267,17 @@ class QueueTab(ctk.CTkFrame):
     def _update_summary(self) -> None:
         active = sum(
             1 for c in self._cards.values()
-            if c.current_status in ("downloading", "merging", "waiting")
+            if c.current_status in ("downloading", "merging", "verifying", "waiting", "scheduled")
         )
         total = len(self._cards)
         completed = sum(1 for c in self._cards.values() if c.current_status == "completed")
+        paused = sum(1 for c in self._cards.values() if c.current_status == "paused")
         self.summary_lbl.configure(
-            text=f"{active} active  ·  {completed} done  ·  {total} total",
+            text=f"{active} active  ·  "
+            + (f"{paused} paused  ·  " if paused else "")
+            + f"{completed} done  ·  {total} total",
+        )
+        hold = self.app.engine.queue_paused
+        self.pause_all_btn.configure(
+            text="Resume All" if hold else "Pause All",
         )
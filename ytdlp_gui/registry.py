@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+
+from .models import DownloadStatus, DownloadTask
+
+EvictCallback = Callable[[DownloadTask], None]
+
+_FINISHED = frozenset({DownloadStatus.COMPLETED, DownloadStatus.FAILED, DownloadStatus.CANCELED})
+
+class TaskRegistry:
+
+    def __init__(self, recent: int = 500, on_evict: EvictCallback | None = None) -> None:
+        self._limit = max(0, recent)
+        self._on_evict = on_evict
+        self._active: dict[str, DownloadTask] = {}
+        self._recent: OrderedDict[str, DownloadTask] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._active) + len(self._recent)
+
+    def __contains__(self, task_id: object) -> bool:
+        with self._lock:
+            return task_id in self._active or task_id in self._recent
+
+    def __iter__(self) -> Iterator[DownloadTask]:
+        with self._lock:
+            return iter([*self._active.values(), *self._recent.values()])
+
+    def add(self, task: DownloadTask) -> None:
+        with self._lock:
+            self._recent.pop(task.id, None)
+            self._active[task.id] = task
+
+    def get(self, task_id: str) -> DownloadTask | None:
+        with self._lock:
+            return self._active.get(task_id) or self._recent.get(task_id)
+
+    def update(self, task_id: str) -> DownloadTask | None:
+        evicted: list[DownloadTask] = []
+        with self._lock:
+            task = self._active.get(task_id) or self._recent.get(task_id)
+            if task is None:
+                return None
+            if task.status not in _FINISHED:
+                self._recent.pop(task_id, None)
+                self._active[task_id] = task
+                return task
+            self._active.pop(task_id, None)
+            self._recent[task_id] = task
+            self._recent.move_to_end(task_id)
+            while len(self._recent) > self._limit:
+                evicted.append(self._recent.popitem(last=False)[1])
+            self.evicted += len(evicted)
+        if self._on_evict is not None:
+            for old in evicted:
+                self._on_evict(old)
+        return task
+
+    def set_limit(self, recent: int) -> None:
+        with self._lock:
+            self._limit = max(0, recent)
+            evicted = [self._recent.popitem(last=False)[1] for _ in range(len(self._recent) - self._limit)]
+            self.evicted += len(evicted)
+        if self._on_evict is not None:
+            for old in evicted:
+                self._on_evict(old)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._active),
+                "recent": len(self._recent),
+                "evicted": self.evicted,
+            }
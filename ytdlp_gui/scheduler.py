@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+from collections.abc import Callable
+
+from .models import DownloadTask
+
+logger = logging.getLogger(__name__)
+
+StartCallback = Callable[[DownloadTask], None]
+
+class TaskScheduler:
+
+    def __init__(self, limit: int, on_start: StartCallback) -> None:
+        self._limit = max(1, limit)
+        self._on_start = on_start
+        self._heap: list[list] = []
+        self._entries: dict[str, list] = {}
+        self._running: set[str] = set()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def running_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def submit(self, task: DownloadTask) -> None:
+        with self._lock:
+            self._push(task)
+        self._pump()
+
+    def finish(self, task_id: str) -> None:
+        with self._lock:
+            self._running.discard(task_id)
+        self._pump()
+
+    def remove(self, task_id: str) -> DownloadTask | None:
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            if entry is None:
+                return None
+            entry[-1], task = None, entry[-1]
+        return task
+
+    def reprioritize(self, task_id: str, priority: int) -> bool:
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            if entry is None:
+                return False
+            entry[-1], task = None, entry[-1]
+            task.priority = priority
+            self._push(task)
+        return True
+
+    def set_limit(self, limit: int) -> None:
+        with self._lock:
+            self._limit = max(1, limit)
+        self._pump()
+
+    def pending(self) -> list[DownloadTask]:
+        with self._lock:
+            live = [e for e in self._heap if e[-1] is not None]
+        return [e[-1] for e in sorted(live)]
+
+    def is_running(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._running
+
+    def _push(self, task: DownloadTask) -> None:
+        entry = [-task.priority, next(self._seq), task]
+        self._entries[task.id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _pump(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._running) >= self._limit:
+                    return
+                task = self._pop()
+                if task is None:
+                    return
+                self._running.add(task.id)
+            try:
+                self._on_start(task)
+            except Exception:
+                logger.exception("Failed to start %s", task.url)
+                with self._lock:
+                    self._running.discard(task.id)
+
+    def _pop(self) -> DownloadTask | None:
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            task = entry[-1]
+            if task is not None:
+                del self._entries[task.id]
+                return task
+        return None
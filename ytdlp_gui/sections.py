@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+from collections.abc import Callable
+from typing import Any
+
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+from yt_dlp.postprocessor.sponsorblock import SponsorBlockPP
+
+from .models import DownloadTask
+from .sponsor_cache import CachedSponsorBlockPP, SponsorCache
+from .utils import parse_time_ranges
+
+logger = logging.getLogger(__name__)
+
+NO_SECTIONS = "Nothing to download in the selected sections"
+
+_SKIP_CATEGORIES = ("sponsor",)
+_MIN_PIECE = 1.0
+_PIECE_SUFFIX = "%(section_title& - {}|)s.%(section_number)03d"
+
+JoinedCallback = Callable[[str, int, float, float], None]
+NoteCallback = Callable[[str], None]
+
+def wants_sections(task: DownloadTask) -> bool:
+    return bool(task.time_ranges or task.chapter_select or (task.sponsorblock and task.sponsor_skip))
+
+def piece_template(outtmpl: str) -> str:
+    root, ext = os.path.splitext(outtmpl)
+    return f"{root}{_PIECE_SUFFIX}{ext}"
+
+def _clock(seconds: float) -> str:
+    s = int(seconds)
+    h, m, s = s // 3600, s // 60 % 60, s % 60
+    return f"{h}h{m:02d}m{s:02d}s" if h else f"{m}m{s:02d}s"
+
+def _merge(ranges: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    out: list[tuple[float, float]] = []
+    for start, end in sorted(ranges):
+        if out and start < out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], end))
+        else:
+            out.append((start, end))
+    return out
+
+def _subtract(start: float, end: float, cuts: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    pieces: list[tuple[float, float]] = []
+    for cut_start, cut_end in cuts:
+        if cut_end <= start or cut_start >= end:
+            continue
+        if cut_start - start >= _MIN_PIECE:
+            pieces.append((start, cut_start))
+        start = max(start, cut_end)
+    if end - start >= _MIN_PIECE:
+        pieces.append((start, end))
+    return pieces
+
+class SectionPlan:
+
+    def __init__(
+        self,
+        task: DownloadTask,
+        on_note: NoteCallback | None = None,
+        sponsors: SponsorCache | None = None,
+    ) -> None:
+        self._ranges = parse_time_ranges(task.time_ranges)
+        self._chapters = re.compile(task.chapter_select, re.IGNORECASE) if task.chapter_select else None
+        self._skip = task.sponsorblock and task.sponsor_skip
+        self._on_note = on_note
+        self._sponsors = sponsors
+        self.kept: dict[str, tuple[float, float]] = {}
+
+    def __call__(self, info: dict[str, Any], ydl: Any) -> list[dict[str, Any]]:
+        duration = float(info.get("duration") or 0)
+        sections = self._select(info, duration)
+        cuts = self._sponsor_cuts(info, ydl, duration) if self._skip else []
+        if sections is None and not cuts:
+            return [{}]
+        numbered = sections is not None and len(sections) > 1
+        pieces: list[dict[str, Any]] = []
+        for n, (title, start, end) in enumerate(sections or [(None, 0.0, duration or math.inf)], start=1):
+            title = f"{n:02d} {title}" if numbered and title else title
+            for piece_start, piece_end in _subtract(start, end, cuts):
+                pieces.append({
+                    "start_time": piece_start,
+                    "end_time": piece_end,
+                    "title": title,
+                    "index": len(pieces) + 1,
+                })
+        if not pieces:
+            raise ValueError(NO_SECTIONS)
+        if duration:
+            kept = sum(min(p["end_time"], duration) - p["start_time"] for p in pieces)
+            self.kept[info.get("id") or ""] = (kept, duration)
+            self._note(f"Downloading {_clock(kept)} of {_clock(duration)} in {len(pieces)} piece(s)")
+        return pieces
+
+    def _select(self, info: dict[str, Any], duration: float) -> list[tuple[str | None, float, float]] | None:
+        if not self._ranges and self._chapters is None:
+            return None
+        chosen: list[tuple[float, float, str | None]] = []
+        if self._chapters is not None:
+            for chapter in info.get("chapters") or ():
+                if self._chapters.search(chapter.get("title") or ""):
+                    chosen.append((chapter["start_time"], chapter["end_time"], chapter.get("title")))
+            if not chosen and not self._ranges:
+                raise ValueError(
+                    f"{NO_SECTIONS}: no chapter matches {self._chapters.pattern!r}"
+                    if info.get("chapters") else f"{NO_SECTIONS}: the video has no chapters",
+                )
+        for start, end in self._ranges:
+            end = min(end, duration) if duration else end
+            if start < end:
+                chosen.append((start, end, f"{_clock(start)}-{_clock(end) if end < math.inf else 'end'}"))
+        if not chosen:
+            raise ValueError(f"{NO_SECTIONS}: the time ranges are past the end of the video")
+        if len(chosen) == 1:
+            return [(chosen[0][2], chosen[0][0], chosen[0][1])]
+        titles: dict[float, str | None] = {}
+        for start, _, title in sorted(chosen):
+            titles.setdefault(start, title)
+        merged = _merge([(start, end) for start, end, _ in chosen])
+        return [(titles.get(start), start, end) for start, end in merged]
+
+    def _sponsor_cuts(self, info: dict[str, Any], ydl: Any, duration: float) -> list[tuple[float, float]]:
+        if info.get("extractor_key") not in SponsorBlockPP.EXTRACTORS:
+            return []
+        if not duration:
+            self._note("SponsorBlock segments cannot be skipped: the video duration is unknown")
+            return []
+        pp = (
+            CachedSponsorBlockPP(ydl, self._sponsors, _SKIP_CATEGORIES)
+            if self._sponsors is not None else SponsorBlockPP(ydl, _SKIP_CATEGORIES)
+        )
+        chapters = pp._get_sponsor_chapters(info, duration)
+        return _merge([(c["start_time"], c["end_time"]) for c in chapters if c["type"] == "skip"])
+
+    def _note(self, msg: str) -> None:
+        if self._on_note is not None:
+            self._on_note(msg)
+
+class JoinSectionsPP(FFmpegPostProcessor):
+
+    def __init__(
+        self,
+        downloader: Any,
+        plan: SectionPlan,
+        on_joined: JoinedCallback | None = None,
+        on_note: NoteCallback | None = None,
+    ) -> None:
+        super().__init__(downloader)
+        self._plan = plan
+        self._on_joined = on_joined
+        self._on_note = on_note
+
+    @classmethod
+    def pp_key(cls) -> str:
+        return "JoinSections"
+
+    def run(self, info: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+        groups: dict[str | None, list[dict[str, Any]]] = {}
+        for d in info.get("requested_downloads") or ():
+            if d.get("section_number") and d.get("filepath") and os.path.exists(d["filepath"]):
+                groups.setdefault(d.get("section_title"), []).append(d)
+        if not groups:
+            return [], info
+
+        size = 0
+        for downloads in groups.values():
+            paths = [d["filepath"] for d in downloads]
+            root, ext = os.path.splitext(paths[0])
+            target = os.path.splitext(root)[0] + ext
+            if len(paths) == 1:
+                os.replace(paths[0], target)
+            else:
+                self.concat_files(paths, target)
+                for path in paths:
+                    os.remove(path)
+                if self._on_note is not None:
+                    self._on_note(f"Joined {len(paths)} pieces into {os.path.basename(target)}")
+            for d in downloads:
+                d["filepath"] = target
+            info["filepath"] = target
+            size += os.path.getsize(target)
+
+        kept, duration = self._plan.kept.get(info.get("id") or "", (0.0, 0.0))
+        saved = int(size * (duration - kept) / kept) if 0 < kept < duration else 0
+        if self._on_joined is not None:
+            self._on_joined(info["filepath"], saved, kept, duration)
+        return [], info
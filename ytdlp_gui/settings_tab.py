@@ -7,19 +7,26 @@ from typing import TYPE_CHECKING
 
 import customtkinter as ctk
 
+from .cancel import CLEANUP_POLICIES
 from .config import SettingsManager
+from .content_index import LINK_MODES
 from .models import AudioCodec, OutputFormat, QualityPreset
-from .utils import ffmpeg_installed
+from .proxies import parse_proxies
+from .timeplan import format_profiles, parse_profiles
+from .utils import ffmpeg_installed, format_speed
 
 if TYPE_CHECKING:
     from .app import App
 
+_PROXY_STATS_MS = 2000
+
 class SettingsTab(ctk.CTkFrame):
     def __init__(self, master: ctk.CTkFrame, app: App) -> None:
         super().__init__(master, fg_color="transparent")
         self.app = app
         self.sm: SettingsManager = app.settings
         self._build()
+        self._refresh_proxy_stats()
 
     def _build(self) -> None:
         scroll = ctk.CTkScrollableFrame(self)
@@ -81,6 +88,25 @@ class SettingsTab(ctk.CTkFrame):
             values=["1", "2", "4", "6", "8"],
         ).pack(side="left")
 
+        self.process_mode_var = tk.BooleanVar(value=self.sm.settings.process_mode)
+        ctk.CTkCheckBox(
+            scroll, text="Run each download in a separate worker process",
+            variable=self.process_mode_var,
+        ).pack(anchor="w", pady=2)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Finished tasks kept:", width=160, anchor="w").pack(side="left")
+        self.recent_tasks_var = tk.StringVar(value=str(self.sm.settings.recent_tasks))
+        ctk.CTkEntry(row, textvariable=self.recent_tasks_var, width=80).pack(side="left")
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Thumbnail cache:", width=160, anchor="w").pack(side="left")
+        self.thumbnail_cache_var = tk.StringVar(value=str(self.sm.settings.thumbnail_cache_mb))
+        ctk.CTkEntry(row, textvariable=self.thumbnail_cache_var, width=80).pack(side="left")
+        ctk.CTkLabel(row, text="MB", text_color="gray").pack(side="left", padx=4)
+
         self._section(scroll, "Audio Defaults")
 
         row = ctk.CTkFrame(scroll, fg_color="transparent")
@@ -117,6 +143,28 @@ class SettingsTab(ctk.CTkFrame):
         self.sponsorblock_var = tk.BooleanVar(value=self.sm.settings.sponsorblock)
         ctk.CTkCheckBox(scroll, text="Remove SponsorBlock segments", variable=self.sponsorblock_var).pack(anchor="w", pady=2)
 
+        self.sponsor_skip_var = tk.BooleanVar(value=self.sm.settings.sponsor_skip)
+        ctk.CTkCheckBox(
+            scroll, text="Skip sponsor segments while downloading instead of cutting them afterwards",
+            variable=self.sponsor_skip_var,
+        ).pack(anchor="w", pady=2)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="SponsorBlock API:", width=160, anchor="w").pack(side="left")
+        self.sponsor_api_var = tk.StringVar(value=self.sm.settings.sponsor_api)
+        ctk.CTkEntry(row, textvariable=self.sponsor_api_var, width=240).pack(side="left")
+        ctk.CTkLabel(row, text="Cache for:", width=80, anchor="e").pack(side="left", padx=(0, 4))
+        self.sponsor_cache_var = tk.StringVar(value=str(self.sm.settings.sponsor_cache_hours))
+        ctk.CTkEntry(row, textvariable=self.sponsor_cache_var, width=60).pack(side="left")
+        ctk.CTkLabel(row, text="hours", text_color="gray").pack(side="left", padx=4)
+
+        self.sponsor_offline_var = tk.BooleanVar(value=self.sm.settings.sponsor_offline)
+        ctk.CTkCheckBox(
+            scroll, text="Offline SponsorBlock: use only cached segments, never query the API",
+            variable=self.sponsor_offline_var,
+        ).pack(anchor="w", pady=2)
+
         self._section(scroll, "Network")
 
         row = ctk.CTkFrame(scroll, fg_color="transparent")
@@ -128,6 +176,30 @@ class SettingsTab(ctk.CTkFrame):
             placeholder_text="socks5://127.0.0.1:1080 or http://proxy:8080",
         ).pack(side="left")
 
+        ctk.CTkLabel(
+            scroll, text="Proxy pool, one per line (used when the proxy above is empty):",
+            text_color="gray", font=ctk.CTkFont(size=10),
+        ).pack(anchor="w")
+        self.proxy_pool_box = ctk.CTkTextbox(scroll, height=70, font=ctk.CTkFont(family="Courier", size=12))
+        self.proxy_pool_box.pack(fill="x", pady=2)
+        self.proxy_pool_box.insert("1.0", "\n".join(self.sm.settings.proxy_pool))
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Tasks per proxy:", width=160, anchor="w").pack(side="left")
+        self.proxy_limit_var = tk.StringVar(value=str(self.sm.settings.proxy_limit))
+        ctk.CTkEntry(row, textvariable=self.proxy_limit_var, width=80).pack(side="left")
+        ctk.CTkLabel(row, text="Cooldown:", width=80, anchor="e").pack(side="left", padx=(0, 4))
+        self.proxy_cooldown_var = tk.StringVar(value=str(self.sm.settings.proxy_cooldown))
+        ctk.CTkEntry(row, textvariable=self.proxy_cooldown_var, width=80).pack(side="left")
+        ctk.CTkLabel(row, text="seconds after a 429/403", text_color="gray").pack(side="left", padx=4)
+
+        self.proxy_stats_lbl = ctk.CTkLabel(
+            scroll, text="", anchor="w", justify="left",
+            font=ctk.CTkFont(family="Courier", size=11), text_color="gray",
+        )
+        self.proxy_stats_lbl.pack(anchor="w")
+
         row = ctk.CTkFrame(scroll, fg_color="transparent")
         row.pack(fill="x", pady=2)
         ctk.CTkLabel(row, text="Speed limit:", width=160, anchor="w").pack(side="left")
@@ -152,12 +224,82 @@ class SettingsTab(ctk.CTkFrame):
         ctk.CTkEntry(row, textvariable=self.timeout_var, width=80).pack(side="left")
         ctk.CTkLabel(row, text="seconds", text_color="gray").pack(side="left", padx=4)
 
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Connections per host:", width=160, anchor="w").pack(side="left")
+        self.conn_per_host_var = tk.StringVar(value=str(self.sm.settings.max_connections_per_host))
+        ctk.CTkEntry(row, textvariable=self.conn_per_host_var, width=80).pack(side="left")
+        ctk.CTkLabel(row, text="kept alive and shared by all downloads", text_color="gray").pack(side="left", padx=4)
+
         row = ctk.CTkFrame(scroll, fg_color="transparent")
         row.pack(fill="x", pady=2)
         ctk.CTkLabel(row, text="Fragment retries:", width=160, anchor="w").pack(side="left")
         self.frag_retry_var = tk.StringVar(value=str(self.sm.settings.fragment_retries))
         ctk.CTkEntry(row, textvariable=self.frag_retry_var, width=80).pack(side="left")
 
+        self._section(scroll, "Remote Control API")
+
+        self.api_enabled_var = tk.BooleanVar(value=self.sm.settings.api_enabled)
+        ctk.CTkCheckBox(
+            scroll, text="Enable REST/JSON control API",
+            variable=self.api_enabled_var,
+        ).pack(anchor="w", pady=2)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Listen address:", width=160, anchor="w").pack(side="left")
+        self.api_host_var = tk.StringVar(value=self.sm.settings.api_host)
+        ctk.CTkEntry(row, textvariable=self.api_host_var, width=160).pack(side="left", padx=(0, 4))
+        self.api_port_var = tk.StringVar(value=str(self.sm.settings.api_port))
+        ctk.CTkEntry(row, textvariable=self.api_port_var, width=80).pack(side="left")
+        ctk.CTkLabel(row, text="0.0.0.0 exposes it to the LAN", text_color="gray", font=ctk.CTkFont(size=10)).pack(side="left", padx=6)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Access token:", width=160, anchor="w").pack(side="left")
+        self.api_token_var = tk.StringVar(value=self.sm.settings.api_token)
+        ctk.CTkEntry(
+            row, textvariable=self.api_token_var, width=280, show="•",
+            placeholder_text="Bearer token (recommended for LAN)",
+        ).pack(side="left")
+
+        self._section(scroll, "Subscriptions")
+
+        self.subs_enabled_var = tk.BooleanVar(value=self.sm.settings.subscriptions_enabled)
+        ctk.CTkCheckBox(
+            scroll, text="Re-sync subscribed channels and playlists automatically",
+            variable=self.subs_enabled_var,
+        ).pack(anchor="w", pady=2)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Check every (min):", width=160, anchor="w").pack(side="left")
+        self.subs_interval_var = tk.StringVar(value=str(self.sm.settings.subscription_interval))
+        ctk.CTkEntry(row, textvariable=self.subs_interval_var, width=80).pack(side="left")
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Syncs per minute:", width=160, anchor="w").pack(side="left")
+        self.subs_rate_var = tk.StringVar(value=str(self.sm.settings.subscription_rate))
+        ctk.CTkEntry(row, textvariable=self.subs_rate_var, width=80).pack(side="left")
+        ctk.CTkLabel(row, text="caps requests to the site", text_color="gray", font=ctk.CTkFont(size=10)).pack(side="left", padx=6)
+
+        self._section(scroll, "Schedule")
+
+        self.schedule_enabled_var = tk.BooleanVar(value=self.sm.settings.schedule_enabled)
+        ctk.CTkCheckBox(
+            scroll, text="Switch bandwidth/concurrency profiles by time of day",
+            variable=self.schedule_enabled_var,
+        ).pack(anchor="w", pady=2)
+
+        ctk.CTkLabel(
+            scroll, text="One profile per line: name HH:MM-HH:MM rate [slots]   e.g. daytime 08:00-23:00 2M 1",
+            text_color="gray", font=ctk.CTkFont(size=10),
+        ).pack(anchor="w")
+        self.schedule_box = ctk.CTkTextbox(scroll, height=90, font=ctk.CTkFont(family="Courier", size=12))
+        self.schedule_box.pack(fill="x", pady=2)
+        self.schedule_box.insert("1.0", format_profiles(self.sm.settings.schedule_profiles))
+
         self._section(scroll, "File Handling")
 
         self.win_fn_var = tk.BooleanVar(value=self.sm.settings.windows_filenames)
@@ -169,6 +311,38 @@ class SettingsTab(ctk.CTkFrame):
         self.overwrite_var = tk.BooleanVar(value=self.sm.settings.overwrites)
         ctk.CTkCheckBox(scroll, text="Overwrite existing files", variable=self.overwrite_var).pack(anchor="w", pady=2)
 
+        self.dedup_var = tk.BooleanVar(value=self.sm.settings.dedup_enabled)
+        ctk.CTkCheckBox(
+            scroll, text="Reuse identical earlier downloads instead of downloading again",
+            variable=self.dedup_var,
+        ).pack(anchor="w", pady=2)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Reuse by:", width=160, anchor="w").pack(side="left")
+        self.dedup_link_var = tk.StringVar(value=self.sm.settings.dedup_link)
+        ctk.CTkOptionMenu(row, values=list(LINK_MODES), variable=self.dedup_link_var, width=110).pack(side="left")
+        ctk.CTkLabel(row, text="auto: hardlink → reflink → copy", text_color="gray", font=ctk.CTkFont(size=10)).pack(side="left", padx=6)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Partial files on cancel:", width=160, anchor="w").pack(side="left")
+        self.cancel_cleanup_var = tk.StringVar(value=self.sm.settings.cancel_cleanup)
+        ctk.CTkOptionMenu(row, values=list(CLEANUP_POLICIES), variable=self.cancel_cleanup_var, width=110).pack(side="left")
+        ctk.CTkLabel(row, text="keep: resume if added again", text_color="gray", font=ctk.CTkFont(size=10)).pack(side="left", padx=6)
+
+        self.verify_var = tk.BooleanVar(value=self.sm.settings.verify_downloads)
+        ctk.CTkCheckBox(
+            scroll, text="Verify finished files with ffprobe (re-download if corrupt)",
+            variable=self.verify_var,
+        ).pack(anchor="w", pady=2)
+
+        row = ctk.CTkFrame(scroll, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkLabel(row, text="Parallel ffprobe checks:", width=160, anchor="w").pack(side="left")
+        self.verify_workers_var = tk.StringVar(value=str(self.sm.settings.verify_workers))
+        ctk.CTkEntry(row, textvariable=self.verify_workers_var, width=80).pack(side="left")
+
         self._section(scroll, "Status")
 
         status_row = ctk.CTkFrame(scroll, fg_color="transparent")
@@ -218,6 +392,12 @@ class SettingsTab(ctk.CTkFrame):
             self.cookies_var.set(f)
 
     def _save(self) -> None:
+        try:
+            profiles = parse_profiles(self.schedule_box.get("1.0", "end"))
+        except ValueError as exc:
+            self.status_lbl.configure(text=f"Schedule: {exc}", text_color="#f44336")
+            return
+
         s = self.sm.settings
         s.theme = self.theme_var.get()
         s.quality = self.quality_var.get()
@@ -231,6 +411,15 @@ class SettingsTab(ctk.CTkFrame):
             s.concurrent_fragments = max(1, min(8, int(self.fragments_var.get())))
         except ValueError:
             s.concurrent_fragments = 4
+        s.process_mode = self.process_mode_var.get()
+        try:
+            s.recent_tasks = min(10_000, max(0, int(self.recent_tasks_var.get())))
+        except ValueError:
+            s.recent_tasks = 500
+        try:
+            s.thumbnail_cache_mb = max(1, int(self.thumbnail_cache_var.get()))
+        except ValueError:
+            s.thumbnail_cache_mb = 100
 
         s.audio_codec = self.audio_codec_var.get()
         try:
@@ -240,7 +429,23 @@ class SettingsTab(ctk.CTkFrame):
         s.subtitle_langs = self.subtitle_var.get().strip()
         s.chapters = self.chapters_var.get()
         s.sponsorblock = self.sponsorblock_var.get()
+        s.sponsor_skip = self.sponsor_skip_var.get()
+        s.sponsor_api = self.sponsor_api_var.get().strip() or "https://sponsor.ajay.app"
+        try:
+            s.sponsor_cache_hours = max(0, int(self.sponsor_cache_var.get()))
+        except ValueError:
+            s.sponsor_cache_hours = 24
+        s.sponsor_offline = self.sponsor_offline_var.get()
         s.proxy = self.proxy_var.get().strip()
+        s.proxy_pool = parse_proxies(self.proxy_pool_box.get("1.0", "end"))
+        try:
+            s.proxy_limit = min(16, max(1, int(self.proxy_limit_var.get())))
+        except ValueError:
+            s.proxy_limit = 2
+        try:
+            s.proxy_cooldown = max(0, int(self.proxy_cooldown_var.get()))
+        except ValueError:
+            s.proxy_cooldown = 300
         s.cookies_path = self.cookies_var.get().strip()
         try:
             s.speed_limit = max(0, int(self.speed_var.get().strip() or "0"))
@@ -251,14 +456,47 @@ class SettingsTab(ctk.CTkFrame):
             s.socket_timeout = max(5, int(self.timeout_var.get()))
         except ValueError:
             s.socket_timeout = 30
+        try:
+            s.max_connections_per_host = min(32, max(1, int(self.conn_per_host_var.get())))
+        except ValueError:
+            s.max_connections_per_host = 8
         try:
             s.fragment_retries = max(0, int(self.frag_retry_var.get()))
         except ValueError:
             s.fragment_retries = 10
 
+        s.api_enabled = self.api_enabled_var.get()
+        s.api_host = self.api_host_var.get().strip() or "127.0.0.1"
+        try:
+            s.api_port = min(65535, max(1, int(self.api_port_var.get())))
+        except ValueError:
+            s.api_port = 8765
+        s.api_token = self.api_token_var.get().strip()
+
+        s.subscriptions_enabled = self.subs_enabled_var.get()
+        try:
+            s.subscription_interval = max(5, int(self.subs_interval_var.get()))
+        except ValueError:
+            s.subscription_interval = 60
+        try:
+            s.subscription_rate = min(120, max(1, int(self.subs_rate_var.get())))
+        except ValueError:
+            s.subscription_rate = 30
+
+        s.schedule_enabled = self.schedule_enabled_var.get()
+        s.schedule_profiles = profiles
+
         s.windows_filenames = self.win_fn_var.get()
         s.restrict_filenames = self.restrict_fn_var.get()
         s.overwrites = self.overwrite_var.get()
+        s.dedup_enabled = self.dedup_var.get()
+        s.dedup_link = self.dedup_link_var.get()
+        s.cancel_cleanup = self.cancel_cleanup_var.get()
+        s.verify_downloads = self.verify_var.get()
+        try:
+            s.verify_workers = min(8, max(1, int(self.verify_workers_var.get())))
+        except ValueError:
+            s.verify_workers = 2
 
         self.sm.save()
         self._reload_engine()
@@ -280,19 +518,57 @@ class SettingsTab(ctk.CTkFrame):
         self.output_dir_var.set(s.output_dir)
         self.parallel_var.set(str(s.max_concurrent))
         self.fragments_var.set(str(s.concurrent_fragments))
+        self.process_mode_var.set(s.process_mode)
+        self.recent_tasks_var.set(str(s.recent_tasks))
+        self.thumbnail_cache_var.set(str(s.thumbnail_cache_mb))
         self.audio_codec_var.set(s.audio_codec)
         self.audio_quality_var.set(str(s.audio_quality))
         self.subtitle_var.set(s.subtitle_langs)
         self.chapters_var.set(s.chapters)
         self.sponsorblock_var.set(s.sponsorblock)
+        self.sponsor_skip_var.set(s.sponsor_skip)
+        self.sponsor_api_var.set(s.sponsor_api)
+        self.sponsor_cache_var.set(str(s.sponsor_cache_hours))
+        self.sponsor_offline_var.set(s.sponsor_offline)
         self.proxy_var.set(s.proxy)
+        self.proxy_pool_box.delete("1.0", "end")
+        self.proxy_pool_box.insert("1.0", "\n".join(s.proxy_pool))
+        self.proxy_limit_var.set(str(s.proxy_limit))
+        self.proxy_cooldown_var.set(str(s.proxy_cooldown))
         self.cookies_var.set(s.cookies_path)
         self.speed_var.set(str(s.speed_limit))
         self.timeout_var.set(str(s.socket_timeout))
+        self.conn_per_host_var.set(str(s.max_connections_per_host))
         self.frag_retry_var.set(str(s.fragment_retries))
+        self.api_enabled_var.set(s.api_enabled)
+        self.api_host_var.set(s.api_host)
+        self.api_port_var.set(str(s.api_port))
+        self.api_token_var.set(s.api_token)
+        self.subs_enabled_var.set(s.subscriptions_enabled)
+        self.subs_interval_var.set(str(s.subscription_interval))
+        self.subs_rate_var.set(str(s.subscription_rate))
+        self.schedule_enabled_var.set(s.schedule_enabled)
+        self.schedule_box.delete("1.0", "end")
+        self.schedule_box.insert("1.0", format_profiles(s.schedule_profiles))
         self.win_fn_var.set(s.windows_filenames)
         self.restrict_fn_var.set(s.restrict_filenames)
         self.overwrite_var.set(s.overwrites)
+        self.dedup_var.set(s.dedup_enabled)
+        self.dedup_link_var.set(s.dedup_link)
+        self.cancel_cleanup_var.set(s.cancel_cleanup)
+        self.verify_var.set(s.verify_downloads)
+        self.verify_workers_var.set(str(s.verify_workers))
+
+    def _refresh_proxy_stats(self) -> None:
+        engine = getattr(self.app, "engine", None)
+        rows = engine.proxy_stats() if engine is not None else []
+        self.proxy_stats_lbl.configure(text="\n".join(
+            f"{p['proxy']:<36} {p['active']}/{p['limit']}  {format_speed(p['rate']):>11}"
+            f"  429/403: {p['throttled']}  fail: {p['failed']}"
+            + (f"  cooling {p['cooling']:.0f}s" if p["cooling"] else "")
+            for p in rows
+        ))
+        self.after(_PROXY_STATS_MS, self._refresh_proxy_stats)
 
     def _reload_engine(self) -> None:
         if hasattr(self.app, "rebuild_engine"):
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from yt_dlp.postprocessor.sponsorblock import SponsorBlockPP
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API = "https://sponsor.ajay.app"
+
+_PREFIX = 4
+_ACTION_TYPES = ("skip", "poi", "chapter")
+_FETCH_WORKERS = 2
+_RATE_LIMIT_BACKOFF = 60.0
+_USER_AGENT = "ytdlp-gui (SponsorBlock cache)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    service TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (service, video_id)
+);
+"""
+
+def service_for(info: dict[str, Any]) -> str | None:
+    return SponsorBlockPP.EXTRACTORS.get(info.get("extractor_key") or info.get("ie_key") or "")
+
+def _prefix(video_id: str) -> str:
+    return hashlib.sha256(video_id.encode("ascii")).hexdigest()[:_PREFIX]
+
+class SponsorCache:
+
+    def __init__(
+        self,
+        path: str | Path,
+        api: str = DEFAULT_API,
+        ttl: float = 86400.0,
+        offline: bool = False,
+        timeout: float = 10.0,
+    ) -> None:
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(path), isolation_level=None, check_same_thread=False, timeout=30.0,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple[str, str], threading.Event] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._timeout = timeout
+        self._backoff_until = 0.0
+        self.api = DEFAULT_API
+        self.ttl = 0.0
+        self.offline = False
+        self.configure(api, ttl, offline)
+        self.hits = 0
+        self.fetched = 0
+        self.stale = 0
+        self.misses = 0
+        self.requests = 0
+        self.errors = 0
+
+    def configure(self, api: str, ttl: float, offline: bool) -> None:
+        api = (api or DEFAULT_API).rstrip("/")
+        self.api = api if re.match(r"https?://", api) else f"https://{api}"
+        self.ttl = max(0.0, ttl)
+        self.offline = offline
+
+    def segments(self, video_id: str, service: str = "YouTube") -> list[dict[str, Any]] | None:
+        row = self._lookup(service, video_id)
+        if row is not None and (self.offline or time.time() - row[0] < self.ttl):
+            counter = "hits"
+        elif self.offline:
+            counter = "misses"
+        else:
+            self._fetch(service, _prefix(video_id), {video_id})
+            fresh = self._lookup(service, video_id)
+            if fresh is not None and (row is None or fresh[0] > row[0]):
+                row, counter = fresh, "fetched"
+            else:
+                counter = "misses" if row is None else "stale"
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        return json.loads(row[1]) if row is not None else None
+
+    def prefetch(self, video_ids: Iterable[str], service: str = "YouTube") -> int:
+        if self.offline:
+            return 0
+        now = time.time()
+        groups: dict[str, set[str]] = {}
+        for video_id in dict.fromkeys(video_ids):
+            row = self._lookup(service, video_id)
+            if row is None or now - row[0] >= self.ttl:
+                groups.setdefault(_prefix(video_id), set()).add(video_id)
+        if not groups:
+            return 0
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(_FETCH_WORKERS, thread_name_prefix="sponsorblock")
+            executor = self._executor
+        for prefix, ids in groups.items():
+            executor.submit(self._fetch, service, prefix, ids)
+        return sum(len(ids) for ids in groups.values())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "fetched": self.fetched,
+                "stale": self.stale,
+                "misses": self.misses,
+                "requests": self.requests,
+                "errors": self.errors,
+                "offline": self.offline,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._db.close()
+
+    def _lookup(self, service: str, video_id: str) -> tuple[float, str] | None:
+        with self._lock:
+            return self._db.execute(
+                "SELECT fetched, data FROM segments WHERE service = ? AND video_id = ?",
+                (service, video_id),
+            ).fetchone()
+
+    def _fetch(self, service: str, prefix: str, video_ids: set[str]) -> None:
+        key = (service, prefix)
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                self._inflight[key] = threading.Event()
+        if pending is not None:
+            started = time.time()
+            pending.wait(self._timeout * 2)
+            missing = {v for v in video_ids if (self._lookup(service, v) or (0.0,))[0] < started}
+            if not missing:
+                return
+            video_ids = missing
+        try:
+            found = self._request(service, prefix)
+            if found is None:
+                return
+            now = time.time()
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO segments (service, video_id, fetched, data) VALUES (?, ?, ?, ?)",
+                    [(service, v, now, json.dumps(found.get(v, []))) for v in video_ids],
+                )
+        except sqlite3.Error as exc:
+            logger.warning("SponsorBlock cache write failed: %s", exc)
+        finally:
+            if pending is None:
+                with self._lock:
+                    self._inflight.pop(key).set()
+
+    def _request(self, service: str, prefix: str) -> dict[str, list[dict[str, Any]]] | None:
+        if time.monotonic() < self._backoff_until:
+            return None
+        query = urllib.parse.urlencode({
+            "service": service,
+            "categories": json.dumps(list(SponsorBlockPP.CATEGORIES)),
+            "actionTypes": json.dumps(list(_ACTION_TYPES)),
+        })
+        request = urllib.request.Request(
+            f"{self.api}/api/skipSegments/{prefix}?{query}", headers={"User-Agent": _USER_AGENT},
+        )
+        with self._lock:
+            self.requests += 1
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as resp:
+                data = json.load(resp)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:
+                return {}
+            if exc.code == 429:
+                self._backoff_until = time.monotonic() + _RATE_LIMIT_BACKOFF
+            self._fail(f"HTTP Error {exc.code}")
+            return None
+        except (OSError, ValueError) as exc:
+            self._fail(str(exc))
+            return None
+        return {
+            d["videoID"]: d.get("segments") or []
+            for d in data if isinstance(d, dict) and "videoID" in d
+        }
+
+    def _fail(self, reason: str) -> None:
+        with self._lock:
+            self.errors += 1
+        logger.warning("SponsorBlock API request failed: %s", reason)
+
+class CachedSponsorBlockPP(SponsorBlockPP):
+
+    def __init__(self, downloader: Any, cache: SponsorCache, categories: Iterable[str] | None = None) -> None:
+        super().__init__(downloader, categories, cache.api)
+        self._cache = cache
+
+    @classmethod
+    def pp_key(cls) -> str:
+        return "SponsorBlock"
+
+    def _get_sponsor_segments(self, video_id: str, service: str) -> list[dict[str, Any]]:
+        segments = self._cache.segments(video_id, service)
+        if segments is None:
+            self.report_warning(
+                "No cached SponsorBlock segments for this video (offline mode)"
+                if self._cache.offline else "SponsorBlock segments are unavailable right now",
+            )
+            return []
+        return [s for s in segments if s.get("category") in self._categories]
@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+
+from .config import (
+    AppSettings,
+    SettingsManager,
+    load_subscriptions,
+    save_subscriptions,
+    task_defaults,
+)
+from .engine import DownloadEngine, engine_from_settings, iter_entries
+from .models import DownloadTask, Subscription, task_from_dict
+
+logger = logging.getLogger(__name__)
+
+SubmitHook = Callable[[DownloadTask], None]
+
+_INITIAL_SCAN = 30
+_MAX_SCAN = 200
+_SEEN_LIMIT = 500
+_MAX_BACKOFF = 24 * 3600
+
+_CHANNEL_ROOT = re.compile(
+    r"^(https?://(?:www\.|m\.)?youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+))/?(?:[?#].*)?$",
+)
+
+def uploads_url(url: str) -> str:
+    m = _CHANNEL_ROOT.match(url.strip())
+    return f"{m.group(1)}/videos" if m else url.strip()
+
+def describe(sub: Subscription) -> dict[str, Any]:
+    data = asdict(sub)
+    data["seen"] = len(sub.seen)
+    return data
+
+class SubscriptionManager:
+
+    def __init__(
+        self,
+        engine: DownloadEngine,
+        settings: AppSettings,
+        *,
+        submit: SubmitHook | None = None,
+        auto: bool = True,
+    ) -> None:
+        self._engine = engine
+        self._settings = settings
+        self._submit = submit or engine.submit
+        self._auto = auto
+        self._subs: dict[str, Subscription] = {}
+        for raw in load_subscriptions():
+            try:
+                sub = Subscription(**raw)
+            except TypeError:
+                logger.warning("Skipping malformed subscription: %r", raw)
+                continue
+            self._subs[sub.id] = sub
+        self._backfill: dict[str, int] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._due: dict[str, float] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = threading.Event()
+        self._next_request = 0.0
+        self._dirty = False
+        self._thread: threading.Thread | None = None
+        self._requests = 0
+        self._queued = 0
+        if auto:
+            for sub in self._subs.values():
+                self._schedule(sub)
+
+    def subscriptions(self) -> list[Subscription]:
+        with self._cond:
+            return list(self._subs.values())
+
+    def get(self, sub_id: str) -> Subscription | None:
+        with self._cond:
+            return self._subs.get(sub_id)
+
+    def add(
+        self,
+        url: str,
+        options: dict[str, Any] | None = None,
+        *,
+        interval: int = 0,
+        backfill: int = 0,
+    ) -> Subscription:
+        url = url.strip()
+        if not url:
+            raise ValueError("url is required")
+        target = uploads_url(url)
+        with self._cond:
+            for existing in self._subs.values():
+                if uploads_url(existing.url) == target:
+                    raise ValueError(f"Already subscribed as {existing.id}")
+            sub = Subscription(url=url, options=dict(options or {}), interval=max(0, interval))
+            self._subs[sub.id] = sub
+            self._backfill[sub.id] = max(0, backfill)
+            self._push(sub.id, 0.0)
+            self._dirty = True
+        return sub
+
+    def remove(self, sub_id: str) -> bool:
+        with self._cond:
+            sub = self._subs.pop(sub_id, None)
+            self._due.pop(sub_id, None)
+            self._backfill.pop(sub_id, None)
+            if sub is not None:
+                self._dirty = True
+                self._cond.notify_all()
+        return sub is not None
+
+    def sync_now(self, sub_id: str | None = None) -> bool:
+        with self._cond:
+            ids = [sub_id] if sub_id is not None else list(self._subs)
+            if sub_id is not None and sub_id not in self._subs:
+                return False
+            for i in ids:
+                self._push(i, 0.0)
+        return True
+
+    def reschedule(self, auto: bool) -> None:
+        with self._cond:
+            self._auto = auto
+            pending = {i for i, due in self._due.items() if due == 0.0}
+            self._heap.clear()
+            self._due.clear()
+            for sub in self._subs.values():
+                if sub.id in pending:
+                    self._push(sub.id, 0.0)
+                elif auto:
+                    self._schedule(sub)
+            self._cond.notify_all()
+
+    def attach(self, engine: DownloadEngine, settings: AppSettings) -> None:
+        self._engine = engine
+        self._settings = settings
+        self.reschedule(settings.subscriptions_enabled)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            now = time.time()
+            return {
+                "subscriptions": len(self._subs),
+                "due": sum(1 for due in self._due.values() if due <= now),
+                "failing": sum(1 for s in self._subs.values() if s.failures),
+                "requests": self._requests,
+                "queued": self._queued,
+            }
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="subscriptions")
+            self._thread.start()
+
+    def close(self) -> None:
+        self._closing.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        self._save()
+
+    def sync_due(self, everything: bool = False) -> list[DownloadTask]:
+        with self._cond:
+            now = time.time()
+            subs = [
+                s for s in self._subs.values()
+                if everything or self._due.get(s.id, 0.0) <= now
+            ]
+        tasks: list[DownloadTask] = []
+        for sub in subs:
+            if self._closing.is_set():
+                break
+            self._pace()
+            tasks.extend(self.sync(sub))
+        self._save()
+        return tasks
+
+    def sync(self, sub: Subscription) -> list[DownloadTask]:
+        with self._cond:
+            seen = set(sub.seen)
+            first = not sub.last_sync
+            backfill = self._backfill.pop(sub.id, 0)
+            self._due.pop(sub.id, None)
+            self._requests += 1
+        options = {**task_defaults(self._settings), **sub.options}
+        limit = max(backfill, _INITIAL_SCAN) if first else _MAX_SCAN
+        fresh: list[dict[str, Any]] = []
+        known = False
+        try:
+            with self._engine.open_playlist(
+                uploads_url(sub.url), options.get("cookies_path", ""), options.get("proxy", ""),
+            ) as info:
+                if info is None:
+                    raise ValueError("No information returned")
+                title = info.get("channel") or info.get("uploader") or info.get("title") or ""
+                for entry in iter_entries(info, "", self._closing):
+                    vid = entry.get("id")
+                    if not vid:
+                        continue
+                    if vid in seen:
+                        known = True
+                        break
+                    fresh.append(entry)
+                    if len(fresh) >= limit:
+                        break
+        except Exception as exc:
+            logger.warning("Subscription sync failed for %s: %s", sub.url, exc)
+            with self._cond:
+                sub.failures += 1
+                sub.error = str(exc)
+                self._dirty = True
+                self._schedule(sub)
+            return []
+        if self._closing.is_set():
+            return []
+
+        if not first and not known and len(fresh) >= limit:
+            logger.warning(
+                "%s: none of the %d newest uploads were seen before; older ones are skipped",
+                sub.url, limit,
+            )
+        wanted = fresh[:backfill] if first else fresh
+        tasks: list[DownloadTask] = []
+        for entry in reversed(wanted):
+            url = entry.get("url") or entry.get("webpage_url")
+            if not url or "://" not in url:
+                continue
+            try:
+                tasks.append(task_from_dict({**options, "url": url, "playlist_mode": False}))
+            except (TypeError, ValueError) as exc:
+                logger.warning("Skipping %s: %s", url, exc)
+
+        with self._cond:
+            sub.title = title or sub.title
+            sub.seen = ([e["id"] for e in fresh] + sub.seen)[:_SEEN_LIMIT]
+            sub.last_sync = time.time()
+            sub.last_new = len(tasks)
+            sub.failures = 0
+            sub.error = ""
+            self._queued += len(tasks)
+            self._dirty = True
+            self._schedule(sub)
+        if tasks:
+            logger.info("%s: %d new upload(s)", sub.title or sub.url, len(tasks))
+            if options.get("sponsorblock"):
+                self._engine.prefetch_sponsors(wanted)
+        for task in tasks:
+            self._submit(task)
+        return tasks
+
+    def _interval(self, sub: Subscription) -> float:
+        minutes = sub.interval or self._settings.subscription_interval
+        return max(1, minutes) * 60.0
+
+    def _schedule(self, sub: Subscription) -> None:
+        if sub.id not in self._subs or (not self._auto and (sub.last_sync or sub.failures)):
+            return
+        if sub.failures:
+            due = time.time() + min(self._interval(sub) * 2 ** min(sub.failures, 10), _MAX_BACKOFF)
+        elif not sub.last_sync:
+            due = 0.0
+        else:
+            due = sub.last_sync + self._interval(sub)
+        self._push(sub.id, due)
+
+    def _push(self, sub_id: str, due: float) -> None:
+        current = self._due.get(sub_id)
+        if current is not None and current <= due:
+            return
+        self._due[sub_id] = due
+        heapq.heappush(self._heap, (due, next(self._seq), sub_id))
+        self._cond.notify_all()
+
+    def _pace(self) -> None:
+        gap = 60.0 / max(1, self._settings.subscription_rate)
+        now = time.monotonic()
+        wait = self._next_request - now
+        self._next_request = max(now, self._next_request) + gap
+        if wait > 0:
+            self._closing.wait(wait)
+
+    def _pop_due(self) -> Subscription | None:
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            due, _, sub_id = heapq.heappop(self._heap)
+            if self._due.get(sub_id) != due:
+                continue
+            del self._due[sub_id]
+            sub = self._subs.get(sub_id)
+            if sub is not None:
+                return sub
+        return None
+
+    def _save(self) -> None:
+        with self._cond:
+            if not self._dirty:
+                return
+            self._dirty = False
+            entries = [asdict(s) for s in self._subs.values()]
+        save_subscriptions(entries)
+
+    def _loop(self) -> None:
+        while not self._closing.is_set():
+            with self._cond:
+                sub = self._pop_due()
+                if sub is None and not self._dirty:
+                    while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                        heapq.heappop(self._heap)
+                    timeout = max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+                    self._cond.wait(timeout)
+                    continue
+            if sub is None:
+                self._save()
+                continue
+            self._pace()
+            if not self._closing.is_set():
+                self.sync(sub)
+
+def _wait_idle(engine: DownloadEngine) -> None:
+    while engine.active_count:
+        time.sleep(1.0)
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ytdlp_gui.subscriptions",
+        description="Follow channels and playlists and download only new uploads.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="subscribe to a channel or playlist")
+    add.add_argument("url")
+    add.add_argument("--backfill", type=int, default=0, help="also download the N newest existing uploads")
+    add.add_argument("--interval", type=int, default=0, help="minutes between syncs (default: settings)")
+    add.add_argument("--quality", default="")
+    add.add_argument("--format", default="")
+    add.add_argument("--output-dir", default="")
+
+    remove = sub.add_parser("remove", help="unsubscribe")
+    remove.add_argument("ids", nargs="+")
+
+    sub.add_parser("list", help="show subscriptions")
+
+    sync = sub.add_parser("sync", help="sync due subscriptions once and download new uploads")
+    sync.add_argument("--all", action="store_true", help="sync every subscription, not only due ones")
+    sync.add_argument("--cluster", default="", help="enqueue into a cluster queue file instead of downloading")
+
+    sub.add_parser("run", help="keep syncing on schedule and download new uploads")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    settings = SettingsManager().settings
+    engine = engine_from_settings(settings)
+    queue = None
+    submit: SubmitHook | None = None
+    if getattr(args, "cluster", ""):
+        from .cluster import ClusterQueue
+
+        queue = ClusterQueue(args.cluster)
+        submit = queue.enqueue
+    manager = SubscriptionManager(engine, settings, submit=submit, auto=True)
+    try:
+        if args.command == "add":
+            options = {
+                key: getattr(args, key)
+                for key in ("quality", "format", "output_dir") if getattr(args, key)
+            }
+            s = manager.add(args.url, options, interval=args.interval, backfill=args.backfill)
+            print(s.id, uploads_url(s.url))
+        elif args.command == "remove":
+            for sub_id in args.ids:
+                print(sub_id, "removed" if manager.remove(sub_id) else "not found")
+        elif args.command == "list":
+            for s in manager.subscriptions():
+                synced = time.strftime("%Y-%m-%d %H:%M", time.localtime(s.last_sync)) if s.last_sync else "never"
+                status = f"error: {s.error}" if s.error else f"{s.last_new} new"
+                print(f"{s.id}  {s.title or s.url}  synced {synced}  {status}")
+        elif args.command == "sync":
+            tasks = manager.sync_due(everything=args.all)
+            print(f"{len(tasks)} new upload(s)")
+            if queue is None:
+                _wait_idle(engine)
+        elif args.command == "run":
+            manager.start()
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        manager.close()
+        engine.shutdown()
+        if queue is not None:
+            queue.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import urllib.request
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from yt_dlp.networking import Request
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import YoutubeDLError, determine_ext, replace_extension
+
+from .utils import ffmpeg_path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_EXTS = ("jpg", "jpeg", "png", "webp", "gif")
+_FETCH_TIMEOUT = 15.0
+_RENDER_TIMEOUT = 15.0
+_PREVIEW_CACHE = 512
+_EVICT_TO = 0.9
+_USER_AGENT = "Mozilla/5.0"
+
+Opener = Callable[[str], Any]
+PreviewCallback = Callable[[Any], None]
+
+def thumbnail_url(info: dict[str, Any]) -> str:
+    if info.get("thumbnail"):
+        return info["thumbnail"]
+    thumbnails = [t for t in info.get("thumbnails") or () if t.get("url")]
+    if not thumbnails:
+        return ""
+    return max(thumbnails, key=lambda t: (
+        t["preference"] if t.get("preference") is not None else -1,
+        t.get("width") or -1,
+        t.get("height") or -1,
+    ))["url"]
+
+def render(path: str, size: tuple[int, int]) -> Any | None:
+    if Image is not None:
+        try:
+            with Image.open(path) as img:
+                img.draft("RGB", size)
+                preview = img.convert("RGB")
+            preview.thumbnail(size)
+            return preview
+        except (OSError, ValueError) as exc:
+            logger.debug("Could not render %s: %s", path, exc)
+            return None
+    exe = ffmpeg_path()
+    if exe is None:
+        return None
+    width, height = size
+    try:
+        proc = subprocess.run(
+            [
+                exe, "-v", "error", "-i", path,
+                "-vf", f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+                "-frames:v", "1", "-f", "image2pipe", "-c:v", "ppm", "-",
+            ],
+            capture_output=True, timeout=_RENDER_TIMEOUT, check=False,
+        )
+    except (OSError, subprocess.SubprocessError) as exc:
+        logger.debug("Could not render %s: %s", path, exc)
+        return None
+    return proc.stdout if proc.returncode == 0 and proc.stdout else None
+
+class ThumbnailCache:
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 100 * 1024 * 1024,
+        workers: int = 2,
+    ) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._inflight: dict[str, threading.Event] = {}
+        self._previews: OrderedDict[tuple[str, int, int], Any] = OrderedDict()
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="thumbnail")
+        self._size: int | None = None
+        self.hits = 0
+        self.fetched = 0
+        self.failed = 0
+        self.evicted = 0
+
+    def set_limit(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._pool.submit(self._account, 0)
+
+    def path_for(self, url: str) -> Path:
+        ext = determine_ext(url, "jpg").lower()
+        name = hashlib.sha1(url.encode()).hexdigest()[:24]
+        return self._dir / f"{name}.{ext if ext in _EXTS else 'jpg'}"
+
+    def cached(self, url: str) -> str | None:
+        path = self.path_for(url)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.hits += 1
+        return str(path)
+
+    def fetch(self, url: str, opener: Opener | None = None) -> str | None:
+        path = self.cached(url)
+        if path is not None:
+            return path
+        with self._lock:
+            pending = self._inflight.get(url)
+            if pending is None:
+                self._inflight[url] = threading.Event()
+        if pending is not None:
+            pending.wait(_FETCH_TIMEOUT * 2)
+            return self.cached(url)
+        try:
+            return self._download(url, opener)
+        finally:
+            with self._lock:
+                self._inflight.pop(url).set()
+
+    def preview(self, url: str, size: tuple[int, int], callback: PreviewCallback) -> None:
+        key = (url, *size)
+        with self._lock:
+            image = self._previews.get(key)
+            if image is not None:
+                self._previews.move_to_end(key)
+        if image is not None:
+            callback(image)
+            return
+        self._pool.submit(self._render, url, size, callback)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "bytes": self._size or 0,
+                "limit": self._max_bytes,
+                "hits": self.hits,
+                "fetched": self.fetched,
+                "failed": self.failed,
+                "evicted": self.evicted,
+                "previews": len(self._previews),
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _render(self, url: str, size: tuple[int, int], callback: PreviewCallback) -> None:
+        path = self.fetch(url)
+        image = render(path, size) if path is not None else None
+        if image is None:
+            return
+        with self._lock:
+            self._previews[(url, *size)] = image
+            while len(self._previews) > _PREVIEW_CACHE:
+                self._previews.popitem(last=False)
+        callback(image)
+
+    def _download(self, url: str, opener: Opener | None) -> str | None:
+        target = self.path_for(url)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}-{threading.get_ident()}.part")
+        try:
+            resp = opener(url) if opener is not None else urllib.request.urlopen(
+                urllib.request.Request(url, headers={"User-Agent": _USER_AGENT}), timeout=_FETCH_TIMEOUT,
+            )
+            with resp, open(tmp, "wb") as fh:
+                shutil.copyfileobj(resp, fh)
+            os.replace(tmp, target)
+            size = target.stat().st_size
+        except (OSError, YoutubeDLError) as exc:
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                self.failed += 1
+            logger.debug("Thumbnail %s not fetched: %s", url, exc)
+            return None
+        with self._lock:
+            self.fetched += 1
+        self._account(size)
+        return str(target)
+
+    def _account(self, added: int) -> None:
+        with self._disk_lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += added
+            if self._size <= self._max_bytes:
+                return
+            files = sorted(self._scan())
+            total = sum(size for _, size, _ in files)
+            evicted = 0
+            for _, size, path in files:
+                if total <= self._max_bytes * _EVICT_TO:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+            self._size = total
+        with self._lock:
+            self.evicted += evicted
+
+    def _scan(self) -> list[tuple[float, int, Path]]:
+        out: list[tuple[float, int, Path]] = []
+        for path in self._dir.iterdir():
+            if path.name.endswith(".part"):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+class CachedThumbnailPP(PostProcessor):
+
+    def __init__(self, downloader: Any, cache: ThumbnailCache) -> None:
+        super().__init__(downloader)
+        self._cache = cache
+
+    @classmethod
+    def pp_key(cls) -> str:
+        return "CachedThumbnail"
+
+    def run(self, info: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+        ydl = self._downloader
+        thumbnails = info.get("thumbnails") or []
+        if not thumbnails or ydl.params.get("overwrites", True):
+            return [], info
+        for t in reversed(thumbnails):
+            headers = t.get("http_headers") or {}
+            path = self._cache.fetch(t["url"], lambda url: ydl.urlopen(Request(url, headers=headers)))
+            if path is not None:
+                break
+        else:
+            return [], info
+        ext = t.get("ext") or determine_ext(t["url"], "jpg")
+        target = replace_extension(ydl.prepare_filename(info, "temp"), ext, info.get("ext"))
+        if target and not os.path.exists(target):
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            shutil.copyfile(path, target)
+            self.write_debug(f"Reusing cached thumbnail for {target}")
+        return [], info
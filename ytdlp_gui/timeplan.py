@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from .models import DownloadTask, TimeProfile
+from .utils import format_bytes
+
+logger = logging.getLogger(__name__)
+
+ProfileCallback = Callable[[TimeProfile | None], None]
+ReleaseCallback = Callable[[DownloadTask], None]
+
+_MAX_WAIT = 300.0
+_RATE_RECHECK = 0.5
+_BURST_SECONDS = 0.25
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+DEFAULT_PROFILES: list[dict[str, Any]] = [
+    {"name": "daytime", "start": "08:00", "end": "23:00", "rate": 2 * 1024 ** 2, "slots": 1},
+    {"name": "night", "start": "23:00", "end": "08:00", "rate": 0, "slots": 5},
+]
+
+def _minutes(hhmm: str) -> int:
+    hours, _, minutes = hhmm.strip().partition(":")
+    value = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= value < 24 * 60:
+        raise ValueError(f"Invalid time of day: {hhmm!r}")
+    return value
+
+def is_active(profile: TimeProfile, when: datetime) -> bool:
+    start, end = _minutes(profile.start), _minutes(profile.end)
+    now = when.hour * 60 + when.minute
+    if start == end:
+        return True
+    if start < end:
+        return start <= now < end
+    return now >= start or now < end
+
+def active_profile(profiles: Iterable[TimeProfile], when: datetime) -> TimeProfile | None:
+    return next((p for p in profiles if is_active(p, when)), None)
+
+def next_boundary(profiles: Iterable[TimeProfile], when: datetime) -> datetime | None:
+    base = when.replace(second=0, microsecond=0)
+    best: datetime | None = None
+    for profile in profiles:
+        for hhmm in (profile.start, profile.end):
+            m = _minutes(hhmm)
+            candidate = base.replace(hour=m // 60, minute=m % 60)
+            if candidate <= when:
+                candidate += timedelta(days=1)
+            if best is None or candidate < best:
+                best = candidate
+    return best
+
+def profiles_from_settings(raw: Iterable[dict[str, Any]]) -> list[TimeProfile]:
+    profiles = [TimeProfile(**entry) for entry in raw]
+    for profile in profiles:
+        _minutes(profile.start)
+        _minutes(profile.end)
+    return profiles
+
+def _parse_rate(text: str) -> int:
+    text = text.strip().upper().removesuffix("/S").removesuffix("B")
+    if text in ("", "0", "UNLIMITED", "-"):
+        return 0
+    unit = text[-1] if text[-1] in _RATE_UNITS else ""
+    return int(float(text[: len(text) - len(unit)]) * _RATE_UNITS[unit])
+
+def _format_rate(rate: int) -> str:
+    if not rate:
+        return "unlimited"
+    for unit in ("G", "M", "K"):
+        if rate % _RATE_UNITS[unit] == 0:
+            return f"{rate // _RATE_UNITS[unit]}{unit}"
+    return str(rate)
+
+def parse_profiles(text: str) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) not in (3, 4) or "-" not in parts[1]:
+            raise ValueError(f"Line {lineno}: expected 'name HH:MM-HH:MM rate [slots]'")
+        start, end = parts[1].split("-", 1)
+        try:
+            _minutes(start)
+            _minutes(end)
+            rate = _parse_rate(parts[2])
+            slots = int(parts[3]) if len(parts) == 4 else 0
+        except ValueError as exc:
+            raise ValueError(f"Line {lineno}: {exc}") from None
+        out.append({"name": parts[0], "start": start, "end": end, "rate": rate, "slots": slots})
+    return out
+
+def format_profiles(raw: Iterable[dict[str, Any]]) -> str:
+    return "\n".join(
+        f"{p['name']}  {p['start']}-{p['end']}  {_format_rate(p.get('rate', 0))}"
+        + (f"  {p['slots']}" if p.get("slots") else "")
+        for p in raw
+    )
+
+def describe_profile(profile: TimeProfile | None, default_slots: int) -> str:
+    if profile is None:
+        return f"default ({default_slots} slot(s), unlimited)"
+    rate = f"{format_bytes(profile.rate)}/s" if profile.rate else "unlimited"
+    return f"{profile.name} ({profile.slots or default_slots} slot(s), {rate})"
+
+class RateLimiter:
+
+    def __init__(self, rate: int = 0) -> None:
+        self._rate = max(0, rate)
+        self._next = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def set_rate(self, rate: int) -> None:
+        with self._lock:
+            self._rate = max(0, rate)
+            self._next = time.monotonic()
+            self._generation += 1
+
+    def throttle(self, nbytes: int, cancel: threading.Event) -> None:
+        if self._rate <= 0 or nbytes <= 0:
+            return
+        with self._lock:
+            rate = self._rate
+            if rate <= 0:
+                return
+            now = time.monotonic()
+            self._next = max(self._next, now - _BURST_SECONDS) + nbytes / rate
+            deadline = self._next
+            generation = self._generation
+        while generation == self._generation and not cancel.is_set():
+            delay = deadline - time.monotonic()
+            if delay <= 0:
+                return
+            cancel.wait(min(delay, _RATE_RECHECK))
+
+class TimePlan:
+
+    def __init__(
+        self,
+        profiles: Iterable[TimeProfile],
+        *,
+        on_change: ProfileCallback,
+        on_release: ReleaseCallback,
+    ) -> None:
+        self._profiles = list(profiles)
+        self._on_change = on_change
+        self._on_release = on_release
+        self._active: TimeProfile | None = None
+        self._held: dict[str, DownloadTask] = {}
+        self._timed: list[tuple[float, int, str]] = []
+        self._by_window: dict[str, dict[str, DownloadTask]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        if self._profiles:
+            self._ensure_thread()
+
+    @property
+    def active(self) -> TimeProfile | None:
+        return self._active
+
+    @property
+    def held_count(self) -> int:
+        return len(self._held)
+
+    def held(self) -> list[DownloadTask]:
+        with self._cond:
+            return list(self._held.values())
+
+    def window_names(self) -> list[str]:
+        return [p.name for p in self._profiles]
+
+    def hold(self, task: DownloadTask) -> bool:
+        with self._cond:
+            if task.not_before > time.time():
+                heapq.heappush(self._timed, (task.not_before, next(self._seq), task.id))
+                self._held[task.id] = task
+            elif task.window and not self._window_open(task.window):
+                self._by_window.setdefault(task.window, {})[task.id] = task
+                self._held[task.id] = task
+            else:
+                return False
+            self._wake()
+        self._ensure_thread()
+        return True
+
+    def remove(self, task_id: str) -> DownloadTask | None:
+        with self._cond:
+            task = self._held.pop(task_id, None)
+            if task is not None and task.window in self._by_window:
+                self._by_window[task.window].pop(task_id, None)
+        return task
+
+    def set_profiles(self, profiles: Iterable[TimeProfile]) -> None:
+        with self._cond:
+            self._profiles = list(profiles)
+            self._wake()
+        if self._profiles or self._held:
+            self._ensure_thread()
+        elif self._active is not None:
+            self._active = None
+            self._on_change(None)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(2.0)
+
+    def _wake(self) -> None:
+        self._dirty = True
+        self._cond.notify_all()
+
+    def _window_open(self, name: str) -> bool:
+        return self._active is not None and self._active.name == name
+
+    def _ensure_thread(self) -> None:
+        with self._cond:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="time-plan")
+        self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            released: list[DownloadTask] = []
+            with self._cond:
+                if self._closed:
+                    return
+                self._dirty = False
+                when = datetime.now()
+                now = when.timestamp()
+                profile = active_profile(self._profiles, when)
+                changed = profile != self._active
+                self._active = profile
+                while self._timed and self._timed[0][0] <= now:
+                    _, _, task_id = heapq.heappop(self._timed)
+                    task = self._held.get(task_id)
+                    if task is None or task.not_before > now:
+                        continue
+                    if task.window and not self._window_open(task.window):
+                        self._by_window.setdefault(task.window, {})[task_id] = task
+                    else:
+                        released.append(self._held.pop(task_id))
+                if profile is not None:
+                    for task in self._by_window.pop(profile.name, {}).values():
+                        released.append(self._held.pop(task.id))
+                deadlines = [self._timed[0][0]] if self._timed else []
+                boundary = next_boundary(self._profiles, when)
+                if boundary is not None:
+                    deadlines.append(boundary.timestamp())
+                timeout = min(_MAX_WAIT, max(0.0, min(deadlines) - now)) if deadlines else None
+            if changed:
+                self._on_change(profile)
+            for task in released:
+                self._on_release(task)
+            with self._cond:
+                if not self._dirty and not self._closed:
+                    self._cond.wait(timeout)
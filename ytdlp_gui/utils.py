@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import math
 import os
 import re
 import shutil
+import socket
 import sys
+import urllib.parse
+from collections.abc import Callable
 
 _YOUTUBE_PATTERNS = [
     r"https?://(?:www\.)?youtube\.com/watch\?.*v=[\w-]+",
@@ -34,6 +38,64 @@ def is_valid_youtube_url(url: str) -> bool:
 def looks_like_playlist_url(url: str) -> bool:
     return bool(re.search(r"[?&]list=", url, re.IGNORECASE))
 
+_PLAYLIST_ITEM_RE = re.compile(r"(\d+)?(?:([-:])(\d+)?(?::(\d+))?)?")
+
+_PROBE_HOSTS = (("1.1.1.1", 443), ("8.8.8.8", 443), ("9.9.9.9", 443))
+
+def parse_playlist_items(spec: str) -> tuple[Callable[[int], bool], float]:
+    spec = spec.replace(" ", "")
+    if not spec:
+        return (lambda _: True), math.inf
+
+    ranges: list[tuple[int, float, int]] = []
+    for segment in spec.split(","):
+        m = _PLAYLIST_ITEM_RE.fullmatch(segment)
+        if not segment or not m or not (m.group(1) or m.group(2)):
+            raise ValueError(f"Invalid playlist item range: {segment!r}")
+        if not m.group(1) and m.group(2) == "-":
+            raise ValueError(f"Negative playlist indices are not supported: {segment!r}")
+        start = int(m.group(1) or 1)
+        if m.group(2):
+            stop = float(m.group(3)) if m.group(3) else math.inf
+        else:
+            stop = float(start)
+        step = int(m.group(4) or 1)
+        if start < 1 or step < 1:
+            raise ValueError(f"Invalid playlist item range: {segment!r}")
+        ranges.append((start, stop, step))
+
+    def matches(index: int) -> bool:
+        return any(
+            start <= index <= stop and (index - start) % step == 0
+            for start, stop, step in ranges
+        )
+
+    return matches, max(stop for _, stop, _ in ranges)
+
+_TIMESTAMP_RE = re.compile(r"(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d+)?)")
+
+def parse_timestamp(text: str) -> float:
+    m = _TIMESTAMP_RE.fullmatch(text.strip())
+    if not m:
+        raise ValueError(f"Invalid timestamp: {text!r}")
+    hours, minutes, seconds = m.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+
+def parse_time_ranges(spec: str) -> list[tuple[float, float]]:
+    ranges: list[tuple[float, float]] = []
+    for segment in spec.replace(" ", "").split(","):
+        if not segment:
+            continue
+        start, sep, end = segment.partition("-")
+        if not sep:
+            raise ValueError(f"Invalid time range: {segment!r}")
+        lo = parse_timestamp(start) if start else 0.0
+        hi = parse_timestamp(end) if end else math.inf
+        if hi <= lo:
+            raise ValueError(f"Invalid time range: {segment!r}")
+        ranges.append((lo, hi))
+    return ranges
+
 def format_bytes(num_bytes: int | float) -> str:
     if num_bytes <= 0:
         return "0 B"
@@ -103,6 +165,26 @@ def ffmpeg_installed() -> bool:
 def ffmpeg_path() -> str | None:
     return shutil.which("ffmpeg")
 
+def ffprobe_path() -> str | None:
+    return shutil.which("ffprobe")
+
+def is_online(url: str = "", timeout: float = 3.0) -> bool:
+    targets = list(_PROBE_HOSTS)
+    parts = urllib.parse.urlsplit(url)
+    if parts.hostname:
+        try:
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+        except ValueError:
+            port = 443
+        targets.insert(0, (parts.hostname, port))
+    for host, port in targets:
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                return True
+        except OSError:
+            continue
+    return False
+
 def open_folder(path: str) -> None:
     folder = path if os.path.isdir(path) else os.path.dirname(path)
     if not os.path.isdir(folder):
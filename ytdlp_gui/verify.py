@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import PostProcessingError
+
+from .utils import ffprobe_path
+
+logger = logging.getLogger(__name__)
+
+_PROBE_TIMEOUT = 60.0
+_DURATION_SLACK = 2.0
+_DURATION_RATIO = 0.02
+_MIN_AUDIO_BPS = 16_000
+_MIN_VIDEO_BPS = 64_000
+_MIN_FILE_BYTES = 1024
+
+@dataclass
+class Expectation:
+    duration: float = 0.0
+    video: bool = True
+    audio: bool = True
+
+@dataclass
+class ProbeResult:
+    path: str
+    problems: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+def check_probe(data: dict[str, Any], size: int, expect: Expectation) -> list[str]:
+    problems: list[str] = []
+    streams = data.get("streams") or []
+    video = sum(
+        1 for s in streams
+        if s.get("codec_type") == "video" and not (s.get("disposition") or {}).get("attached_pic")
+    )
+    audio = sum(1 for s in streams if s.get("codec_type") == "audio")
+    if expect.video and not video:
+        problems.append("no video stream")
+    if expect.audio and not audio:
+        problems.append("no audio stream")
+
+    try:
+        duration = float((data.get("format") or {}).get("duration") or 0)
+    except (TypeError, ValueError):
+        duration = 0.0
+    if expect.duration > 0:
+        slack = max(_DURATION_SLACK, expect.duration * _DURATION_RATIO)
+        if duration <= 0:
+            problems.append("container has no duration")
+        elif abs(duration - expect.duration) > slack:
+            problems.append(f"duration {duration:.1f}s, expected {expect.duration:.1f}s")
+
+    seconds = expect.duration or duration
+    min_bps = (_MIN_VIDEO_BPS if expect.video else 0) + (_MIN_AUDIO_BPS if expect.audio else 0)
+    floor = max(_MIN_FILE_BYTES, int(seconds * min_bps / 8))
+    if size < floor:
+        problems.append(f"file is only {size} bytes, expected at least {floor}")
+    return problems
+
+class ProbePool:
+
+    def __init__(self, workers: int = 2) -> None:
+        self._exe = ffprobe_path()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ffprobe")
+        self._lock = threading.Lock()
+        self.files = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self._exe is not None
+
+    def verify(self, path: str, expect: Expectation) -> ProbeResult:
+        return self._pool.submit(self._verify, path, expect).result()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"files": self.files, "failed": self.failed, "seconds": round(self.seconds, 3)}
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _verify(self, path: str, expect: Expectation) -> ProbeResult:
+        start = time.perf_counter()
+        result = ProbeResult(path)
+        try:
+            size = os.path.getsize(path)
+            proc = subprocess.run(
+                [self._exe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path],
+                capture_output=True, timeout=_PROBE_TIMEOUT, check=False,
+            )
+            if proc.returncode != 0:
+                err = proc.stderr.decode(errors="replace").strip().splitlines()
+                result.problems.append(f"ffprobe could not read the file ({err[-1] if err else proc.returncode})")
+            else:
+                result.problems = check_probe(json.loads(proc.stdout or b"{}"), size, expect)
+        except subprocess.TimeoutExpired:
+            result.problems.append(f"ffprobe timed out after {_PROBE_TIMEOUT:.0f}s")
+        except (OSError, ValueError) as exc:
+            result.problems.append(str(exc))
+        result.seconds = time.perf_counter() - start
+        with self._lock:
+            self.files += 1
+            self.failed += 0 if result.ok else 1
+            self.seconds += result.seconds
+        return result
+
+class VerifyPP(PostProcessor):
+
+    def __init__(
+        self,
+        pool: ProbePool,
+        *,
+        video: bool,
+        audio: bool,
+        on_result: Callable[[ProbeResult], None],
+    ) -> None:
+        super().__init__(None)
+        self._pool = pool
+        self._video = video
+        self._audio = audio
+        self._on_result = on_result
+
+    def run(self, info: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+        path = info.get("filepath") or ""
+        if not path or not os.path.isfile(path):
+            return [], info
+        expect = Expectation(
+            duration=float(info.get("duration") or 0),
+            video=self._video and info.get("vcodec") != "none",
+            audio=self._audio and info.get("acodec") != "none",
+        )
+        result = self._pool.verify(path, expect)
+        self._on_result(result)
+        if not result.ok:
+            try:
+                os.unlink(path)
+            except OSError as exc:
+                logger.warning("Could not remove unverified file %s: %s", path, exc)
+            raise PostProcessingError(f"Verification failed: {'; '.join(result.problems)}")
+        return [], info
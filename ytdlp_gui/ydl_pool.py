@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import yt_dlp
+from yt_dlp.postprocessor import get_postprocessor
+
+from .cookie_store import CookieStore
+from .netpool import HttpPool, install, interrupted
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_KEYS = ("cookiefile", "proxy", "socket_timeout")
+_COOKIEFILE = _PROFILE_KEYS.index("cookiefile")
+_BASE_OPTS: dict[str, Any] = {"quiet": True, "no_warnings": True, "no_color": True}
+
+ProfileKey = tuple[Any, ...]
+
+def profile_key(opts: dict[str, Any]) -> ProfileKey:
+    return tuple(opts.get(k) for k in _PROFILE_KEYS)
+
+class YdlPool:
+
+    def __init__(
+        self,
+        max_idle_per_profile: int = 5,
+        http_pool: HttpPool | None = None,
+        cookie_store: CookieStore | None = None,
+    ) -> None:
+        self._max_idle = max_idle_per_profile
+        self._http_pool = http_pool
+        self._cookies = cookie_store or CookieStore()
+        self._idle: dict[ProfileKey, list[yt_dlp.YoutubeDL]] = {}
+        self._base: dict[int, dict[str, Any]] = {}
+        self._keys: dict[int, ProfileKey] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def session(self, opts: dict[str, Any]) -> Iterator[yt_dlp.YoutubeDL]:
+        ydl = self.acquire(opts)
+        ok = False
+        try:
+            yield ydl
+            ok = True
+        finally:
+            self.release(ydl, reuse=ok)
+
+    def acquire(self, opts: dict[str, Any]) -> yt_dlp.YoutubeDL:
+        key = profile_key(opts)
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+            if ydl is not None:
+                self.reused += 1
+        if ydl is None:
+            ydl = self._create(key)
+        elif opts.get("cookiefile"):
+            self._cookies.jar(opts["cookiefile"])
+        self._configure(ydl, opts)
+        return ydl
+
+    def release(self, ydl: yt_dlp.YoutubeDL, *, reuse: bool = True) -> None:
+        key = self._keys.get(id(ydl))
+        try:
+            if key is not None and key[_COOKIEFILE]:
+                self._cookies.save(key[_COOKIEFILE])
+        except Exception as exc:
+            logger.warning("Failed to save cookies: %s", exc)
+            reuse = False
+        if key is not None and reuse and not interrupted(ydl):
+            self._reset(ydl)
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self._max_idle:
+                    idle.append(ydl)
+                    return
+        self._discard(ydl)
+
+    def set_max_idle(self, max_idle: int) -> None:
+        excess: list[yt_dlp.YoutubeDL] = []
+        with self._lock:
+            self._max_idle = max_idle
+            for idle in self._idle.values():
+                while len(idle) > max_idle:
+                    excess.append(idle.pop(0))
+        for ydl in excess:
+            self._discard(ydl)
+
+    def close(self) -> None:
+        with self._lock:
+            pooled = [ydl for idle in self._idle.values() for ydl in idle]
+            self._idle.clear()
+        for ydl in pooled:
+            self._discard(ydl)
+
+    @property
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def _create(self, key: ProfileKey) -> yt_dlp.YoutubeDL:
+        opts = dict(_BASE_OPTS)
+        opts.update({k: v for k, v in zip(_PROFILE_KEYS, key) if v is not None})
+        cookiefile = opts.pop("cookiefile", None)
+        ydl = yt_dlp.YoutubeDL(opts)
+        if cookiefile:
+            ydl.__dict__["cookiejar"] = self._cookies.jar(cookiefile)
+        if self._http_pool is not None:
+            install(ydl, self._http_pool)
+        with self._lock:
+            self._base[id(ydl)] = dict(ydl.params)
+            self._keys[id(ydl)] = key
+            self.created += 1
+        return ydl
+
+    def _configure(self, ydl: yt_dlp.YoutubeDL, opts: dict[str, Any]) -> None:
+        params = dict(self._base[id(ydl)])
+        params.update({k: v for k, v in opts.items() if k not in _PROFILE_KEYS})
+        if "overwrites" in params:
+            params["nooverwrites"] = not params["overwrites"]
+        ydl.params = params
+        ydl._parse_outtmpl()
+        fmt = params.get("format")
+        ydl.format_selector = (
+            fmt if fmt in (None, "-") or callable(fmt)
+            else ydl.build_format_selector(fmt)
+        )
+
+        for pp_def_raw in params.get("postprocessors", []):
+            pp_def = dict(pp_def_raw)
+            when = pp_def.pop("when", "post_process")
+            pp_cls = get_postprocessor(pp_def.pop("key"))
+            ydl.add_post_processor(pp_cls(ydl, **pp_def), when=when)
+        for hook in params.get("post_hooks", []):
+            ydl.add_post_hook(hook)
+        for hook in params.get("progress_hooks", []):
+            ydl.add_progress_hook(hook)
+        for hook in params.get("postprocessor_hooks", []):
+            ydl.add_postprocessor_hook(hook)
+
+    def _reset(self, ydl: yt_dlp.YoutubeDL) -> None:
+        ydl.params = dict(self._base[id(ydl)])
+        for hooks in (ydl._progress_hooks, ydl._postprocessor_hooks, ydl._post_hooks):
+            hooks.clear()
+        for pps in ydl._pps.values():
+            pps.clear()
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls.clear()
+        ydl._printed_messages.clear()
+
+    def _discard(self, ydl: yt_dlp.YoutubeDL) -> None:
+        with self._lock:
+            self._base.pop(id(ydl), None)
+            self._keys.pop(id(ydl), None)
+        try:
+            ydl.close()
+        except Exception as exc:
+            logger.debug("Error closing YoutubeDL: %s", exc)